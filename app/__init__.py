@@ -4,19 +4,21 @@ from flask_mail import Mail
 from flask_login import LoginManager, current_user
 
 from .config import Config
-from .db import init_boe_db, init_users_db, migrate_users_db
 
 mail = Mail()
 login_manager = LoginManager()
 
 
-def create_app():
+def create_app(config: dict | None = None):
+    """`config`: valores que sustituyen a los de Config (p. ej. en los tests)."""
     app = Flask(
         __name__,
         template_folder=os.path.join(os.path.dirname(__file__), "..", "templates"),
         static_folder=os.path.join(os.path.dirname(__file__), "..", "static"),
     )
     app.config.from_object(Config)
+    if config:
+        app.config.update(config)
 
     # Inicializar extensiones
     mail.init_app(app)
@@ -28,22 +30,38 @@ def create_app():
     os.makedirs(upload_folder, exist_ok=True)
     app.config["UPLOAD_FOLDER"] = upload_folder
 
-    # Inicializar BBDD
-    with app.app_context():
-        init_boe_db()
-        init_users_db()
-        migrate_users_db()
-
+    # Las conexiones vuelven al pool al cerrar cada contexto (también el de init)
     from .db import teardown_appcontext
 
     app.teardown_appcontext(teardown_appcontext)
 
-    # ==== Tema claro / oscuro ====
-    @app.before_request
-    def ensure_theme():
-        if "theme" not in session:
-            session["theme"] = "light"
+    # Esquema de las BBDD: al arrancar solo se comprueba su versión (las
+    # migraciones se aplican con `flask db upgrade` o DB_AUTO_UPGRADE=1)
+    from .migraciones import comprobar_esquemas
+
+    with app.app_context():
+        comprobar_esquemas()
+
+    # Refresco del BOE en segundo plano (fuera del ciclo de cada petición)
+    from .scraping.refresco import RefrescoBoe
+
+    app.extensions["boe_refresco"] = RefrescoBoe(app)
+
+    # Fotos de perfil: se procesan en un pool de hilos (app/fotos.py)
+    from .fotos import ProcesadorFotos, imagen_perfil
 
+    app.extensions["fotos"] = ProcesadorFotos(app)
+    app.add_template_global(imagen_perfil)
+
+    # Comandos de consola (flask boe ..., flask db ...)
+    from .cli import boe_cli, db_cli
+
+    app.cli.add_command(boe_cli)
+    app.cli.add_command(db_cli)
+
+    # ==== Tema claro / oscuro ====
+    # Sin elegir, "light" (no se guarda en la sesión: así los anónimos no
+    # reciben cookie y sus páginas se pueden cachear en un proxy compartido)
     @app.route("/toggle_theme")
     def toggle_theme():
         current = session.get("theme", "light")
@@ -59,6 +77,13 @@ def create_app():
     def inject_user():
         return {"user": current_user}
 
+    # Imágenes de departamento: se leen (y se calcula su huella) al arrancar
+    from .imagenes import get_manifiesto, url_imagen_departamento
+
+    with app.app_context():
+        get_manifiesto()
+    app.add_template_global(url_imagen_departamento)
+
     # ==== Filtros Jinja ====
     from datetime import datetime, date
 
@@ -148,9 +173,11 @@ def create_app():
     from .routes.main import main_bp
     from .routes.auth import auth_bp
     from .routes.user import user_bp
+    from .routes.api import api_bp
 
     app.register_blueprint(main_bp)
     app.register_blueprint(auth_bp)
     app.register_blueprint(user_bp)
+    app.register_blueprint(api_bp)
 
     return app
\ No newline at end of file
@@ -0,0 +1,149 @@
+# app/busqueda.py
+
+import re
+import sqlite3
+
+# Índice de texto completo sobre `oposiciones` (contenido externo: el texto
+# vive solo en `oposiciones` y los triggers mantienen el índice al día).
+# remove_diacritics 2 -> "educacion" encuentra "Educación".
+SQL_FTS = """
+CREATE VIRTUAL TABLE IF NOT EXISTS oposiciones_fts USING fts5(
+    titulo, identificador, control,
+    content='oposiciones', content_rowid='id',
+    tokenize='unicode61 remove_diacritics 2'
+)
+"""
+
+SQL_TRIGGERS_FTS = (
+    """
+    CREATE TRIGGER IF NOT EXISTS oposiciones_fts_ai AFTER INSERT ON oposiciones BEGIN
+        INSERT INTO oposiciones_fts (rowid, titulo, identificador, control)
+        VALUES (new.id, new.titulo, new.identificador, new.control);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS oposiciones_fts_ad AFTER DELETE ON oposiciones BEGIN
+        INSERT INTO oposiciones_fts (oposiciones_fts, rowid, titulo, identificador, control)
+        VALUES ('delete', old.id, old.titulo, old.identificador, old.control);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS oposiciones_fts_au
+    AFTER UPDATE OF titulo, identificador, control ON oposiciones BEGIN
+        INSERT INTO oposiciones_fts (oposiciones_fts, rowid, titulo, identificador, control)
+        VALUES ('delete', old.id, old.titulo, old.identificador, old.control);
+        INSERT INTO oposiciones_fts (rowid, titulo, identificador, control)
+        VALUES (new.id, new.titulo, new.identificador, new.control);
+    END
+    """,
+)
+
+# Pesos de bm25 por columna: título, identificador, control
+PESOS_BM25 = (10.0, 5.0, 1.0)
+
+# "frase exacta" o palabra suelta (con * opcional al final)
+_TERMINO = re.compile(r'"([^"]*)"|(\S+)')
+
+
+def crear_indice_fts(db) -> bool:
+    """
+    Crea `oposiciones_fts` y sus triggers si faltan; la primera vez indexa lo
+    que ya hay. Devuelve False si este SQLite no trae FTS5 (se busca con LIKE).
+    """
+    existia = db.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'oposiciones_fts'"
+    ).fetchone()
+    try:
+        db.execute(SQL_FTS)
+    except sqlite3.OperationalError as e:
+        print(f"[BOE] FTS5 no disponible, la búsqueda usará LIKE: {e}")
+        return False
+    for sql in SQL_TRIGGERS_FTS:
+        db.execute(sql)
+    # `rank` = bm25 con estos pesos (se guarda en la propia tabla FTS). Se
+    # ordena por `rank` y no por bm25(): bm25() no se puede usar junto a
+    # COUNT(*) OVER () en la misma consulta.
+    pesos = ", ".join(str(p) for p in PESOS_BM25)
+    db.execute(
+        "INSERT INTO oposiciones_fts (oposiciones_fts, rank) VALUES ('rank', ?)",
+        (f"bm25({pesos})",),
+    )
+    if not existia:
+        db.execute("INSERT INTO oposiciones_fts (oposiciones_fts) VALUES ('rebuild')")
+    return True
+
+
+def fts_disponible(db) -> bool:
+    return db.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'oposiciones_fts'"
+    ).fetchone() is not None
+
+
+def expresion_fts(busqueda: str) -> str | None:
+    """
+    Traduce lo que escribe el usuario a una consulta FTS5 segura:
+    - "auxiliar administrativo" (entre comillas) -> frase exacta;
+    - palabra suelta -> prefijo ("educ" encuentra "Educación");
+    - BOE-A-2025-123 -> frase con sus partes, también como prefijo.
+    Todos los términos deben aparecer (AND). None si no queda nada que buscar.
+    """
+    partes = []
+    for frase, palabra in _TERMINO.findall(busqueda or ""):
+        if frase:
+            texto = frase.strip()
+            if texto:
+                partes.append('"' + texto.replace('"', '""') + '"')
+            continue
+        texto = palabra.rstrip("*").replace('"', "")
+        if not re.search(r"\w", texto):
+            continue
+        partes.append('"' + texto + '"*')
+    return " ".join(partes) or None
+
+
+class FiltroBusqueda:
+    """
+    Fragmentos SQL para filtrar `oposiciones` por texto (y ordenar por
+    relevancia). Con FTS5 se hace JOIN con `oposiciones_fts`; sin FTS5,
+    o si la búsqueda no es válida para FTS, se cae a LIKE.
+
+        filtro = FiltroBusqueda(db, busqueda)
+        sql = f"SELECT oposiciones.* FROM oposiciones{filtro.join} WHERE ...{filtro.where}"
+        params = [...] + filtro.params
+    """
+
+    def __init__(self, db, busqueda: str):
+        self.join = ""
+        self.where = ""
+        self.params = []
+        self.relevancia = False
+        if not busqueda or not busqueda.strip():
+            return
+
+        expresion = expresion_fts(busqueda) if fts_disponible(db) else None
+        if expresion is not None:
+            self.join = " JOIN oposiciones_fts ON oposiciones_fts.rowid = oposiciones.id"
+            self.where = " AND oposiciones_fts MATCH ?"
+            self.params = [expresion]
+            self.relevancia = True
+        else:
+            like = f"%{busqueda}%"
+            self.where = (
+                " AND (oposiciones.titulo LIKE ? OR oposiciones.identificador LIKE ?"
+                " OR oposiciones.control LIKE ?)"
+            )
+            self.params = [like, like, like]
+
+    def ordena_por_relevancia(self, orden: str) -> bool:
+        return orden == "relevancia" and self.relevancia
+
+    def order_by(self, orden: str) -> str:
+        """Cláusula ORDER BY para `orden` (fecha_desc, fecha_asc o relevancia)."""
+        if self.ordena_por_relevancia(orden):
+            # rank = bm25 con PESOS_BM25 (ver crear_indice_fts)
+            return (
+                " ORDER BY oposiciones_fts.rank, "
+                "oposiciones.dia DESC, oposiciones.id DESC"
+            )
+        direccion = "ASC" if orden in ("fecha_asc", "asc") else "DESC"
+        return f" ORDER BY oposiciones.dia {direccion}, oposiciones.id {direccion}"
@@ -0,0 +1,237 @@
+# app/cache.py
+
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from datetime import datetime
+from functools import wraps
+
+from flask import Response, current_app, g, request, session
+from flask_login import current_user
+
+# Los datos que se muestran solo cambian cuando el scraper confirma filas
+# nuevas, borradas o corregidas, y entonces sube `ingest_version`
+# (app/facetas.py) en la misma transacción. Todo lo que se cachea aquí va
+# asociado a esa versión: al cambiar, la caché se vacía entera.
+
+
+class _EnCurso:
+    """Un cálculo en marcha al que se apuntan las peticiones que llegan a la vez."""
+
+    __slots__ = ("hecho", "valor", "error")
+
+    def __init__(self):
+        self.hecho = threading.Event()
+        self.valor = None
+        self.error = None
+
+
+class CacheVersionada:
+    """
+    Caché LRU por proceso, válida mientras no cambie la versión de los datos
+    (que lee quien llama). Si llegan varias peticiones a la vez por la misma
+    clave que no está, solo la primera calcula el valor; las demás esperan
+    su resultado (o su excepción).
+    """
+
+    def __init__(self, tamano: int = 256):
+        self.tamano = tamano
+        self._lock = threading.Lock()
+        self._version = None
+        self._datos = OrderedDict()
+        self._en_curso = {}
+        self.aciertos = 0
+        self.fallos = 0
+        self.esperas = 0
+
+    def obtener(self, version, clave, calcular):
+        if self.tamano <= 0:
+            return calcular()
+        with self._lock:
+            if version != self._version:
+                self._datos.clear()
+                self._version = version
+            if clave in self._datos:
+                self._datos.move_to_end(clave)
+                self.aciertos += 1
+                return self._datos[clave]
+            en_curso = self._en_curso.get((version, clave))
+            if en_curso is None:
+                en_curso = self._en_curso[(version, clave)] = _EnCurso()
+                calcula = True
+                self.fallos += 1
+            else:
+                calcula = False
+                self.esperas += 1
+
+        if not calcula:
+            en_curso.hecho.wait()
+            if en_curso.error is not None:
+                raise en_curso.error
+            return en_curso.valor
+
+        try:
+            en_curso.valor = calcular()
+        except BaseException as e:
+            en_curso.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._en_curso[(version, clave)]
+                if en_curso.error is None and version == self._version:
+                    self._datos[clave] = en_curso.valor
+                    while len(self._datos) > self.tamano:
+                        self._datos.popitem(last=False)
+            en_curso.hecho.set()
+        return en_curso.valor
+
+    def metricas(self) -> dict:
+        with self._lock:
+            return {
+                "tamano": self.tamano,
+                "version": self._version,
+                "entradas": len(self._datos),
+                "aciertos": self.aciertos,
+                "fallos": self.fallos,
+                "esperas": self.esperas,
+            }
+
+
+def get_cache(nombre: str) -> CacheVersionada:
+    """Caché `nombre` ("paginas" o "consultas") de la app actual (CACHE_*_TAMANO)."""
+    caches = current_app.extensions.setdefault("caches", {})
+    cache = caches.get(nombre)
+    if cache is None:
+        tamano = current_app.config.get(f"CACHE_{nombre.upper()}_TAMANO", 256)
+        cache = caches.setdefault(nombre, CacheVersionada(tamano))
+    return cache
+
+
+def metricas_caches() -> dict:
+    from .facetas import metricas_cache
+
+    caches = current_app.extensions.get("caches", {})
+    return {
+        "facetas": metricas_cache(),
+        **{nombre: cache.metricas() for nombre, cache in caches.items()},
+    }
+
+
+def _version_datos():
+    """Versión de los datos, leída una vez por petición."""
+    version = getattr(g, "_version_datos", None)
+    if version is None:
+        from .repositorio import get_repositorio
+
+        version = g._version_datos = get_repositorio().version_datos()
+    return version
+
+
+def _clave_pagina(args_validos) -> tuple:
+    """Ruta, parámetros conocidos con valor (otros, como utm_*, no cuentan), día y tema."""
+    return (
+        request.path,
+        tuple(
+            (nombre, tuple(v for v in request.args.getlist(nombre) if v))
+            for nombre in args_validos
+            if any(request.args.getlist(nombre))
+        ),
+        datetime.today().strftime("%Y%m%d"),
+        session.get("theme", "light"),
+    )
+
+
+def consulta_en_cache(clave, calcular):
+    """Resultado de `calcular()` (una consulta del listado) para `clave`, por versión."""
+    return get_cache("consultas").obtener(_version_datos(), clave, calcular)
+
+
+def cachear_pagina(*args_validos):
+    """
+    Decorador de vistas GET públicas que devuelven el HTML de
+    `render_template`: a los anónimos se les sirve ya renderizado. La clave es
+    la de `_clave_pagina` con los parámetros `args_validos` (las páginas
+    muestran las oposiciones de hoy); la versión de los datos invalida. Con
+    sesión iniciada o mensajes flash pendientes no se cachea.
+    """
+
+    def decorador(vista):
+        @wraps(vista)
+        def envoltura(*a, **kw):
+            if current_user.is_authenticated or "_flashes" in session:
+                return vista(*a, **kw)
+            return get_cache("paginas").obtener(
+                _version_datos(), _clave_pagina(args_validos), lambda: vista(*a, **kw)
+            )
+
+        return envoltura
+
+    return decorador
+
+
+def _version_plantillas() -> str:
+    """
+    Huella de las plantillas (ruta, tamaño y fecha de cada fichero) y de las
+    imágenes de departamento, igual en todos los workers de un despliegue: un
+    cambio de HTML o de la URL de una imagen cambia los ETag.
+    """
+    huella = current_app.extensions.get("version_plantillas")
+    if huella is None:
+        from .imagenes import get_manifiesto
+
+        sha = hashlib.sha1(get_manifiesto().version.encode())
+        for raiz, _, ficheros in sorted(os.walk(current_app.template_folder)):
+            for nombre in sorted(ficheros):
+                info = os.stat(os.path.join(raiz, nombre))
+                sha.update(f"{raiz}/{nombre}:{info.st_size}:{info.st_mtime_ns};".encode())
+        huella = current_app.extensions.setdefault("version_plantillas", sha.hexdigest()[:12])
+    return huella
+
+
+def etag_pagina(args_validos) -> str:
+    """
+    ETag fuerte de la página: `_clave_pagina`, la versión de los datos, la de
+    las plantillas y, con sesión iniciada, el usuario y su `version_usuario`
+    (perfil, visitas y favoritas).
+    """
+    usuario = (
+        (current_user.id, current_user.version_usuario)
+        if current_user.is_authenticated else None
+    )
+    datos = (_clave_pagina(args_validos), _version_datos(), _version_plantillas(), usuario)
+    return hashlib.sha1(repr(datos).encode()).hexdigest()[:20]
+
+
+def respuesta_condicional(*args_validos):
+    """
+    Decorador de vistas GET de listado: pone ETag, Cache-Control y Vary, y si
+    el navegador o el proxy ya tienen esa versión (If-None-Match) responde
+    304 sin llamar a la vista, es decir, sin consultas ni renderizado. Las
+    páginas anónimas son `public` (un proxy compartido las puede servir a
+    quien no trae cookie de sesión); las de usuario, `private`.
+    """
+
+    def decorador(vista):
+        @wraps(vista)
+        def envoltura(*a, **kw):
+            if "_flashes" in session:
+                return vista(*a, **kw)
+            etag = etag_pagina(args_validos)
+            if request.if_none_match.contains(etag):
+                respuesta = Response(status=304)
+            else:
+                respuesta = current_app.make_response(vista(*a, **kw))
+            respuesta.set_etag(etag)
+            if current_user.is_authenticated:
+                respuesta.cache_control.private = True
+                respuesta.cache_control.no_cache = True
+            else:
+                respuesta.cache_control.public = True
+                respuesta.cache_control.max_age = current_app.config.get("CACHE_HTTP_MAX_AGE", 0)
+            respuesta.vary.add("Cookie")
+            return respuesta
+
+        return envoltura
+
+    return decorador
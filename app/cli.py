@@ -0,0 +1,225 @@
+# app/cli.py
+
+import os
+from datetime import date
+
+import click
+from flask import current_app
+from flask.cli import AppGroup
+
+boe_cli = AppGroup("boe", help="Tareas de mantenimiento de la BBDD del BOE.")
+db_cli = AppGroup("db", help="Versión del esquema de las BBDD y migraciones.")
+
+
+@boe_cli.command("backfill")
+@click.option("--from", "desde", required=True,
+              type=click.DateTime(formats=["%Y-%m-%d", "%Y%m%d"]),
+              help="Primer día a descargar (AAAA-MM-DD).")
+@click.option("--to", "hasta", default=None,
+              type=click.DateTime(formats=["%Y-%m-%d", "%Y%m%d"]),
+              help="Último día a descargar (por defecto, hoy).")
+@click.option("--workers", type=int, default=None,
+              help="Descargas simultáneas (por defecto BOE_SYNC_WORKERS).")
+@click.option("--procesos", type=int, default=None,
+              help="Procesos para parsear los sumarios (por defecto, uno por CPU).")
+@click.option("--lote-dias", type=int, default=None,
+              help="Días por transacción (por defecto BOE_INSERT_LOTE_DIAS).")
+def backfill_command(desde, hasta, workers, procesos, lote_dias):
+    """Descarga el histórico del BOE entre dos fechas (reanudable)."""
+    from app.scraping.backfill import backfill
+    from app.scraping.sync_lock import SyncEnCurso
+
+    desde = desde.date()
+    hasta = hasta.date() if hasta else date.today()
+    if hasta < desde:
+        raise click.BadParameter("--to no puede ser anterior a --from")
+
+    guardados = current_app.config.get("BOE_DIAS_GUARDADOS", 30)
+    if guardados and (date.today() - desde).days >= guardados:
+        click.echo(
+            f"[backfill] Aviso: BOE_DIAS_GUARDADOS={guardados}; la próxima "
+            "sincronización borrará los días más antiguos. Usa "
+            "BOE_DIAS_GUARDADOS=0 para conservar el histórico.",
+            err=True,
+        )
+
+    try:
+        progreso = backfill(
+            desde, hasta, max_workers=workers, procesos=procesos,
+            lote_dias=lote_dias, salida=click.echo,
+        )
+    except SyncEnCurso as e:
+        raise click.ClickException(str(e))
+
+    click.echo(
+        f"[backfill] Terminado: {progreso.dias} días, "
+        f"{progreso.nuevas} oposiciones nuevas, {progreso.errores} días con error"
+    )
+    if progreso.errores:
+        click.echo("[backfill] Vuelve a lanzarlo para reintentar los días con error.")
+
+
+@boe_cli.command("municipios")
+@click.argument("csv_ine", type=click.Path(exists=True, dir_okay=False))
+@click.option("--salida", type=click.Path(dir_okay=False), default=None,
+              help="TSV a generar (por defecto, el del gazetteer).")
+def municipios_command(csv_ine, salida):
+    """Regenera la lista de municipios desde el diccionario del INE (CSV)."""
+    from app.scraping.gazetteer import RUTA_MUNICIPIOS, convertir_ine
+
+    salida = salida or RUTA_MUNICIPIOS
+    with open(csv_ine, encoding="utf-8-sig", newline="") as f:
+        try:
+            filas = convertir_ine(f)
+        except ValueError as e:
+            raise click.ClickException(str(e))
+
+    with open(salida, "w", encoding="utf-8") as f:
+        f.write(
+            "# Municipios para el gazetteer de provincias (app/scraping/gazetteer.py).\n"
+            f"# Generado con `flask boe municipios` a partir de {os.path.basename(csv_ine)}.\n"
+            "# Formato: CPRO<TAB>NOMBRE (como en el diccionario de municipios del INE).\n"
+        )
+        for cpro, nombre in filas:
+            f.write(f"{cpro}\t{nombre}\n")
+    click.echo(f"{len(filas)} municipios guardados en {salida}")
+
+
+@boe_cli.command("provincias")
+@click.option("--lote", type=int, default=5000, help="Filas por transacción.")
+def provincias_command(lote):
+    """Recalcula la provincia de las oposiciones ya guardadas."""
+    from app.db import get_boe_db
+    from app.esquema import ids_dimension
+    from app.facetas import sumar_facetas
+    from app.scraping.gazetteer import extraer_provincia
+
+    boe_db = get_boe_db()
+    ultimo_id = 0
+    revisadas = cambiadas = 0
+    while True:
+        rows = boe_db.execute(
+            "SELECT id, titulo, control, dia, departamento_id, provincia_id, provincia "
+            "FROM vista_oposiciones WHERE id > ? ORDER BY id LIMIT ?",
+            (ultimo_id, lote),
+        ).fetchall()
+        if not rows:
+            break
+        nuevas = {}
+        for row in rows:
+            provincia = extraer_provincia(row["titulo"]) or extraer_provincia(row["control"])
+            if provincia != row["provincia"]:
+                nuevas[row["id"]] = provincia
+        ids = ids_dimension(boe_db, "provincias", nuevas.values())
+        cambios = []
+        antes = []
+        despues = []
+        for row in rows:
+            if row["id"] in nuevas:
+                provincia_id = ids.get(nuevas[row["id"]])
+                cambios.append((provincia_id, row["id"]))
+                antes.append(dict(row))
+                despues.append({**dict(row), "provincia_id": provincia_id})
+        boe_db.executemany("UPDATE oposiciones SET provincia_id = ? WHERE id = ?", cambios)
+        # Los contadores de los filtros pasan de la provincia vieja a la nueva
+        sumar_facetas(boe_db, antes, signo=-1)
+        sumar_facetas(boe_db, despues)
+        boe_db.commit()
+        revisadas += len(rows)
+        cambiadas += len(cambios)
+        ultimo_id = rows[-1]["id"]
+    click.echo(f"{revisadas} oposiciones revisadas, {cambiadas} con provincia corregida")
+
+
+@boe_cli.command("imagenes")
+def imagenes_command():
+    """Departamentos de la BBDD sin imagen en static/img/dept (ni alias)."""
+    from app.imagenes import get_manifiesto
+    from app.repositorio import Filtros, get_repositorio
+
+    manifiesto = get_manifiesto()
+    departamentos = get_repositorio().departamentos(Filtros())
+    sin_imagen = [d["departamento"] for d in departamentos
+                  if manifiesto.buscar(d["departamento"]) is None]
+    click.echo(f"{len(manifiesto)} imágenes, {len(departamentos)} departamentos con oposiciones")
+    for nombre in sin_imagen:
+        click.echo(f"  sin imagen: {nombre}")
+    if sin_imagen:
+        click.echo("Añade el fichero (nombre con _ en lugar de espacios) o un alias en "
+                   "ALIAS_DEPARTAMENTOS (app/imagenes.py).")
+
+
+@boe_cli.command("fotos")
+@click.option("--borrar", is_flag=True, help="Borrarlas (por defecto solo se listan).")
+@click.option("--horas", type=float, default=1.0, show_default=True,
+              help="Antigüedad mínima (las más nuevas pueden estar procesándose).")
+def fotos_command(borrar, horas):
+    """Fotos de static/uploads/profiles que no usa ningún usuario."""
+    from app.fotos import get_procesador
+
+    procesador = get_procesador()
+    huerfanas = procesador.huerfanas(antiguedad=horas * 3600)
+    ocupan = sum(os.path.getsize(os.path.join(procesador.directorio, n)) for n in huerfanas)
+    click.echo(f"{len(huerfanas)} ficheros sin usar ({ocupan / 1024 / 1024:.1f} MB)")
+    for nombre in huerfanas:
+        click.echo(f"  {nombre}")
+        if borrar:
+            os.remove(os.path.join(procesador.directorio, nombre))
+    if huerfanas and not borrar:
+        click.echo("Usa --borrar para eliminarlos.")
+
+
+@boe_cli.command("planes")
+@click.option("--analyze/--no-analyze", default=True,
+              help="Actualizar antes las estadísticas del planificador (ANALYZE).")
+@click.option("-v", "--verbose", is_flag=True, help="Mostrar el plan de cada consulta.")
+def planes_command(analyze, verbose):
+    """Comprueba con EXPLAIN QUERY PLAN que ninguna consulta de los listados
+    recorre una tabla entera; termina con error si alguna lo hace."""
+    from app.db import get_boe_db, get_users_db
+    from app.queries import (
+        actualizar_estadisticas,
+        consultas_rutas,
+        es_recorrido_completo,
+        plan_consulta,
+    )
+
+    boe_db = get_boe_db()
+    if analyze:
+        actualizar_estadisticas(boe_db, forzar=True)
+    bbdd = {"boe": boe_db, "users": get_users_db()}
+
+    fallos = 0
+    for nombre_db, nombre, sql, params in consultas_rutas(boe_db):
+        plan = plan_consulta(bbdd[nombre_db], sql, params)
+        recorridos = [paso for paso in plan if es_recorrido_completo(paso)]
+        fallos += bool(recorridos)
+        click.echo(f"{'✗' if recorridos else '✓'} {nombre}")
+        if verbose or recorridos:
+            for paso in plan:
+                click.echo(f"    {paso}")
+    if fallos:
+        raise click.ClickException(f"{fallos} consultas recorren una tabla entera")
+    click.echo("Todas las consultas usan índices")
+
+
+@db_cli.command("upgrade")
+def upgrade_command():
+    """Aplica las migraciones pendientes de oposiciones.db y usuarios.db."""
+    from app.migraciones import actualizar_esquemas
+
+    aplicadas = actualizar_esquemas(salida=click.echo)
+    click.echo(f"{aplicadas} migraciones aplicadas" if aplicadas else "Esquema al día")
+
+
+@db_cli.command("version")
+def version_command():
+    """Muestra la versión del esquema de cada BBDD y lo que falta por aplicar."""
+    from app.migraciones import BBDD, pendientes, version_esquema
+
+    for nombre, get_db, migraciones in BBDD:
+        db = get_db()
+        faltan = pendientes(db, migraciones)
+        click.echo(f"{nombre}: versión {version_esquema(db)} de {migraciones[-1].version}")
+        for migracion in faltan:
+            click.echo(f"    pendiente {migracion.version}: {migracion.descripcion}")
@@ -8,6 +8,69 @@ class Config:
     USERS_DB_PATH = os.getenv("USERS_DB_PATH", "usuarios.db")
     BOE_DB_PATH = os.getenv("BOE_DB_PATH", "oposiciones.db")
 
+    # Pool de conexiones SQLite (por proceso y BBDD) y pragmas de cada conexión
+    DB_POOL_TAMANO = int(os.getenv("DB_POOL_TAMANO", "8"))
+    DB_BUSY_TIMEOUT_MS = int(os.getenv("DB_BUSY_TIMEOUT_MS", "5000"))
+    DB_JOURNAL_MODE = os.getenv("DB_JOURNAL_MODE", "WAL")
+    DB_SYNCHRONOUS = os.getenv("DB_SYNCHRONOUS", "NORMAL")
+    DB_MMAP_MB = int(os.getenv("DB_MMAP_MB", "64"))
+    DB_CACHE_MB = int(os.getenv("DB_CACHE_MB", "16"))
+    DB_STATEMENT_CACHE = int(os.getenv("DB_STATEMENT_CACHE", "256"))
+
+    # Aplicar al arrancar las migraciones pendientes (con 0 solo se avisa y se
+    # aplican con `flask db upgrade`, p. ej. al desplegar)
+    DB_AUTO_UPGRADE = os.getenv("DB_AUTO_UPGRADE", "1") == "1"
+
+    # Acceso a datos de rutas y tareas (app/repositorio): "sqlite" (pools de
+    # app/db.py) o "sqlalchemy" (SQLAlchemy Core contra DB_URL; por defecto,
+    # los mismos ficheros SQLite)
+    DB_BACKEND = os.getenv("DB_BACKEND", "sqlite")
+    DB_URL = os.getenv("DB_URL", "")
+
+    # Entradas de la caché por proceso (app/cache.py) de páginas públicas
+    # renderizadas y de resultados de listados (0 = desactivada)
+    CACHE_PAGINAS_TAMANO = int(os.getenv("CACHE_PAGINAS_TAMANO", "512"))
+    CACHE_CONSULTAS_TAMANO = int(os.getenv("CACHE_CONSULTAS_TAMANO", "256"))
+
+    # max-age (s) de las páginas públicas: lo que un navegador o proxy puede
+    # servirlas sin revalidar tras una sincronización (0 = revalidar siempre,
+    # con ETag y 304)
+    CACHE_HTTP_MAX_AGE = int(os.getenv("CACHE_HTTP_MAX_AGE", "60"))
+
+    # Fotos de perfil (app/fotos.py): hilos que las procesan, tamaño máximo
+    # de la subida y píxeles máximos de la imagen (evita descomprimir bombas)
+    FOTO_WORKERS = int(os.getenv("FOTO_WORKERS", "2"))
+    FOTO_MAX_MB = int(os.getenv("FOTO_MAX_MB", "10"))
+    FOTO_MAX_PIXELES = int(os.getenv("FOTO_MAX_PIXELES", "40000000"))
+
+    # Días de oposiciones que se conservan al sincronizar (0 = todos, p.ej. tras un backfill)
+    BOE_DIAS_GUARDADOS = int(os.getenv("BOE_DIAS_GUARDADOS", "30"))
+
+    # Segundos mínimos entre refrescos del BOE en segundo plano (0 = desactivado)
+    BOE_REFRESCO_INTERVALO = int(os.getenv("BOE_REFRESCO_INTERVALO", "900"))
+
+    # Descargas simultáneas al sincronizar varios días del BOE
+    BOE_SYNC_WORKERS = int(os.getenv("BOE_SYNC_WORKERS", "4"))
+
+    # Una sola sincronización a la vez: caducidad del lease y espera máxima
+    BOE_SYNC_LEASE_SEGUNDOS = int(os.getenv("BOE_SYNC_LEASE_SEGUNDOS", "600"))
+    BOE_SYNC_ESPERA_MAX = int(os.getenv("BOE_SYNC_ESPERA_MAX", "600"))
+
+    # Días que se agrupan en una misma transacción al guardar
+    BOE_INSERT_LOTE_DIAS = int(os.getenv("BOE_INSERT_LOTE_DIAS", "7"))
+
+    # Cliente HTTP del BOE (la URL se puede apuntar a un servidor local de pruebas)
+    BOE_SUMARIO_URL = os.getenv(
+        "BOE_SUMARIO_URL", "https://www.boe.es/datosabiertos/api/boe/sumario/{fecha}"
+    )
+    BOE_HTTP_TIMEOUT = float(os.getenv("BOE_HTTP_TIMEOUT", "10"))
+    BOE_HTTP_REINTENTOS = int(os.getenv("BOE_HTTP_REINTENTOS", "3"))
+
+    # Caché local de sumarios crudos ("" la desactiva) y modo sin red
+    BOE_CACHE_DIR = os.getenv("BOE_CACHE_DIR", "boe_cache")
+    BOE_CACHE_MAX_MB = int(os.getenv("BOE_CACHE_MAX_MB", "200"))
+    BOE_OFFLINE = os.getenv("BOE_OFFLINE", "0") == "1"
+
     # Flask-Mail (idealmente todo por variables de entorno)
     MAIL_SERVER = "smtp.gmail.com"
     MAIL_PORT = 587
@@ -1,7 +1,33 @@
-from flask import current_app
-import sqlite3
 from flask import g, current_app
 
+from .db_pool import crear_pool
+
+
+# =========================
+# Pools de conexiones (uno por BBDD y proceso)
+# =========================
+def get_pool(nombre: str):
+    """
+    Pool de la BBDD `nombre` ("boe" o "users") de la app actual. Las
+    conexiones de usuarios llevan la del BOE adjunta como esquema `boe`.
+    """
+    pools = current_app.extensions.setdefault("db_pools", {})
+    pool = pools.get(nombre)
+    if pool is None:
+        config = current_app.config
+        if nombre == "boe":
+            pool = crear_pool(config["BOE_DB_PATH"], config)
+        else:
+            pool = crear_pool(config["USERS_DB_PATH"], config,
+                              adjuntas={"boe": config["BOE_DB_PATH"]})
+        pool = pools.setdefault(nombre, pool)
+    return pool
+
+
+def metricas_pools():
+    pools = current_app.extensions.get("db_pools", {})
+    return {nombre: pool.metricas() for nombre, pool in pools.items()}
+
 
 # =========================
 # BBDD BOE (solo oposiciones)
@@ -9,134 +35,31 @@ from flask import g, current_app
 def get_boe_db():
     db = getattr(g, "_boe_db", None)
     if db is None:
-        db = g._boe_db = sqlite3.connect(current_app.config["BOE_DB_PATH"])
-        db.row_factory = sqlite3.Row
+        db = g._boe_db = get_pool("boe").adquirir()
     return db
 
 
-def init_boe_db():
-    db = get_boe_db()
-    db.execute(
-        """
-        CREATE TABLE IF NOT EXISTS oposiciones (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            identificador TEXT,
-            control TEXT,
-            titulo TEXT,
-            url_html TEXT UNIQUE,
-            url_pdf TEXT,
-            departamento TEXT,
-            fecha TEXT,
-            provincia TEXT
-        )
-    """
-    )
-    db.execute("CREATE INDEX IF NOT EXISTS idx_oposiciones_fecha ON oposiciones(fecha)")
-    db.execute(
-        "CREATE INDEX IF NOT EXISTS idx_oposiciones_departamento ON oposiciones(departamento)"
-    )
-    db.commit()
-
-
 # =========================
 # BBDD Usuarios
 # =========================
 def get_users_db():
     db = getattr(g, "_users_db", None)
     if db is None:
-        db = g._users_db = sqlite3.connect(current_app.config["USERS_DB_PATH"])
-        db.row_factory = sqlite3.Row
+        db = g._users_db = get_pool("users").adquirir()
     return db
 
 
-def init_users_db():
-    db = get_users_db()
-    db.execute(
-        """
-        CREATE TABLE IF NOT EXISTS users (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            email TEXT UNIQUE,
-            password_hash TEXT,
-            name TEXT,
-            apellidos TEXT,
-            age INTEGER,
-            telefono TEXT,
-            foto_perfil TEXT,
-            nivel_estudios TEXT,
-            titulacion TEXT
-        )
-    """
-    )
-    db.execute(
-        """
-        CREATE TABLE IF NOT EXISTS visitas (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            user_id INTEGER NOT NULL,
-            oposicion_id INTEGER NOT NULL,
-            fecha_visita TEXT NOT NULL,
-            UNIQUE(user_id, oposicion_id)
-        )
-    """
-    )
-    db.execute(
-        """
-        CREATE TABLE IF NOT EXISTS favoritas (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            user_id INTEGER NOT NULL,
-            oposicion_id INTEGER NOT NULL,
-            fecha_favorito TEXT NOT NULL,
-            UNIQUE(user_id, oposicion_id)
-        )
-    """
-    )
-    db.execute(
-        """
-        CREATE TABLE IF NOT EXISTS suscripciones (
-            user_id INTEGER PRIMARY KEY,
-            alerta_diaria INTEGER DEFAULT 0,
-            alerta_favoritos INTEGER DEFAULT 0,
-            departamento_filtro TEXT
-        )
-    """
-    )
-    db.commit()
-
-
-def migrate_users_db():
-    """Migración para agregar campos nuevos si no existen."""
-    db = get_users_db()
-    try:
-        cursor = db.execute("PRAGMA table_info(users)")
-        columns = [row[1] for row in cursor.fetchall()]
-
-        nuevas_columnas = [
-            ("telefono", "TEXT"),
-            ("foto_perfil", "TEXT"),
-            ("nivel_estudios", "TEXT"),
-            ("titulacion", "TEXT"),
-        ]
-
-        for columna, tipo in nuevas_columnas:
-            if columna not in columns:
-                db.execute(f"ALTER TABLE users ADD COLUMN {columna} {tipo}")
-                print(f"✅ Columna '{columna}' agregada a la tabla users")
-
-        db.commit()
-        print("✅ Migración completada")
-    except Exception as e:
-        print(f"⚠️ Error en migración: {e}")
-
-
 # =========================
-# Cierre conexiones
+# Devolver conexiones al pool
 # =========================
 
 
 def teardown_appcontext(exception):
-    boe_db = getattr(g, "_boe_db", None)
+    # Las conexiones vuelven al pool (lo no confirmado se deshace)
+    boe_db = g.pop("_boe_db", None)
     if boe_db is not None:
-        boe_db.close()
+        get_pool("boe").devolver(boe_db)
 
-    users_db = getattr(g, "_users_db", None)
+    users_db = g.pop("_users_db", None)
     if users_db is not None:
-        users_db.close()
+        get_pool("users").devolver(users_db)
@@ -0,0 +1,184 @@
+# app/db_pool.py
+
+import os
+import sqlite3
+import threading
+import time
+
+
+class PoolSQLite:
+    """
+    Pool de conexiones SQLite por proceso.
+
+    Las conexiones se abren una sola vez (con WAL, synchronous=NORMAL,
+    busy_timeout, mmap y caché de páginas) y se reutilizan entre peticiones
+    e hilos, conservando su caché de sentencias preparadas. Si todas están
+    ocupadas se abre una conexión extra que se cierra al devolverla, así que
+    nunca se bloquea una petición esperando al pool.
+
+    Tras un fork (p. ej. gunicorn con --preload) el hijo no reutiliza las
+    conexiones del padre: empieza con el pool vacío.
+
+    `adjuntas` ({esquema: ruta}) son BBDD que se hacen ATTACH en cada
+    conexión, para cruzar tablas de ambas en una sola consulta
+    (`JOIN boe.oposiciones ...`).
+    """
+
+    def __init__(self, ruta: str, tamano: int = 8, busy_timeout_ms: int = 5000,
+                 journal_mode: str = "WAL", synchronous: str = "NORMAL",
+                 mmap_bytes: int = 64 * 1024 * 1024, cache_kb: int = 16 * 1024,
+                 cached_statements: int = 256, adjuntas: dict | None = None):
+        self.ruta = ruta
+        self.adjuntas = dict(adjuntas or {})
+        self.tamano = max(1, tamano)
+        self.busy_timeout_ms = busy_timeout_ms
+        self.journal_mode = journal_mode
+        self.synchronous = synchronous
+        self.mmap_bytes = mmap_bytes
+        self.cache_kb = cache_kb
+        self.cached_statements = cached_statements
+
+        self._lock = threading.Lock()
+        self._libres = []
+        self._extra = set()
+        self._pid = os.getpid()
+        self._abiertas = 0
+        self._en_uso = 0
+        self._metricas = {
+            "creadas": 0,
+            "reutilizadas": 0,
+            "desbordes": 0,
+            "devueltas": 0,
+            "rollbacks": 0,
+            "descartadas": 0,
+            "max_en_uso": 0,
+            "segundos_conectando": 0.0,
+        }
+
+    def _conectar(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(
+            self.ruta,
+            timeout=self.busy_timeout_ms / 1000,
+            check_same_thread=False,
+            cached_statements=self.cached_statements,
+        )
+        conn.row_factory = sqlite3.Row
+        for esquema, ruta in self.adjuntas.items():
+            conn.execute(f"ATTACH DATABASE ? AS {esquema}", (ruta,))
+        conn.execute(f"PRAGMA busy_timeout = {int(self.busy_timeout_ms)}")
+        # journal_mode, synchronous, mmap y caché de páginas van por esquema:
+        # sin prefijo solo se aplicarían a `main` y las adjuntas se quedarían
+        # con los valores por defecto (synchronous=FULL)
+        for esquema in ("main", *self.adjuntas):
+            if self.journal_mode:
+                conn.execute(f"PRAGMA {esquema}.journal_mode = {self.journal_mode}")
+            if self.synchronous:
+                conn.execute(f"PRAGMA {esquema}.synchronous = {self.synchronous}")
+            conn.execute(f"PRAGMA {esquema}.mmap_size = {int(self.mmap_bytes)}")
+            # Negativo = tamaño en KiB en lugar de en páginas
+            conn.execute(f"PRAGMA {esquema}.cache_size = {-int(self.cache_kb)}")
+        conn.execute("PRAGMA temp_store = MEMORY")
+        return conn
+
+    def _comprobar_fork(self):
+        if self._pid != os.getpid():
+            # No se cierran: pertenecen al proceso padre
+            self._libres = []
+            self._extra = set()
+            self._abiertas = 0
+            self._en_uso = 0
+            self._pid = os.getpid()
+
+    def adquirir(self) -> sqlite3.Connection:
+        extra = False
+        with self._lock:
+            self._comprobar_fork()
+            conn = self._libres.pop() if self._libres else None
+            if conn is not None:
+                self._metricas["reutilizadas"] += 1
+            elif self._abiertas < self.tamano:
+                self._abiertas += 1
+            else:
+                extra = True
+                self._metricas["desbordes"] += 1
+            self._en_uso += 1
+            self._metricas["max_en_uso"] = max(self._metricas["max_en_uso"], self._en_uso)
+
+        if conn is None:
+            inicio = time.perf_counter()
+            try:
+                conn = self._conectar()
+            except Exception:
+                with self._lock:
+                    self._en_uso -= 1
+                    if not extra:
+                        self._abiertas -= 1
+                raise
+            with self._lock:
+                self._metricas["creadas"] += 1
+                self._metricas["segundos_conectando"] += time.perf_counter() - inicio
+                if extra:
+                    self._extra.add(id(conn))
+        return conn
+
+    def devolver(self, conn: sqlite3.Connection):
+        """Devuelve `conn` al pool (deshaciendo lo que no se confirmó)."""
+        sana = True
+        try:
+            if conn.in_transaction:
+                conn.rollback()
+                with self._lock:
+                    self._metricas["rollbacks"] += 1
+        except sqlite3.Error:
+            sana = False
+
+        with self._lock:
+            self._metricas["devueltas"] += 1
+            if os.getpid() != self._pid:
+                # Conexión heredada de antes del fork: no es de este pool
+                conn.close()
+                return
+            self._en_uso = max(0, self._en_uso - 1)
+            if id(conn) in self._extra:
+                self._extra.discard(id(conn))
+            elif sana:
+                self._libres.append(conn)
+                return
+            else:
+                self._abiertas -= 1
+                self._metricas["descartadas"] += 1
+        conn.close()
+
+    def cerrar(self):
+        with self._lock:
+            libres, self._libres = self._libres, []
+            self._abiertas -= len(libres)
+        for conn in libres:
+            conn.close()
+
+    def metricas(self) -> dict:
+        with self._lock:
+            return {
+                "ruta": self.ruta,
+                "adjuntas": list(self.adjuntas),
+                "tamano": self.tamano,
+                "abiertas": self._abiertas,
+                "libres": len(self._libres),
+                "en_uso": self._en_uso,
+                **self._metricas,
+            }
+
+
+def crear_pool(ruta: str, config, adjuntas: dict | None = None) -> PoolSQLite:
+    """Crea un `PoolSQLite` con los parámetros DB_* de la configuración."""
+    return PoolSQLite(
+        ruta,
+        tamano=config.get("DB_POOL_TAMANO", 8),
+        busy_timeout_ms=config.get("DB_BUSY_TIMEOUT_MS", 5000),
+        journal_mode=config.get("DB_JOURNAL_MODE", "WAL"),
+        synchronous=config.get("DB_SYNCHRONOUS", "NORMAL"),
+        mmap_bytes=config.get("DB_MMAP_MB", 64) * 1024 * 1024,
+        cache_kb=config.get("DB_CACHE_MB", 16) * 1024,
+        cached_statements=config.get("DB_STATEMENT_CACHE", 256),
+        adjuntas=adjuntas,
+    )
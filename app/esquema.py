@@ -0,0 +1,200 @@
+# app/esquema.py
+
+from datetime import date, datetime, timedelta
+
+# Esquema normalizado de `oposiciones`: los nombres de departamento y
+# provincia (largos y repetidos en cada fila) van a tablas de dimensiones con
+# clave entera, y la fecha se guarda como día desde 1970-01-01 ("epoch-day").
+# Las filas ocupan menos y los índices (departamento_id, dia) y
+# (dia, provincia_id) son de enteros.
+SQL_DIMENSIONES = (
+    """
+    CREATE TABLE IF NOT EXISTS departamentos (
+        id INTEGER PRIMARY KEY,
+        nombre TEXT NOT NULL UNIQUE
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS provincias (
+        id INTEGER PRIMARY KEY,
+        nombre TEXT NOT NULL UNIQUE
+    )
+    """,
+)
+
+SQL_OPOSICIONES = """
+CREATE TABLE IF NOT EXISTS oposiciones (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    identificador TEXT,
+    control TEXT,
+    titulo TEXT,
+    url_html TEXT UNIQUE,
+    url_pdf TEXT,
+    departamento_id INTEGER REFERENCES departamentos(id),
+    dia INTEGER,
+    provincia_id INTEGER REFERENCES provincias(id)
+)
+"""
+
+# `oposiciones` con los nombres de columna de siempre (departamento, fecha
+# AAAAMMDD, provincia) para plantillas y correos, más las columnas enteras
+# para filtrar. Es una vista de una sola tabla con subconsultas escalares, así
+# que SQLite la aplana en la consulta que la usa: los filtros sobre `dia` o
+# `departamento_id` usan los índices, y los nombres solo se buscan para las
+# filas devueltas.
+SQL_VISTA_OPOSICIONES = """
+CREATE VIEW IF NOT EXISTS vista_oposiciones AS
+SELECT
+    oposiciones.id,
+    oposiciones.identificador,
+    oposiciones.control,
+    oposiciones.titulo,
+    oposiciones.url_html,
+    oposiciones.url_pdf,
+    (SELECT nombre FROM departamentos
+     WHERE departamentos.id = oposiciones.departamento_id) AS departamento,
+    strftime('%Y%m%d', oposiciones.dia * 86400, 'unixepoch') AS fecha,
+    (SELECT nombre FROM provincias
+     WHERE provincias.id = oposiciones.provincia_id) AS provincia,
+    oposiciones.departamento_id,
+    oposiciones.dia,
+    oposiciones.provincia_id
+FROM oposiciones
+"""
+
+# AAAAMMDD -> epoch-day en SQL (para migrar los datos existentes)
+_SQL_DIA_DE_FECHA = (
+    "CAST(julianday(substr({0}, 1, 4) || '-' || substr({0}, 5, 2) || '-' "
+    "|| substr({0}, 7, 2)) - 2440587.5 AS INTEGER)"
+)
+
+_EPOCH = date(1970, 1, 1)
+
+
+def dia_desde_fecha(fecha) -> int | None:
+    """Fecha AAAAMMDD (o date) -> días desde 1970-01-01; None si no es válida."""
+    if not fecha:
+        return None
+    if isinstance(fecha, datetime):
+        fecha = fecha.date()
+    if not isinstance(fecha, date):
+        try:
+            fecha = datetime.strptime(str(fecha), "%Y%m%d").date()
+        except ValueError:
+            return None
+    return (fecha - _EPOCH).days
+
+
+def fecha_desde_dia(dia) -> date | None:
+    return None if dia is None else _EPOCH + timedelta(days=int(dia))
+
+
+def crear_esquema(db):
+    """Tablas de dimensiones, `oposiciones` y su vista (no confirma)."""
+    for sql in SQL_DIMENSIONES:
+        db.execute(sql)
+    db.execute(SQL_OPOSICIONES)
+    db.execute(SQL_VISTA_OPOSICIONES)
+
+
+def ids_dimension(db, tabla: str, nombres) -> dict:
+    """
+    {nombre: id} de `tabla` ("departamentos", "provincias" o con esquema,
+    "boe.departamentos"), dando de alta los nombres que falten.
+    """
+    nombres = sorted({n for n in nombres if n})
+    if not nombres:
+        return {}
+    db.executemany(
+        f"INSERT OR IGNORE INTO {tabla} (nombre) VALUES (?)", [(n,) for n in nombres]
+    )
+    rows = db.execute(
+        f"SELECT id, nombre FROM {tabla} WHERE nombre IN ({','.join('?' * len(nombres))})",
+        nombres,
+    ).fetchall()
+    return {row["nombre"]: row["id"] for row in rows}
+
+
+def _columnas(db, tabla: str):
+    return {row[1] for row in db.execute(f"PRAGMA table_info({tabla})")}
+
+
+def migrar_esquema_normalizado(db) -> bool:
+    """
+    Pasa una BBDD con el esquema anterior de `oposiciones` (departamento,
+    fecha y provincia como texto) al normalizado, conservando los ids (el
+    índice FTS, las visitas y las favoritas siguen valiendo). Devuelve True si
+    ha migrado; después conviene un VACUUM para recuperar el espacio. No
+    confirma: se llama dentro de la transacción de su migración
+    (app/migraciones.py).
+    """
+    if "departamento" not in _columnas(db, "oposiciones"):
+        return False
+
+    for sql in SQL_DIMENSIONES:
+        db.execute(sql)
+    for tabla, columna in (("departamentos", "departamento"), ("provincias", "provincia")):
+        db.execute(
+            f"""
+            INSERT OR IGNORE INTO {tabla} (nombre)
+            SELECT DISTINCT {columna} FROM oposiciones
+            WHERE {columna} IS NOT NULL AND {columna} != ''
+            """
+        )
+    db.execute(SQL_OPOSICIONES.replace("oposiciones (", "oposiciones_nueva (", 1))
+    db.execute(
+        f"""
+        INSERT INTO oposiciones_nueva (
+            id, identificador, control, titulo, url_html, url_pdf,
+            departamento_id, dia, provincia_id
+        )
+        SELECT o.id, o.identificador, o.control, o.titulo, o.url_html, o.url_pdf,
+               d.id, {_SQL_DIA_DE_FECHA.format("o.fecha")}, p.id
+        FROM oposiciones AS o
+        LEFT JOIN departamentos AS d ON d.nombre = o.departamento
+        LEFT JOIN provincias AS p ON p.nombre = o.provincia
+        """
+    )
+    # AUTOINCREMENT: que no se reutilicen ids de oposiciones ya borradas
+    secuencia = db.execute(
+        "SELECT seq FROM sqlite_sequence WHERE name = 'oposiciones'"
+    ).fetchone()
+    # Con la tabla se van sus índices y los triggers del FTS (se recrean)
+    db.execute("DROP VIEW IF EXISTS vista_oposiciones")
+    db.execute("DROP TABLE oposiciones")
+    db.execute("ALTER TABLE oposiciones_nueva RENAME TO oposiciones")
+    if secuencia is not None:
+        db.execute(
+            "UPDATE sqlite_sequence SET seq = MAX(seq, ?) WHERE name = 'oposiciones'",
+            (secuencia[0],),
+        )
+    # Los contadores de los filtros pasan también a claves enteras
+    db.execute("DROP TABLE IF EXISTS facetas")
+    return True
+
+
+def departamentos_de_filtro(filtro: str | None, conocidos) -> list:
+    """
+    Nombres de departamento de un `suscripciones.departamento_filtro` antiguo
+    (nombres unidos con ","). Los nombres que llevan comas ("MINISTERIO DE
+    AGRICULTURA, PESCA Y ALIMENTACIÓN") se reconstruyen con `conocidos`.
+    """
+    if not filtro or filtro == "Todos":
+        return []
+    for caracter in "[]'\"":
+        filtro = filtro.replace(caracter, "")
+    segmentos = [s.strip() for s in filtro.split(",")]
+    nombres = []
+    i = 0
+    while i < len(segmentos):
+        # El nombre conocido más largo que empieza en este segmento
+        for j in range(len(segmentos), i, -1):
+            nombre = ", ".join(segmentos[i:j])
+            if nombre in conocidos:
+                break
+        else:
+            nombre, j = segmentos[i], i + 1
+        if nombre and nombre != "Todos":
+            nombres.append(nombre)
+        i = j
+    return nombres
@@ -0,0 +1,186 @@
+# app/facetas.py
+
+from collections import Counter
+
+from .cache import CacheVersionada
+from .esquema import dia_desde_fecha
+
+# Nº de oposiciones por (dia, departamento_id, provincia_id). Es lo único que
+# necesitan los desplegables de filtros y sus contadores ("Madrid (12)"), y
+# tiene órdenes de magnitud menos filas que `oposiciones`. Sin departamento o
+# sin provincia se guarda 0 (NULL no vale en una clave primaria).
+SQL_FACETAS = """
+CREATE TABLE IF NOT EXISTS facetas (
+    dia INTEGER NOT NULL,
+    departamento_id INTEGER NOT NULL,
+    provincia_id INTEGER NOT NULL,
+    total INTEGER NOT NULL,
+    PRIMARY KEY (dia, departamento_id, provincia_id)
+) WITHOUT ROWID
+"""
+
+# Columna de la faceta -> (tabla de dimensión, columna en `facetas`)
+DIMENSIONES = {
+    "departamento": ("departamentos", "departamento_id"),
+    "provincia": ("provincias", "provincia_id"),
+}
+
+# Versión de los datos de `oposiciones`: sube con cada inserción, borrado o
+# corrección. La caché de facetas (y lo que se apoye en ella) se invalida al
+# cambiar.
+CLAVE_VERSION = "ingest_version"
+
+# Consultas distintas cacheadas por proceso (fecha/rango/filtros)
+TAMANO_CACHE = 256
+
+
+def crear_tabla_facetas(db):
+    existia = db.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'facetas'"
+    ).fetchone()
+    db.execute(SQL_FACETAS)
+    if not existia:
+        reconstruir_facetas(db)
+
+
+def reconstruir_facetas(db):
+    """Recalcula `facetas` entera desde `oposiciones` (no confirma)."""
+    db.execute("DELETE FROM facetas")
+    db.execute(
+        """
+        INSERT INTO facetas (dia, departamento_id, provincia_id, total)
+        SELECT dia, COALESCE(departamento_id, 0), COALESCE(provincia_id, 0), COUNT(*)
+        FROM oposiciones
+        WHERE dia IS NOT NULL
+        GROUP BY 1, 2, 3
+        """
+    )
+    incrementar_version(db)
+
+
+def sumar_facetas(db, filas, signo: int = 1):
+    """
+    Suma (o resta, con signo=-1) las `filas` (dicts con dia, departamento_id y
+    provincia_id) a `facetas`, en la transacción en curso. Un solo UPSERT por
+    combinación, no por fila.
+    """
+    grupos = Counter(
+        (f["dia"], f["departamento_id"] or 0, f["provincia_id"] or 0)
+        for f in filas
+        if f["dia"] is not None
+    )
+    if not grupos:
+        return
+    db.executemany(
+        """
+        INSERT INTO facetas (dia, departamento_id, provincia_id, total)
+        VALUES (?, ?, ?, ?)
+        ON CONFLICT (dia, departamento_id, provincia_id)
+        DO UPDATE SET total = total + excluded.total
+        """,
+        [(*clave, signo * n) for clave, n in grupos.items()],
+    )
+    if signo < 0:
+        db.execute("DELETE FROM facetas WHERE total <= 0")
+    incrementar_version(db)
+
+
+def podar_facetas(db, antes_de: int):
+    """Borra las facetas de los días anteriores a `antes_de` (epoch-day)."""
+    if db.execute("DELETE FROM facetas WHERE dia < ?", (antes_de,)).rowcount:
+        incrementar_version(db)
+
+
+def incrementar_version(db):
+    db.execute(
+        """
+        INSERT INTO boe_meta (clave, valor) VALUES (?, '1')
+        ON CONFLICT (clave) DO UPDATE SET valor = CAST(valor AS INTEGER) + 1
+        """,
+        (CLAVE_VERSION,),
+    )
+
+
+def version_ingesta(db) -> int:
+    row = db.execute(
+        "SELECT valor FROM boe_meta WHERE clave = ?", (CLAVE_VERSION,)
+    ).fetchone()
+    return int(row["valor"]) if row else 0
+
+
+# Resultados de las consultas de facetas de este proceso, válidos mientras no
+# cambie `ingest_version`: comprobarla es una lectura por clave primaria
+# (`version_ingesta`)
+_cache = CacheVersionada(TAMANO_CACHE)
+
+
+def _condiciones(fecha=None, desde=None, hasta=None, departamentos=(), provincia=None):
+    """Condiciones sobre `facetas`; las fechas llegan como AAAAMMDD y los
+    departamentos/provincia por nombre."""
+    condiciones = []
+    params = []
+    if fecha:
+        condiciones.append("facetas.dia = ?")
+        params.append(dia_desde_fecha(fecha))
+    if desde:
+        condiciones.append("facetas.dia >= ?")
+        params.append(dia_desde_fecha(desde))
+    if hasta:
+        condiciones.append("facetas.dia <= ?")
+        params.append(dia_desde_fecha(hasta))
+    if departamentos:
+        condiciones.append(
+            "facetas.departamento_id IN (SELECT id FROM departamentos "
+            f"WHERE nombre IN ({','.join('?' * len(departamentos))}))"
+        )
+        params.extend(departamentos)
+    if provincia:
+        condiciones.append(
+            "facetas.provincia_id = (SELECT id FROM provincias WHERE nombre = ?)"
+        )
+        params.append(provincia)
+    return condiciones, params
+
+
+def sql_faceta(columna, **filtros):
+    """SQL (y params) con el total por `columna` ("departamento" o "provincia")."""
+    tabla, clave = DIMENSIONES[columna]
+    condiciones, params = _condiciones(**filtros)
+    sql = (
+        f"SELECT {tabla}.nombre AS {columna}, SUM(facetas.total) AS total "
+        f"FROM facetas JOIN {tabla} ON {tabla}.id = facetas.{clave} "
+        f"WHERE {' AND '.join(condiciones) or '1'} "
+        f"GROUP BY facetas.{clave} ORDER BY {tabla}.nombre"
+    )
+    return sql, params
+
+
+def _faceta(db, columna, **filtros):
+    filtros = {k: v for k, v in filtros.items() if v}
+    if "departamentos" in filtros:
+        filtros["departamentos"] = tuple(filtros["departamentos"])
+    clave = (columna, tuple(sorted(filtros.items())))
+
+    def calcular():
+        return [
+            {columna: row[columna], "total": row["total"]}
+            for row in db.execute(*sql_faceta(columna, **filtros)).fetchall()
+        ]
+
+    return _cache.obtener(version_ingesta(db), clave, calcular)
+
+
+def departamentos(db, fecha=None, desde=None, hasta=None, provincia=None):
+    """[{"departamento", "total"}] con oposiciones en ese día/rango (y provincia)."""
+    return _faceta(db, "departamento", fecha=fecha, desde=desde, hasta=hasta,
+                   provincia=provincia)
+
+
+def provincias(db, fecha=None, desde=None, hasta=None, departamentos=()):
+    """[{"provincia", "total"}] con oposiciones en ese día/rango (y departamentos)."""
+    return _faceta(db, "provincia", fecha=fecha, desde=desde, hasta=hasta,
+                   departamentos=departamentos)
+
+
+def metricas_cache() -> dict:
+    return _cache.metricas()
@@ -0,0 +1,469 @@
+# app/fotos.py
+
+import hashlib
+import io
+import os
+import re
+import struct
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import NamedTuple
+
+from flask import current_app
+
+from .repositorio import get_repositorio
+
+# Pillow (en requirements.txt) redimensiona y recodifica en AVIF/WebP. Si
+# falta, se guarda la imagen tal cual, solo sin metadatos, y sin miniaturas
+try:
+    from PIL import Image, ImageOps
+except ImportError:
+    Image = None
+
+# Lado (px) de las miniaturas cuadradas: menú (30 px) y configuración
+# (120 px), también en pantallas de densidad 2x. Si cambian, las fotos ya
+# guardadas hay que volver a subirlas
+TAMANOS_FOTO = (64, 160, 320)
+# Por orden de preferencia; se generan los que soporte el Pillow instalado
+FORMATOS_FOTO = ("avif", "webp")
+CALIDAD = {"avif": 60, "webp": 80, "jpg": 85}
+URL_FOTOS = "/static/uploads/profiles/"
+TIPOS_MIME = {
+    "avif": "image/avif", "webp": "image/webp", "jpg": "image/jpeg",
+    "png": "image/png", "gif": "image/gif",
+}
+
+# Cómo queda `foto_perfil` en `users`:
+#   "<huella>:avif,webp"  miniaturas <huella>-<lado>.<formato> (el último
+#                         formato es el de <img>; los demás van en <source>)
+#   "<huella>.<ext>"      la imagen sin redimensionar (sin Pillow)
+#   "/static/..."         fotos subidas antes, tal cual
+_VARIANTES = re.compile(r"^([0-9a-f]{16}):([a-z,]+)$")
+_ORIGINAL = re.compile(r"^([0-9a-f]{16})\.([a-z]+)$")
+
+
+class FotoNoValida(Exception):
+    pass
+
+
+class FotoPerfil(NamedTuple):
+    src: str
+    srcset: str
+    fuentes: tuple  # ((tipo mime, srcset), ...) para <source>
+
+
+def tipo_imagen(datos: bytes) -> str | None:
+    """Tipo real por los primeros bytes ("jpg", "png", "gif", "webp"), no por la extensión."""
+    if datos.startswith(b"\xff\xd8\xff"):
+        return "jpg"
+    if datos.startswith(b"\x89PNG\r\n\x1a\n"):
+        return "png"
+    if datos[:6] in (b"GIF87a", b"GIF89a"):
+        return "gif"
+    if datos[:4] == b"RIFF" and datos[8:12] == b"WEBP":
+        return "webp"
+    return None
+
+
+# ---- Sin Pillow: quitar metadatos sin decodificar ----
+
+def _exif_solo_orientacion(segmento: bytes) -> bytes | None:
+    """
+    APP1 con un EXIF que solo lleva la orientación del segmento APP1
+    `segmento` (marcador incluido), o None si no es EXIF o no hay que girar:
+    sin ella los navegadores mostrarían tumbadas las fotos verticales.
+    """
+    tiff = segmento[10:]
+    if segmento[4:10] != b"Exif\0\0" or tiff[:4] not in (b"II*\0", b"MM\0*"):
+        return None
+    orden = "<" if tiff[:2] == b"II" else ">"
+    try:
+        ifd = struct.unpack(orden + "I", tiff[4:8])[0]
+        entradas = struct.unpack(orden + "H", tiff[ifd:ifd + 2])[0]
+        for n in range(entradas):
+            entrada = tiff[ifd + 2 + 12 * n:ifd + 14 + 12 * n]
+            etiqueta, tipo, cuenta, valor = struct.unpack(orden + "HHIH", entrada[:10])
+            if etiqueta == 0x0112 and tipo == 3 and cuenta == 1:
+                break
+        else:
+            return None
+    except struct.error:
+        return None
+    if not 2 <= valor <= 8:
+        return None
+    # Cabecera TIFF, IFD0 con una entrada (Orientation, SHORT) y sin IFD siguiente
+    tiff = tiff[:4] + struct.pack(orden + "IHHHIHHI", 8, 1, 0x0112, 3, 1, valor, 0, 0)
+    return b"\xff\xe1" + struct.pack(">H", 2 + 6 + len(tiff)) + b"Exif\0\0" + tiff
+
+
+def _jpeg_sin_metadatos(datos: bytes) -> bytes:
+    """
+    Quita APP1 (EXIF, XMP), APP13 (IPTC) y comentarios; el resto se copia
+    igual. Del EXIF se conserva solo la orientación.
+    """
+    salida = [datos[:2]]
+    i = 2
+    while i + 4 <= len(datos):
+        if datos[i] != 0xFF:
+            raise FotoNoValida("JPEG mal formado")
+        marcador = datos[i + 1]
+        if marcador == 0xFF:  # relleno
+            i += 1
+            continue
+        if marcador == 0xDA:  # inicio de la imagen comprimida: hasta el final
+            salida.append(datos[i:])
+            return b"".join(salida)
+        longitud = struct.unpack(">H", datos[i + 2:i + 4])[0]
+        segmento = datos[i:i + 2 + longitud]
+        if marcador == 0xE1:
+            orientacion = _exif_solo_orientacion(segmento)
+            if orientacion is not None:
+                salida.append(orientacion)
+        elif marcador not in (0xED, 0xFE):
+            salida.append(segmento)
+        i += 2 + longitud
+    raise FotoNoValida("JPEG incompleto")
+
+
+def _png_sin_metadatos(datos: bytes) -> bytes:
+    """Quita los chunks de texto, EXIF y fecha."""
+    salida = [datos[:8]]
+    i = 8
+    while i + 8 <= len(datos):
+        longitud, tipo = struct.unpack(">I4s", datos[i:i + 8])
+        fin = i + 12 + longitud
+        if tipo not in (b"tEXt", b"zTXt", b"iTXt", b"eXIf", b"tIME"):
+            salida.append(datos[i:fin])
+        if tipo == b"IEND":
+            return b"".join(salida)
+        i = fin
+    raise FotoNoValida("PNG incompleto")
+
+
+def _webp_sin_metadatos(datos: bytes) -> bytes:
+    """Quita los chunks EXIF y XMP y sus indicadores en VP8X."""
+    chunks = []
+    i = 12
+    while i + 8 <= len(datos):
+        tipo, longitud = struct.unpack("<4sI", datos[i:i + 8])
+        fin = i + 8 + longitud + (longitud & 1)
+        chunk = datos[i:fin]
+        if tipo == b"VP8X":
+            chunk = chunk[:8] + bytes([chunk[8] & ~0x0C]) + chunk[9:]
+        if tipo not in (b"EXIF", b"XMP "):
+            chunks.append(chunk)
+        i = fin
+    if not chunks:
+        raise FotoNoValida("WebP mal formado")
+    cuerpo = b"WEBP" + b"".join(chunks)
+    return b"RIFF" + struct.pack("<I", len(cuerpo)) + cuerpo
+
+
+def _sub_bloques(datos: bytes, i: int) -> int:
+    """Posición tras los sub-bloques de GIF que empiezan en `i` (hasta el de longitud 0)."""
+    while True:
+        if i >= len(datos):
+            raise FotoNoValida("GIF incompleto")
+        longitud = datos[i]
+        i += 1 + longitud
+        if longitud == 0:
+            return i
+
+
+def _gif_sin_metadatos(datos: bytes) -> bytes:
+    """
+    Quita las extensiones de comentario y las de aplicación (XMP y otras)
+    salvo la de repetición de las animaciones (NETSCAPE2.0 / ANIMEXTS1.0).
+    """
+    if len(datos) < 13:
+        raise FotoNoValida("GIF incompleto")
+    i = 13
+    if datos[10] & 0x80:  # paleta global
+        i += 3 << ((datos[10] & 0x07) + 1)
+    salida = [datos[:i]]
+    while i < len(datos):
+        bloque = datos[i]
+        if bloque == 0x3B:  # fin
+            salida.append(datos[i:i + 1])
+            return b"".join(salida)
+        if bloque == 0x21 and i + 1 < len(datos):
+            etiqueta = datos[i + 1]
+            fin = _sub_bloques(datos, i + 2)
+            if etiqueta == 0xFE or (
+                etiqueta == 0xFF and datos[i + 3:i + 14] not in (b"NETSCAPE2.0", b"ANIMEXTS1.0")
+            ):
+                i = fin
+                continue
+        elif bloque == 0x2C and i + 10 <= len(datos):
+            fin = i + 10
+            if datos[i + 9] & 0x80:  # paleta local
+                fin += 3 << ((datos[i + 9] & 0x07) + 1)
+            fin = _sub_bloques(datos, fin + 1)  # tras el tamaño mínimo de código LZW
+        else:
+            raise FotoNoValida("GIF mal formado")
+        salida.append(datos[i:fin])
+        i = fin
+    raise FotoNoValida("GIF incompleto")
+
+
+_SIN_METADATOS = {
+    "jpg": _jpeg_sin_metadatos,
+    "png": _png_sin_metadatos,
+    "webp": _webp_sin_metadatos,
+    "gif": _gif_sin_metadatos,
+}
+
+
+# ---- Con Pillow: miniaturas ----
+
+def formatos_disponibles() -> tuple:
+    """Los FORMATOS_FOTO que puede escribir Pillow aquí (JPEG si ninguno)."""
+    Image.init()
+    formatos = tuple(f for f in FORMATOS_FOTO if f.upper() in Image.SAVE)
+    return formatos or ("jpg",)
+
+
+def miniaturas(datos: bytes, formatos, max_pixeles: int) -> dict:
+    """
+    {(lado, formato): bytes} de la imagen recortada al cuadrado en cada
+    TAMANOS_FOTO. Se aplica la orientación del EXIF y luego no se copia
+    ningún metadato salvo el perfil de color.
+    """
+    try:
+        imagen = Image.open(io.BytesIO(datos))
+        if imagen.width * imagen.height > max_pixeles:
+            raise FotoNoValida(f"imagen demasiado grande ({imagen.width}x{imagen.height})")
+        imagen = ImageOps.exif_transpose(imagen)
+    except (OSError, SyntaxError, ValueError, Image.DecompressionBombError) as e:
+        raise FotoNoValida(f"no se puede leer la imagen: {e}") from None
+    icc = imagen.info.get("icc_profile")
+    transparente = "A" in imagen.getbands() or "transparency" in imagen.info
+    imagen = imagen.convert("RGBA" if transparente else "RGB")
+
+    salida = {}
+    for lado in TAMANOS_FOTO:
+        recorte = ImageOps.fit(imagen, (lado, lado), Image.LANCZOS)
+        recorte.info = {}
+        for formato in formatos:
+            if formato == "jpg":
+                recorte = recorte.convert("RGB")
+            buffer = io.BytesIO()
+            opciones = {"quality": CALIDAD[formato]}
+            if icc:
+                opciones["icc_profile"] = icc
+            recorte.save(buffer, "JPEG" if formato == "jpg" else formato.upper(), **opciones)
+            salida[(lado, formato)] = buffer.getvalue()
+    return salida
+
+
+# ---- Nombres en disco ----
+
+def ficheros_foto(valor: str | None) -> list:
+    """Nombres (en UPLOAD_FOLDER) de los ficheros del `foto_perfil` `valor`."""
+    if not valor:
+        return []
+    if m := _VARIANTES.match(valor):
+        huella, formatos = m.group(1), m.group(2).split(",")
+        return [f"{huella}-{lado}.{formato}" for lado in TAMANOS_FOTO for formato in formatos]
+    if _ORIGINAL.match(valor):
+        return [valor]
+    if valor.startswith(URL_FOTOS):
+        return [os.path.basename(valor)]
+    return []
+
+
+def _huella_fichero(nombre: str) -> str:
+    """Huella de un fichero del pipeline, o el nombre entero si es de los de antes."""
+    m = re.match(r"^([0-9a-f]{16})[-.]", nombre)
+    return m.group(1) if m else nombre
+
+
+def imagen_perfil(valor: str | None, lado: int) -> FotoPerfil | None:
+    """
+    `src`, `srcset` y <source> por formato para mostrar el `foto_perfil`
+    `valor` a `lado` px. Para las plantillas (`<picture>`).
+    """
+    if not valor:
+        return None
+    if m := _VARIANTES.match(valor):
+        huella, formatos = m.group(1), m.group(2).split(",")
+
+        def srcset(formato):
+            return ", ".join(f"{URL_FOTOS}{huella}-{t}.{formato} {t}w" for t in TAMANOS_FOTO)
+
+        ajustado = next((t for t in TAMANOS_FOTO if t >= lado), TAMANOS_FOTO[-1])
+        return FotoPerfil(
+            f"{URL_FOTOS}{huella}-{ajustado}.{formatos[-1]}",
+            srcset(formatos[-1]),
+            tuple((TIPOS_MIME[f], srcset(f)) for f in formatos[:-1]),
+        )
+    if _ORIGINAL.match(valor):
+        return FotoPerfil(f"{URL_FOTOS}{valor}", "", ())
+    return FotoPerfil(valor, "", ())
+
+
+# ---- Cola de procesado ----
+
+class ProcesadorFotos:
+    """
+    Procesa en un pool de hilos las fotos que se suben (validar, quitar
+    metadatos, miniaturas) para que la petición no espere a la
+    recodificación. Los ficheros se guardan por huella del contenido
+    subido: dos subidas iguales comparten ficheros y la segunda no se
+    procesa. Al terminar se cambia el `foto_perfil` del usuario y se borran
+    los ficheros de la foto anterior si ya no los usa nadie.
+    """
+
+    def __init__(self, app):
+        self.app = app
+        self.directorio = app.config["UPLOAD_FOLDER"]
+        self.max_pixeles = app.config.get("FOTO_MAX_PIXELES", 40_000_000)
+        self.formatos = formatos_disponibles() if Image is not None else ()
+        if Image is None:
+            print("[BOE] Pillow no está instalado: las fotos de perfil se guardarán "
+                  "sin miniaturas (pip install -r requirements.txt)")
+        self._pool = ThreadPoolExecutor(
+            max_workers=max(1, app.config.get("FOTO_WORKERS", 2)),
+            thread_name_prefix="fotos",
+        )
+        self._lock = threading.Lock()
+        # Por usuario, la última subida encolada: si el mismo usuario sube dos
+        # fotos seguidas y terminan en otro orden, gana la última
+        self._ultima = {}
+        self._contador = 0
+
+    def encolar(self, user_id: int, datos: bytes):
+        with self._lock:
+            self._contador += 1
+            turno = self._ultima[user_id] = self._contador
+        return self._pool.submit(self._ejecutar, user_id, datos, turno)
+
+    def _ejecutar(self, user_id, datos, turno):
+        with self.app.app_context():
+            try:
+                self.procesar(user_id, datos, turno)
+            except FotoNoValida as e:
+                print(f"[BOE] Foto del usuario {user_id} descartada: {e}")
+            except Exception as e:
+                print(f"[BOE] Error procesando la foto del usuario {user_id}: {e}")
+
+    def procesar(self, user_id, datos, turno=None):
+        valor, ficheros = self.variantes(datos)
+        self._escribir(ficheros)
+        with self._lock:
+            if turno is not None and self._ultima.get(user_id) != turno:
+                descartar = True
+            else:
+                descartar = False
+                self._ultima.pop(user_id, None)
+        if descartar:
+            self.limpiar([valor])
+            return None
+        repositorio = get_repositorio()
+        usuario = repositorio.usuario_por_id(user_id)
+        if usuario is None:
+            self.limpiar([valor])
+            return None
+        anterior = usuario["foto_perfil"]
+        repositorio.actualizar_usuario(user_id, foto_perfil=valor)
+        # Otro proceso pudo borrarlos mientras tanto al limpiar una foto
+        # igual que ya no usaba nadie
+        self._escribir(ficheros)
+        if anterior and anterior != valor:
+            self.limpiar([anterior])
+        return valor
+
+    def variantes(self, datos: bytes) -> tuple:
+        """(`foto_perfil`, {nombre: función que da los bytes}) de la foto subida."""
+        tipo = tipo_imagen(datos)
+        if tipo is None:
+            raise FotoNoValida("no es una imagen JPG, PNG, GIF o WEBP")
+        huella = hashlib.sha256(datos).hexdigest()[:16]
+        if not self.formatos:
+            valor = f"{huella}.{tipo}"
+            return valor, {valor: lambda: _SIN_METADATOS[tipo](datos)}
+
+        valor = f"{huella}:{','.join(self.formatos)}"
+        calculadas = {}
+
+        def generar(lado, formato):
+            # Todas las miniaturas salen de decodificar una vez, y solo si falta alguna
+            if not calculadas:
+                calculadas.update(miniaturas(datos, self.formatos, self.max_pixeles))
+            return calculadas[(lado, formato)]
+
+        return valor, {
+            f"{huella}-{lado}.{formato}": (lambda l=lado, f=formato: generar(l, f))
+            for lado in TAMANOS_FOTO for formato in self.formatos
+        }
+
+    def _escribir(self, ficheros: dict):
+        os.makedirs(self.directorio, exist_ok=True)
+        for nombre, contenido in ficheros.items():
+            ruta = os.path.join(self.directorio, nombre)
+            if os.path.exists(ruta):
+                continue
+            temporal = f"{ruta}.{threading.get_ident()}.tmp"
+            with open(temporal, "wb") as f:
+                f.write(contenido())
+            os.replace(temporal, ruta)
+
+    def limpiar(self, valores) -> int:
+        """Borra los ficheros de los `foto_perfil` `valores` que ya no usa nadie."""
+        valores = [v for v in valores if v]
+        en_uso = get_repositorio().fotos_en_uso(valores)
+        huellas_en_uso = {_huella_fichero(n) for v in en_uso for n in ficheros_foto(v)}
+        borrados = 0
+        for valor in valores:
+            if valor in en_uso:
+                continue
+            for nombre in ficheros_foto(valor):
+                if _huella_fichero(nombre) in huellas_en_uso:
+                    continue
+                try:
+                    os.remove(os.path.join(self.directorio, nombre))
+                    borrados += 1
+                except FileNotFoundError:
+                    pass
+        return borrados
+
+    def huerfanas(self, antiguedad: float = 3600) -> list:
+        """
+        Ficheros de UPLOAD_FOLDER que no son de la foto de ningún usuario y
+        tienen más de `antiguedad` segundos (los más nuevos pueden ser de una
+        subida que aún se está procesando).
+        """
+        en_uso = get_repositorio().fotos_en_uso(None)
+        huellas = {_huella_fichero(n) for v in en_uso for n in ficheros_foto(v)}
+        limite = time.time() - antiguedad
+        huerfanas = []
+        for entrada in os.scandir(self.directorio):
+            if (entrada.is_file() and _huella_fichero(entrada.name) not in huellas
+                    and entrada.stat().st_mtime < limite):
+                huerfanas.append(entrada.name)
+        return sorted(huerfanas)
+
+
+def get_procesador() -> ProcesadorFotos:
+    procesador = current_app.extensions.get("fotos")
+    if procesador is None:
+        procesador = current_app.extensions.setdefault("fotos", ProcesadorFotos(current_app))
+    return procesador
+
+
+def recibir_foto(user_id: int, fichero) -> bool:
+    """
+    Comprueba el tipo real y el tamaño de la foto subida en `fichero`
+    (request.files) y la encola para procesarla; False si no se subió nada.
+    """
+    if not fichero or not fichero.filename:
+        return False
+    max_bytes = current_app.config.get("FOTO_MAX_MB", 10) * 1024 * 1024
+    datos = fichero.read(max_bytes + 1)
+    if len(datos) > max_bytes:
+        raise FotoNoValida(f"La foto no puede ocupar más de {max_bytes // (1024 * 1024)} MB")
+    if tipo_imagen(datos) is None:
+        raise FotoNoValida("La foto debe ser una imagen JPG, PNG, GIF o WEBP")
+    get_procesador().encolar(user_id, datos)
+    return True
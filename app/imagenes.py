@@ -0,0 +1,101 @@
+# app/imagenes.py
+
+import hashlib
+import os
+import re
+import unicodedata
+from typing import NamedTuple
+
+from flask import current_app, url_for
+
+# Imágenes de las tarjetas de departamento (index.html), relativas a static/.
+# Cada fichero se llama como el departamento, con "_" en lugar de espacios.
+DIRECTORIO_DEPARTAMENTOS = os.path.join("img", "dept")
+EXTENSIONES = (".avif", ".webp", ".png", ".jpg", ".jpeg", ".svg")
+IMAGEN_POR_DEFECTO = "img/default.svg"
+
+# Nombre con el que publica el BOE -> nombre de la imagen, cuando no
+# coinciden ni quitando tildes, mayúsculas y signos (ver `canonico`)
+ALIAS_DEPARTAMENTOS = {
+    "CIUDAD AUTÓNOMA DE CEUTA": "CEUTA",
+    "CIUDAD DE CEUTA": "CEUTA",
+    "CIUDAD AUTÓNOMA DE MELILLA": "MELILLA",
+    "CIUDAD DE MELILLA": "MELILLA",
+    "COMUNIDAD DE CASTILLA Y LEÓN": "COMUNIDAD AUTÓNOMA DE CASTILLA Y LEÓN",
+    "CASTILLA Y LEÓN": "COMUNIDAD AUTÓNOMA DE CASTILLA Y LEÓN",
+    "COMUNIDAD AUTÓNOMA DE LA REGIÓN DE MURCIA": "REGIÓN DE MURCIA",
+    "COMUNIDAD AUTÓNOMA DE MURCIA": "REGIÓN DE MURCIA",
+}
+
+# Los ficheros se sirven con la huella en la URL y caché de un año
+MAX_AGE_IMAGENES = 365 * 24 * 3600
+
+
+def canonico(nombre: str) -> str:
+    """Mayúsculas sin tildes ni signos: "Región de Murcia" -> "REGION DE MURCIA"."""
+    sin_tildes = "".join(
+        c for c in unicodedata.normalize("NFKD", nombre) if not unicodedata.combining(c)
+    )
+    return " ".join(re.sub(r"[\W_]+", " ", sin_tildes.upper()).split())
+
+
+class Imagen(NamedTuple):
+    fichero: str
+    huella: str
+
+
+class ManifiestoImagenes:
+    """
+    Imágenes de departamento que hay en disco, leídas una vez al arrancar:
+    nombre canónico -> (fichero, huella del contenido). Las plantillas piden
+    la URL con `url_imagen_departamento` y solo apuntan a ficheros que
+    existen, sin `onerror` ni peticiones que acaban en 404.
+    """
+
+    def __init__(self, directorio: str):
+        self.directorio = directorio
+        self._por_nombre = {}
+        self._por_fichero = {}
+        sha = hashlib.sha256()
+        ficheros = os.listdir(directorio) if os.path.isdir(directorio) else []
+        for fichero in sorted(ficheros):
+            base, extension = os.path.splitext(fichero)
+            if extension.lower() not in EXTENSIONES:
+                continue
+            with open(os.path.join(directorio, fichero), "rb") as f:
+                huella = hashlib.sha256(f.read()).hexdigest()[:12]
+            imagen = Imagen(fichero, huella)
+            self._por_nombre.setdefault(canonico(base), imagen)
+            self._por_fichero[fichero] = imagen
+            sha.update(f"{fichero}:{huella};".encode())
+        self._alias = {canonico(k): canonico(v) for k, v in ALIAS_DEPARTAMENTOS.items()}
+        # Cambia si se añade, quita o cambia alguna imagen (forma parte del ETag)
+        self.version = sha.hexdigest()[:12]
+
+    def __len__(self):
+        return len(self._por_fichero)
+
+    def buscar(self, departamento: str) -> Imagen | None:
+        nombre = canonico(departamento or "")
+        return self._por_nombre.get(nombre) or self._por_nombre.get(self._alias.get(nombre))
+
+    def por_fichero(self, fichero: str) -> Imagen | None:
+        return self._por_fichero.get(fichero)
+
+
+def get_manifiesto() -> ManifiestoImagenes:
+    manifiesto = current_app.extensions.get("imagenes_departamentos")
+    if manifiesto is None:
+        manifiesto = ManifiestoImagenes(
+            os.path.join(current_app.static_folder, DIRECTORIO_DEPARTAMENTOS)
+        )
+        manifiesto = current_app.extensions.setdefault("imagenes_departamentos", manifiesto)
+    return manifiesto
+
+
+def url_imagen_departamento(departamento: str) -> str:
+    """URL con huella de la imagen del departamento, o la imagen por defecto."""
+    imagen = get_manifiesto().buscar(departamento)
+    if imagen is None:
+        return url_for("static", filename=IMAGEN_POR_DEFECTO)
+    return url_for("main.imagen_departamento", huella=imagen.huella, fichero=imagen.fichero)
@@ -0,0 +1,372 @@
+# app/migraciones.py
+
+from typing import Callable, NamedTuple
+
+from flask import current_app
+
+from .busqueda import crear_indice_fts
+from .db import get_boe_db, get_users_db
+from .esquema import (
+    crear_esquema,
+    departamentos_de_filtro,
+    migrar_esquema_normalizado,
+)
+from .facetas import crear_tabla_facetas
+from .queries import actualizar_estadisticas, crear_indices, ids_departamentos
+
+# Cada BBDD guarda en `PRAGMA user_version` la última migración aplicada. Al
+# arrancar solo se lee ese número; las migraciones se aplican con
+# `flask db upgrade` (o al arrancar, si DB_AUTO_UPGRADE=1).
+#
+# Para cambiar el esquema se añade un paso al final de su lista con el número
+# siguiente; nunca se reordenan ni se modifican los ya publicados. Los pasos
+# son idempotentes (IF NOT EXISTS, columnas que falten...) porque las BBDD
+# anteriores a este sistema empiezan en la versión 0 con parte del esquema ya
+# creado.
+
+
+class Migracion(NamedTuple):
+    version: int
+    descripcion: str
+    # (db) -> True si conviene un VACUUM después; no confirma
+    funcion: Callable
+
+
+def _columnas(db, tabla: str):
+    return {row[1] for row in db.execute(f"PRAGMA table_info({tabla})")}
+
+
+def _anadir_columnas(db, tabla: str, columnas):
+    existentes = _columnas(db, tabla)
+    for columna, tipo in columnas:
+        if columna not in existentes:
+            db.execute(f"ALTER TABLE {tabla} ADD COLUMN {columna} {tipo}")
+
+
+# =========================
+# BBDD BOE
+# =========================
+def _boe_oposiciones(db):
+    # Esquema anterior (departamento/fecha/provincia en texto) -> normalizado
+    migrada = migrar_esquema_normalizado(db)
+    # `oposiciones` con departamentos/provincias aparte y la vista
+    # `vista_oposiciones` con los nombres de columna de siempre
+    crear_esquema(db)
+    return migrada
+
+
+def _boe_tablas_sync(db):
+    existia_log = db.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'sync_log'"
+    ).fetchone()
+    # Registro de descargas del BOE por día (ok / sin_sumario / error)
+    db.execute(
+        """
+        CREATE TABLE IF NOT EXISTS sync_log (
+            fecha TEXT PRIMARY KEY,
+            status TEXT NOT NULL,
+            http_status INTEGER,
+            item_count INTEGER,
+            fetched_at TEXT NOT NULL,
+            etag TEXT,
+            intentos INTEGER NOT NULL DEFAULT 0,
+            proximo_intento TEXT
+        )
+    """
+    )
+    # Pares clave/valor compartidos entre procesos (turnos de refresco, etc.)
+    db.execute(
+        """
+        CREATE TABLE IF NOT EXISTS boe_meta (
+            clave TEXT PRIMARY KEY,
+            valor TEXT
+        )
+    """
+    )
+    # Lease para que solo un proceso sincronice el BOE a la vez
+    db.execute(
+        """
+        CREATE TABLE IF NOT EXISTS sync_lease (
+            nombre TEXT PRIMARY KEY,
+            propietario TEXT,
+            expira_en REAL,
+            id_desde INTEGER,
+            id_hasta INTEGER,
+            terminado_en REAL
+        )
+    """
+    )
+    if not existia_log:
+        # Los días que ya tienen oposiciones se dan por sincronizados
+        db.execute(
+            """
+            INSERT OR IGNORE INTO sync_log (fecha, status, item_count, fetched_at)
+            SELECT fecha, 'ok', COUNT(*), datetime('now')
+            FROM vista_oposiciones
+            WHERE dia IS NOT NULL
+            GROUP BY dia
+        """
+        )
+
+
+def _boe_indices(db):
+    # Índices de los listados (ver app/queries.py)
+    crear_indices(db)
+
+
+def _boe_fts(db):
+    # Índice de texto completo para las búsquedas. Si este SQLite no trae
+    # FTS5 se avisa y se busca con LIKE.
+    crear_indice_fts(db)
+
+
+def _boe_facetas(db):
+    # Conteos por (día, departamento, provincia) para los filtros
+    crear_tabla_facetas(db)
+
+
+MIGRACIONES_BOE = (
+    Migracion(1, "oposiciones con tablas de dimensiones y vista", _boe_oposiciones),
+    Migracion(2, "sync_log, boe_meta y sync_lease", _boe_tablas_sync),
+    Migracion(3, "índices de los listados", _boe_indices),
+    Migracion(4, "índice FTS5 de búsqueda", _boe_fts),
+    Migracion(5, "facetas de los filtros", _boe_facetas),
+)
+
+
+# =========================
+# BBDD Usuarios
+# =========================
+def _users_tablas(db):
+    db.execute(
+        """
+        CREATE TABLE IF NOT EXISTS users (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            email TEXT UNIQUE,
+            password_hash TEXT,
+            name TEXT,
+            apellidos TEXT,
+            age INTEGER,
+            telefono TEXT,
+            foto_perfil TEXT,
+            nivel_estudios TEXT,
+            titulacion TEXT
+        )
+    """
+    )
+    db.execute(
+        """
+        CREATE TABLE IF NOT EXISTS visitas (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER NOT NULL,
+            oposicion_id INTEGER NOT NULL,
+            fecha_visita TEXT NOT NULL,
+            UNIQUE(user_id, oposicion_id)
+        )
+    """
+    )
+    db.execute(
+        """
+        CREATE TABLE IF NOT EXISTS favoritas (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER NOT NULL,
+            oposicion_id INTEGER NOT NULL,
+            fecha_favorito TEXT NOT NULL,
+            UNIQUE(user_id, oposicion_id)
+        )
+    """
+    )
+    db.execute(
+        """
+        CREATE TABLE IF NOT EXISTS suscripciones (
+            user_id INTEGER PRIMARY KEY,
+            alerta_diaria INTEGER DEFAULT 0,
+            alerta_favoritos INTEGER DEFAULT 0,
+            departamento_filtro TEXT
+        )
+    """
+    )
+
+
+def _users_columnas_contacto(db):
+    # BBDD creadas antes de que `users` tuviera estas columnas
+    _anadir_columnas(db, "users", [
+        ("telefono", "TEXT"),
+        ("foto_perfil", "TEXT"),
+        ("nivel_estudios", "TEXT"),
+        ("titulacion", "TEXT"),
+    ])
+
+
+def _users_datos_personales(db):
+    # Lo que guarda /update_profile (routes/user.py)
+    _anadir_columnas(db, "users", [
+        ("genero", "TEXT"),
+        ("dni", "TEXT"),
+        ("fecha_nacimiento", "TEXT"),
+        ("nacionalidad", "TEXT"),
+        ("direccion", "TEXT"),
+        ("codigo_postal", "TEXT"),
+        ("ciudad", "TEXT"),
+        ("provincia", "TEXT"),
+        ("situacion_laboral", "TEXT"),
+        ("idiomas", "TEXT"),
+        ("discapacidad", "INTEGER DEFAULT 0"),
+        ("porcentaje_discapacidad", "INTEGER DEFAULT 0"),
+    ])
+
+
+def _users_indices(db):
+    # Paginación de favoritas por (fecha_favorito, id)
+    db.execute(
+        "CREATE INDEX IF NOT EXISTS idx_favoritas_usuario_fecha "
+        "ON favoritas(user_id, fecha_favorito)"
+    )
+    # Visitas por oposición (estadísticas) sin ordenar toda la tabla
+    db.execute(
+        "CREATE INDEX IF NOT EXISTS idx_visitas_oposicion ON visitas(oposicion_id)"
+    )
+
+
+def _users_suscripcion_departamentos(db):
+    # Departamentos del resumen de cada usuario (ninguno = todos). El id es
+    # el de boe.departamentos, en la BBDD del BOE adjunta.
+    db.execute(
+        """
+        CREATE TABLE IF NOT EXISTS suscripcion_departamentos (
+            user_id INTEGER NOT NULL,
+            departamento_id INTEGER NOT NULL,
+            PRIMARY KEY (user_id, departamento_id)
+        ) WITHOUT ROWID
+    """
+    )
+    # `suscripciones.departamento_filtro` (nombres unidos con comas) pasa a
+    # la tabla y se deja a NULL
+    pendientes = db.execute(
+        "SELECT user_id, departamento_filtro FROM suscripciones "
+        "WHERE departamento_filtro IS NOT NULL"
+    ).fetchall()
+    if not pendientes:
+        return
+    conocidos = {row["nombre"] for row in db.execute("SELECT nombre FROM boe.departamentos")}
+    for row in pendientes:
+        nombres = departamentos_de_filtro(row["departamento_filtro"], conocidos)
+        # Solo los que ya existen: una suscripción nunca da de alta
+        # departamentos en la BBDD del BOE (erratas, nombres antiguos...)
+        ids = ids_departamentos(db, nombres)
+        desconocidos = [n for n in nombres if n not in ids]
+        if desconocidos:
+            print(
+                f"[BOE] Suscripción del usuario {row['user_id']}: departamentos "
+                f"desconocidos descartados: {', '.join(desconocidos)}"
+                + ("" if ids else " (recibirá todos)")
+            )
+        db.executemany(
+            "INSERT OR IGNORE INTO suscripcion_departamentos (user_id, departamento_id) "
+            "VALUES (?, ?)",
+            [(row["user_id"], i) for i in ids.values()],
+        )
+    db.execute("UPDATE suscripciones SET departamento_filtro = NULL")
+    print(f"[BOE] Filtros de departamento de {len(pendientes)} suscripciones migrados")
+
+
+def _users_version_usuario(db):
+    # Sube con cada cambio de lo que el usuario ve en los listados (perfil,
+    # visitas, favoritas): forma parte del ETag de sus páginas (app/cache.py)
+    _anadir_columnas(db, "users", [("version_usuario", "INTEGER NOT NULL DEFAULT 0")])
+
+
+# Necesitan la BBDD del BOE ya migrada (suscripcion_departamentos usa
+# boe.departamentos): se aplican siempre después de MIGRACIONES_BOE.
+MIGRACIONES_USERS = (
+    Migracion(1, "users, visitas, favoritas y suscripciones", _users_tablas),
+    Migracion(2, "teléfono, foto y estudios en users", _users_columnas_contacto),
+    Migracion(3, "datos personales del perfil en users", _users_datos_personales),
+    Migracion(4, "índices de favoritas y visitas", _users_indices),
+    Migracion(5, "suscripcion_departamentos", _users_suscripcion_departamentos),
+    Migracion(6, "version_usuario en users", _users_version_usuario),
+)
+
+# (nombre, conexión, migraciones), en el orden en que se aplican
+BBDD = (
+    ("boe", get_boe_db, MIGRACIONES_BOE),
+    ("users", get_users_db, MIGRACIONES_USERS),
+)
+
+
+# =========================
+# Aplicar / comprobar
+# =========================
+def version_esquema(db) -> int:
+    return db.execute("PRAGMA user_version").fetchone()[0]
+
+
+def pendientes(db, migraciones) -> list:
+    version = version_esquema(db)
+    return [m for m in migraciones if m.version > version]
+
+
+def aplicar_migraciones(db, migraciones, nombre: str, salida=print) -> int:
+    """
+    Aplica en orden las migraciones pendientes de `db`, cada una en su propia
+    transacción junto con el nuevo `user_version`: si falla, la BBDD se queda
+    en la versión anterior. Devuelve cuántas ha aplicado.
+    """
+    aplicadas = 0
+    vacuum = False
+    for migracion in pendientes(db, migraciones):
+        if db.in_transaction:
+            db.commit()
+        # IMMEDIATE: si arrancan varios procesos a la vez, solo uno aplica
+        # cada paso; los demás esperan y ven la versión ya subida
+        db.execute("BEGIN IMMEDIATE")
+        try:
+            if version_esquema(db) >= migracion.version:
+                db.rollback()
+                continue
+            vacuum = bool(migracion.funcion(db)) or vacuum
+            db.execute(f"PRAGMA user_version = {int(migracion.version)}")
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        aplicadas += 1
+        salida(f"[BOE] {nombre}: migración {migracion.version} aplicada ({migracion.descripcion})")
+    if vacuum:
+        # Recupera el espacio de las tablas reescritas (fuera de transacción)
+        db.execute("VACUUM")
+        salida(f"[BOE] {nombre}: VACUUM tras migrar")
+    return aplicadas
+
+
+def actualizar_esquemas(salida=print) -> int:
+    """Aplica las migraciones pendientes de las dos BBDD (`flask db upgrade`)."""
+    aplicadas = 0
+    for nombre, get_db, migraciones in BBDD:
+        aplicadas += aplicar_migraciones(get_db(), migraciones, nombre, salida)
+    # Estadísticas del planificador (solo si faltan o están desfasadas)
+    actualizar_estadisticas(get_boe_db())
+    return aplicadas
+
+
+def comprobar_esquemas():
+    """
+    Lo único que se hace con el esquema al arrancar cada proceso: leer
+    `user_version` de las dos BBDD. Si falta alguna migración se aplica
+    (DB_AUTO_UPGRADE=1) o se avisa de que hay que lanzar `flask db upgrade`.
+    """
+    faltan = {
+        nombre: len(pendientes(get_db(), migraciones))
+        for nombre, get_db, migraciones in BBDD
+    }
+    if not any(faltan.values()):
+        return
+    if current_app.config.get("DB_AUTO_UPGRADE", True):
+        actualizar_esquemas()
+        return
+    for nombre, n in faltan.items():
+        if n:
+            print(
+                f"[BOE] A la BBDD {nombre} le faltan {n} migraciones: "
+                "ejecuta `flask --app run db upgrade`"
+            )
@@ -1,6 +1,6 @@
 from flask_login import UserMixin
 from . import login_manager
-from .db import get_users_db
+from .repositorio import get_repositorio
 
 
 class User(UserMixin):
@@ -15,6 +15,7 @@ class User(UserMixin):
         foto_perfil=None,
         nivel_estudios=None,
         titulacion=None,
+        version_usuario=0,
     ):
         self.id = id
         self.email = email
@@ -25,18 +26,11 @@ class User(UserMixin):
         self.foto_perfil = foto_perfil
         self.nivel_estudios = nivel_estudios
         self.titulacion = titulacion
+        self.version_usuario = version_usuario
 
     @staticmethod
     def get(user_id):
-        db = get_users_db()
-        row = db.execute(
-            """
-            SELECT id, email, name, apellidos, age, telefono, foto_perfil,
-                nivel_estudios, titulacion
-            FROM users WHERE id = ?
-            """,
-            (user_id,),
-        ).fetchone()
+        row = get_repositorio().usuario_por_id(user_id)
         if row:
             return User(
                 row["id"],
@@ -48,6 +42,7 @@ class User(UserMixin):
                 row["foto_perfil"],
                 row["nivel_estudios"],
                 row["titulacion"],
+                row["version_usuario"],
             )
         return None
 
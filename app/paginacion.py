@@ -0,0 +1,185 @@
+# app/paginacion.py
+
+import base64
+import binascii
+import hashlib
+import json
+
+
+class Pagina:
+    """Una página de resultados y los cursores para ir a la anterior/siguiente."""
+
+    def __init__(self, filas, page, total, por_pagina, anterior=None, siguiente=None):
+        self.filas = filas
+        self.page = page
+        self.total = total
+        self.por_pagina = por_pagina
+        self.anterior = anterior
+        self.siguiente = siguiente
+
+    @property
+    def total_pages(self) -> int:
+        return (self.total + self.por_pagina - 1) // self.por_pagina
+
+
+def codificar_cursor(datos: dict) -> str:
+    """Token opaco (base64 de un JSON) para el parámetro `cursor` de la URL."""
+    crudo = json.dumps(datos, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+    return base64.urlsafe_b64encode(crudo).decode("ascii").rstrip("=")
+
+
+def decodificar_cursor(token: str | None) -> dict | None:
+    """Inverso de `codificar_cursor`; None si el token falta o no es válido."""
+    if not token:
+        return None
+    try:
+        crudo = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4))
+        datos = json.loads(crudo)
+    except (binascii.Error, ValueError):
+        return None
+    if not isinstance(datos, dict) or not {"k", "p", "t", "d"} <= datos.keys():
+        return None
+    return datos
+
+
+def contexto_cursor(orden: str, filtros: dict) -> str:
+    """
+    Contexto de los cursores de un listado: el orden y una huella de los
+    filtros con valor (las listas, sin repetir y ordenadas). Un cursor
+    emitido con otros filtros apuntaría a una posición de otro listado.
+    """
+    normalizados = sorted(
+        (clave, sorted(set(valor)) if isinstance(valor, (list, tuple)) else str(valor))
+        for clave, valor in filtros.items()
+        if valor
+    )
+    crudo = json.dumps(normalizados, ensure_ascii=False).encode("utf-8")
+    return f"{orden}:{hashlib.sha1(crudo).hexdigest()[:12]}"
+
+
+def sql_paginacion(select: str, sql_part: str, columnas, *, descendente=True,
+                   order_by=None) -> dict:
+    """
+    SQL que ejecuta `paginar` en cada caso ("offset", "ventana", "contar",
+    "siguiente", "anterior"); lo usa también `flask boe planes`.
+    """
+    direccion = "DESC" if descendente else "ASC"
+    inversa = "ASC" if descendente else "DESC"
+    filas = ", ".join(columnas)
+    marcas = ", ".join("?" * len(columnas))
+    consultas = {"contar": f"SELECT COUNT(*) {sql_part}"}
+    if order_by is None:
+        order_by = " ORDER BY " + ", ".join(f"{c} {direccion}" for c in columnas)
+        for nombre, op, orden in (
+            ("siguiente", "<" if descendente else ">", direccion),
+            ("anterior", ">" if descendente else "<", inversa),
+        ):
+            consultas[nombre] = (
+                f"{select} {sql_part} AND ({filas}) {op} ({marcas}) "
+                f"ORDER BY {', '.join(f'{c} {orden}' for c in columnas)} LIMIT ?"
+            )
+    consultas["offset"] = f"{select} {sql_part}{order_by} LIMIT ? OFFSET ?"
+    consultas["ventana"] = (
+        f"{select}, COUNT(*) OVER () AS total_filas {sql_part}{order_by} LIMIT ? OFFSET ?"
+    )
+    return consultas
+
+
+def paginar(db, select: str, sql_part: str, params, columnas, *, descendente=True,
+            por_pagina=10, page=1, cursor=None, contexto="", order_by=None,
+            claves=None) -> Pagina:
+    """
+    Pagina `{select} {sql_part}` (sql_part ya lleva su WHERE) por keyset sobre
+    `columnas`, p. ej. ("oposiciones.fecha", "oposiciones.id"): la última
+    columna debe ser única para que el orden sea total.
+
+    - Con `cursor` (token de una página anterior) se sigue desde la última/primera
+      fila vista con `WHERE (fecha, id) < (?, ?)`, sin OFFSET ni COUNT: el coste
+      no crece con la profundidad y no se repiten ni saltan filas aunque el
+      scraper inserte mientras tanto.
+    - Sin cursor (primera página o enlaces antiguos con ?page=N) se usa OFFSET.
+    - Con `order_by` propio (p. ej. relevancia) no hay keyset: siempre OFFSET, y
+      el total sale de la misma consulta con COUNT(*) OVER (), porque ese orden
+      obliga a leer todas las coincidencias de todos modos. Sus cursores no
+      llevan claves, solo el número de página.
+
+    `contexto` identifica el orden y los filtros (`contexto_cursor`): un
+    cursor de otro contexto se ignora.
+    `claves` son los nombres de `columnas` en las filas devueltas, si el
+    `select` las renombra (por defecto, el nombre sin la tabla).
+    """
+    claves = claves or [c.rsplit(".", 1)[-1] for c in columnas]
+    keyset = order_by is None
+    consultas = sql_paginacion(
+        select, sql_part, columnas, descendente=descendente, order_by=order_by
+    )
+    datos = leer_cursor(cursor, contexto, len(columnas) if keyset else 0)
+
+    if datos is not None and keyset:
+        page = max(1, datos["p"])
+        total = datos["t"]
+        # Hacia atrás se recorre en sentido contrario y luego se da la vuelta
+        hacia_atras = datos["d"] == "ant"
+        sql = consultas["anterior" if hacia_atras else "siguiente"]
+        filas = db.execute(sql, list(params) + list(datos["k"]) + [por_pagina]).fetchall()
+        if hacia_atras:
+            filas.reverse()
+    else:
+        page = max(1, datos["p"] if datos is not None else page)
+        limite = [por_pagina, (page - 1) * por_pagina]
+        if keyset:
+            # Con índice el LIMIT corta pronto: COUNT aparte (sobre el índice)
+            # sale más barato que COUNT(*) OVER (), que lee todas las filas
+            total = db.execute(consultas["contar"], params).fetchone()[0]
+            filas = db.execute(consultas["offset"], list(params) + limite).fetchall()
+        else:
+            filas = db.execute(consultas["ventana"], list(params) + limite).fetchall()
+            if filas:
+                total = filas[0]["total_filas"]
+            else:
+                total = db.execute(consultas["contar"], params).fetchone()[0]
+
+    pagina = Pagina(filas, page, total, por_pagina)
+    enlazar_cursores(pagina, claves if keyset else (), contexto)
+    return pagina
+
+
+def leer_cursor(token: str | None, contexto: str, n_columnas: int) -> dict | None:
+    """
+    Datos del cursor si es de este listado (mismo `contexto` y nº de columnas
+    de orden); None si falta, no es válido o es de otro listado.
+    """
+    datos = decodificar_cursor(token)
+    if datos is None or (
+        datos.get("o") != contexto
+        or not isinstance(datos["k"], list)
+        or len(datos["k"]) != n_columnas
+        # Lo que no sea un valor de columna (dict, lista, null...) haría
+        # fallar la consulta: un cursor manipulado es como no traer cursor
+        or not all(isinstance(v, (int, str)) for v in datos["k"])
+        or not isinstance(datos["p"], int)
+        or not isinstance(datos["t"], int)
+        or datos["d"] not in ("ant", "sig")
+    ):
+        return None
+    return datos
+
+
+def enlazar_cursores(pagina: Pagina, claves, contexto: str):
+    """
+    Cursores anterior/siguiente de `pagina` desde su primera y última fila
+    (con `claves` vacías, solo el número de página: ver `paginar`).
+    """
+    filas = pagina.filas
+    if not filas:
+        return
+
+    def token(fila, p, d):
+        return codificar_cursor(
+            {"k": [fila[c] for c in claves], "p": p, "t": pagina.total, "d": d, "o": contexto}
+        )
+
+    if pagina.page > 1:
+        pagina.anterior = token(filas[0], pagina.page - 1, "ant")
+    if pagina.page < pagina.total_pages:
+        pagina.siguiente = token(filas[-1], pagina.page + 1, "sig")
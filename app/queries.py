@@ -0,0 +1,411 @@
+# app/queries.py
+
+import sqlite3
+from datetime import datetime, timedelta
+
+from . import facetas
+from .busqueda import FiltroBusqueda
+from .esquema import dia_desde_fecha
+from .paginacion import contexto_cursor, paginar, sql_paginacion
+
+# Índices de `oposiciones` para los listados. En SQLite cada índice lleva el
+# rowid (= id) al final: (dia) ya sirve para ordenar por (dia, id).
+INDICES_OPOSICIONES = {
+    # /user_oposiciones: rango de fechas ordenado por (dia, id)
+    "idx_oposiciones_dia": "dia",
+    # /departamento/<nombre>: un departamento, un día, ordenado por id
+    "idx_oposiciones_departamento_dia": "departamento_id, dia",
+    # Filtro por provincia dentro de un rango de fechas
+    "idx_oposiciones_dia_provincia": "dia, provincia_id",
+}
+
+# Índices de versiones anteriores (los del esquema con departamento, fecha y
+# provincia en texto se van con la tabla al migrar; ver app/esquema.py)
+INDICES_OBSOLETOS = (
+    "idx_oposiciones_departamento", "idx_oposiciones_provincia",
+    "idx_oposiciones_fecha", "idx_oposiciones_departamento_fecha",
+    "idx_oposiciones_fecha_provincia",
+)
+
+# Los listados leen de la vista (nombres y fecha AAAAMMDD como siempre) y
+# filtran/ordenan por sus columnas enteras; SQLite la aplana en la consulta
+FROM_OPOSICIONES = "FROM vista_oposiciones AS oposiciones"
+
+COLUMNAS_ORDEN = ("oposiciones.dia", "oposiciones.id")
+
+# Si el nº de filas cambia más que esto desde el último ANALYZE, se repite
+UMBRAL_ESTADISTICAS = 0.25
+
+
+def crear_indices(db):
+    for nombre, columnas in INDICES_OPOSICIONES.items():
+        db.execute(f"CREATE INDEX IF NOT EXISTS {nombre} ON oposiciones({columnas})")
+    for nombre in INDICES_OBSOLETOS:
+        db.execute(f"DROP INDEX IF EXISTS {nombre}")
+
+
+def actualizar_estadisticas(db, forzar: bool = False) -> bool:
+    """
+    Lanza ANALYZE sobre `oposiciones` si no hay estadísticas o si la tabla ha
+    cambiado mucho de tamaño. Sin ellas el planificador no sabe que hay ~50
+    provincias y pocas decenas de departamentos, y elige mal el índice (con
+    1M filas, cientos de ms en vez de décimas para `dia >= ? AND provincia_id = ?`).
+    Devuelve True si se han recalculado.
+    """
+    if not forzar:
+        try:
+            fila = db.execute(
+                "SELECT stat FROM sqlite_stat1 WHERE tbl = 'oposiciones' "
+                "AND idx = 'idx_oposiciones_dia'"
+            ).fetchone()
+        except sqlite3.OperationalError:
+            fila = None  # Aún no existe sqlite_stat1
+        if fila is not None:
+            analizadas = int(fila["stat"].split()[0])
+            actuales = db.execute("SELECT COUNT(*) FROM oposiciones").fetchone()[0]
+            if abs(actuales - analizadas) <= UMBRAL_ESTADISTICAS * max(analizadas, 1):
+                return False
+    db.execute("ANALYZE oposiciones")
+    db.commit()
+    return True
+
+
+# =========================
+# Listado de oposiciones
+# =========================
+def _filtros(boe_db, departamentos=(), fecha=None, desde=None, hasta=None,
+             provincia=None, busqueda=None):
+    """
+    (sql_part, params, filtro de texto) con los filtros de un listado. Las
+    fechas llegan como AAAAMMDD y los departamentos/provincia por nombre.
+    """
+    filtro = FiltroBusqueda(boe_db, busqueda)
+    condiciones = []
+    params = []
+    if len(departamentos) == 1:
+        condiciones.append(
+            "oposiciones.departamento_id = (SELECT id FROM departamentos WHERE nombre = ?)"
+        )
+        params.extend(departamentos)
+    elif departamentos:
+        condiciones.append(
+            "oposiciones.departamento_id IN (SELECT id FROM departamentos "
+            "WHERE nombre IN ({}))".format(",".join("?" * len(departamentos)))
+        )
+        params.extend(departamentos)
+    if fecha:
+        condiciones.append("oposiciones.dia = ?")
+        params.append(dia_desde_fecha(fecha))
+    if desde:
+        condiciones.append("oposiciones.dia >= ?")
+        params.append(dia_desde_fecha(desde))
+    if hasta:
+        condiciones.append("oposiciones.dia <= ?")
+        params.append(dia_desde_fecha(hasta))
+    if provincia:
+        condiciones.append(
+            "oposiciones.provincia_id = (SELECT id FROM provincias WHERE nombre = ?)"
+        )
+        params.append(provincia)
+
+    sql_part = (
+        f"{FROM_OPOSICIONES}{filtro.join} WHERE "
+        + (" AND ".join(condiciones) or "1")
+        + filtro.where
+    )
+    return sql_part, params + filtro.params, filtro
+
+
+def _orden(filtro, orden):
+    """(descendente, order_by) para `paginar`; order_by None = keyset."""
+    descendente = orden not in ("fecha_asc", "asc")
+    order_by = filtro.order_by(orden) if filtro.ordena_por_relevancia(orden) else None
+    return descendente, order_by
+
+
+def listar_oposiciones(boe_db, *, orden="fecha_desc", page=1, cursor=None,
+                       por_pagina=10, **filtros):
+    """
+    Una página del listado con los filtros dados (departamentos, fecha, desde,
+    hasta, provincia, busqueda). Devuelve una `Pagina`.
+    """
+    sql_part, params, filtro = _filtros(boe_db, **filtros)
+    descendente, order_by = _orden(filtro, orden)
+    return paginar(
+        boe_db, "SELECT oposiciones.*", sql_part, params, COLUMNAS_ORDEN,
+        descendente=descendente, por_pagina=por_pagina, page=page,
+        cursor=cursor, contexto=contexto_cursor(orden, filtros), order_by=order_by,
+    )
+
+
+# =========================
+# Desplegables de los filtros (desde `facetas`, ver app/facetas.py)
+# =========================
+def departamentos(boe_db, fecha=None, desde=None, hasta=None, provincia=None):
+    """[{"departamento", "total"}] con oposiciones el día `fecha`, en el rango o siempre."""
+    return facetas.departamentos(boe_db, fecha=fecha, desde=desde, hasta=hasta,
+                                 provincia=provincia)
+
+
+def provincias(boe_db, fecha=None, desde=None, hasta=None, departamentos=()):
+    """[{"provincia", "total"}] con oposiciones el día `fecha`, en el rango o siempre."""
+    return facetas.provincias(boe_db, fecha=fecha, desde=desde, hasta=hasta,
+                              departamentos=departamentos)
+
+
+# =========================
+# Datos del usuario
+# =========================
+# Visitas y favoritas del usuario entre las oposiciones de una página, en una
+# sola consulta; las dos van por el índice único (user_id, oposicion_id)
+SQL_MARCAS = """
+SELECT 'v' AS marca, oposicion_id FROM visitas
+WHERE user_id = ? AND oposicion_id IN ({ids})
+UNION ALL
+SELECT 'f' AS marca, oposicion_id FROM favoritas
+WHERE user_id = ? AND oposicion_id IN ({ids})
+"""
+
+
+def marcas_usuario(users_db, user_id, ids):
+    """(ids visitados, ids favoritos) del usuario entre `ids`."""
+    ids = list(ids)
+    visitadas, favoritas = set(), set()
+    if not ids:
+        return visitadas, favoritas
+    sql = SQL_MARCAS.format(ids=",".join("?" * len(ids)))
+    for row in users_db.execute(sql, [user_id, *ids, user_id, *ids]):
+        (visitadas if row["marca"] == "v" else favoritas).add(row["oposicion_id"])
+    return visitadas, favoritas
+
+
+# Las conexiones de usuarios llevan la BBDD del BOE adjunta como `boe` (ver
+# app/db.py): favoritas y visitas se cruzan con las oposiciones en SQLite.
+SELECT_FAVORITAS = (
+    "SELECT oposiciones.*, favoritas.fecha_favorito, favoritas.id AS favorita_id"
+)
+SQL_PART_FAVORITAS = (
+    "FROM favoritas JOIN boe.vista_oposiciones AS oposiciones "
+    "ON oposiciones.id = favoritas.oposicion_id WHERE favoritas.user_id = ?"
+)
+COLUMNAS_FAVORITAS = ("favoritas.fecha_favorito", "favoritas.id")
+
+
+def listar_favoritas(users_db, user_id, *, page=1, cursor=None, por_pagina=10):
+    """
+    Página de oposiciones favoritas del usuario por (fecha_favorito, id), más
+    reciente primero. Las que ya no están en la BBDD del BOE no cuentan.
+    """
+    return paginar(
+        users_db, SELECT_FAVORITAS, SQL_PART_FAVORITAS, [user_id], COLUMNAS_FAVORITAS,
+        por_pagina=por_pagina, page=page, cursor=cursor,
+        contexto=contexto_cursor("favoritas", {"user_id": user_id}),
+        claves=("fecha_favorito", "favorita_id"),
+    )
+
+
+# Visitas agrupadas primero por oposición (recorriendo idx_visitas_oposicion,
+# sin ordenar) y luego por departamento_id: una búsqueda en `oposiciones` por
+# oposición visitada, no por visita.
+SQL_VISITAS_DEPARTAMENTO = """
+SELECT departamentos.nombre AS departamento, SUM(v.total) AS total_visitas
+FROM (
+    SELECT oposicion_id, COUNT(*) AS total FROM visitas GROUP BY oposicion_id
+) AS v
+JOIN boe.oposiciones AS oposiciones ON oposiciones.id = v.oposicion_id
+JOIN boe.departamentos AS departamentos ON departamentos.id = oposiciones.departamento_id
+GROUP BY oposiciones.departamento_id
+ORDER BY total_visitas DESC, departamentos.nombre
+"""
+
+
+def visitas_por_departamento(users_db):
+    """[{"departamento", "total_visitas"}] de todos los usuarios, de más a menos."""
+    return [
+        {"departamento": row["departamento"], "total_visitas": row["total_visitas"]}
+        for row in users_db.execute(SQL_VISITAS_DEPARTAMENTO)
+    ]
+
+
+# =========================
+# Suscripciones al resumen por correo
+# =========================
+SQL_SUSCRIPCION_DEPARTAMENTOS = (
+    "SELECT departamento_id FROM suscripcion_departamentos WHERE user_id = ?"
+)
+
+
+def departamentos_suscritos(users_db, user_id):
+    """Nombres de los departamentos del resumen del usuario ([] = todos)."""
+    return [
+        row["nombre"] for row in users_db.execute(
+            "SELECT departamentos.nombre FROM suscripcion_departamentos "
+            "JOIN boe.departamentos AS departamentos "
+            "ON departamentos.id = suscripcion_departamentos.departamento_id "
+            "WHERE suscripcion_departamentos.user_id = ? ORDER BY departamentos.nombre",
+            (user_id,),
+        )
+    ]
+
+
+def ids_departamentos(users_db, nombres) -> dict:
+    """{nombre: id} de los `nombres` que existen en boe.departamentos (no da de alta)."""
+    nombres = sorted({n for n in nombres if n})
+    if not nombres:
+        return {}
+    rows = users_db.execute(
+        "SELECT id, nombre FROM boe.departamentos "
+        f"WHERE nombre IN ({','.join('?' * len(nombres))})",
+        nombres,
+    ).fetchall()
+    return {row["nombre"]: row["id"] for row in rows}
+
+
+def guardar_departamentos_suscritos(users_db, user_id, ids):
+    """Sustituye los departamentos (`ids`) del resumen del usuario (no confirma)."""
+    users_db.execute("DELETE FROM suscripcion_departamentos WHERE user_id = ?", (user_id,))
+    users_db.executemany(
+        "INSERT INTO suscripcion_departamentos (user_id, departamento_id) VALUES (?, ?)",
+        [(user_id, i) for i in ids],
+    )
+
+
+# Usuarios con el resumen diario activo, con su correo y una fila por
+# departamento elegido (departamento NULL = todos)
+SQL_SUSCRIPCIONES_PENDIENTES = """
+SELECT suscripciones.user_id, users.email, departamentos.nombre AS departamento
+FROM suscripciones
+JOIN users ON users.id = suscripciones.user_id
+LEFT JOIN suscripcion_departamentos
+    ON suscripcion_departamentos.user_id = suscripciones.user_id
+LEFT JOIN boe.departamentos AS departamentos
+    ON departamentos.id = suscripcion_departamentos.departamento_id
+WHERE suscripciones.alerta_diaria = 1
+ORDER BY suscripciones.user_id, departamentos.nombre
+"""
+
+
+def suscripciones_pendientes(users_db):
+    """Filas (user_id, email, departamento) de SQL_SUSCRIPCIONES_PENDIENTES."""
+    return users_db.execute(SQL_SUSCRIPCIONES_PENDIENTES).fetchall()
+
+
+def oposiciones_suscripcion(users_db, user_id, *, fecha=None, desde=None, limite=None):
+    """
+    Oposiciones del día `fecha` (o desde `desde`) de los departamentos a los
+    que está suscrito el usuario (todas si no eligió ninguno), más recientes
+    primero. Se lanza sobre la conexión de usuarios, con la del BOE adjunta.
+    """
+    condiciones = []
+    params = []
+    if fecha:
+        condiciones.append("oposiciones.dia = ?")
+        params.append(dia_desde_fecha(fecha))
+    if desde:
+        condiciones.append("oposiciones.dia >= ?")
+        params.append(dia_desde_fecha(desde))
+    if users_db.execute(SQL_SUSCRIPCION_DEPARTAMENTOS + " LIMIT 1", (user_id,)).fetchone():
+        condiciones.append(f"oposiciones.departamento_id IN ({SQL_SUSCRIPCION_DEPARTAMENTOS})")
+        params.append(user_id)
+    sql = (
+        "SELECT oposiciones.* FROM boe.vista_oposiciones AS oposiciones WHERE "
+        + (" AND ".join(condiciones) or "1")
+        + " ORDER BY oposiciones.dia DESC, oposiciones.id DESC"
+    )
+    if limite:
+        sql += " LIMIT ?"
+        params.append(limite)
+    return users_db.execute(sql, params).fetchall()
+
+
+# =========================
+# Comprobación de planes (flask boe planes)
+# =========================
+def consultas_rutas(boe_db):
+    """
+    (bbdd, nombre, sql, params) de cada consulta que lanzan las rutas de
+    listado, con parámetros de ejemplo. "bbdd" es "boe" o "users".
+    """
+    hoy = datetime.today().strftime("%Y%m%d")
+    dia = dia_desde_fecha(hoy)
+    desde = (datetime.today() - timedelta(days=30)).strftime("%Y%m%d")
+    consultas = [
+        ("boe", "index: departamentos del día",
+         *facetas.sql_faceta("departamento", fecha=hoy)),
+        ("boe", "departamento: provincias del día",
+         *facetas.sql_faceta("provincia", fecha=hoy, departamentos=("A",))),
+        ("boe", "vigentes: departamentos",
+         *facetas.sql_faceta("departamento", desde=desde, provincia="Madrid")),
+        ("boe", "vigentes: provincias",
+         *facetas.sql_faceta("provincia", desde=desde, departamentos=("A", "B"))),
+        ("boe", "newsletter: todos los departamentos", *facetas.sql_faceta("departamento")),
+        ("users", "marcas de la página", SQL_MARCAS.format(ids="?,?"), [1, 1, 2, 1, 1, 2]),
+    ]
+
+    listados = {
+        "departamento": {"departamentos": ["MINISTERIO DE HACIENDA"], "fecha": hoy},
+        "departamento + provincia": {
+            "departamentos": ["MINISTERIO DE HACIENDA"], "fecha": hoy, "provincia": "Madrid",
+        },
+        "vigentes": {"desde": desde},
+        "vigentes + departamentos": {"desde": desde, "departamentos": ["A", "B"]},
+        "vigentes + provincia": {"desde": desde, "provincia": "Madrid"},
+        "vigentes + fechas": {"desde": desde, "hasta": hoy},
+        "vigentes + búsqueda": {"desde": desde, "busqueda": "auxiliar"},
+    }
+    for nombre, filtros in listados.items():
+        sql_part, params, filtro = _filtros(boe_db, **filtros)
+        for orden in ("fecha_desc", "relevancia"):
+            descendente, order_by = _orden(filtro, orden)
+            if orden == "relevancia" and order_by is None:
+                continue
+            sqls = sql_paginacion(
+                "SELECT oposiciones.*", sql_part, COLUMNAS_ORDEN,
+                descendente=descendente, order_by=order_by,
+            )
+            for caso, sql in sqls.items():
+                if order_by is None and caso == "ventana":
+                    continue  # El keyset no usa COUNT(*) OVER ()
+                if order_by is not None and caso != "ventana":
+                    continue
+                extra = {
+                    "siguiente": [dia, 1, 10], "anterior": [dia, 1, 10],
+                    "offset": [10, 0], "ventana": [10, 0], "contar": [],
+                }[caso]
+                consultas.append(("boe", f"{nombre} ({orden}, {caso})", sql, params + extra))
+
+    # Las estadísticas (SQL_VISITAS_DEPARTAMENTO) y las suscripciones del
+    # resumen diario (SQL_SUSCRIPCIONES_PENDIENTES) no están: recorren todas
+    # las visitas / suscripciones a propósito
+    sqls = sql_paginacion(SELECT_FAVORITAS, SQL_PART_FAVORITAS, COLUMNAS_FAVORITAS)
+    for caso, sql in sqls.items():
+        if caso == "ventana":
+            continue
+        extra = {"siguiente": ["2025-01-01", 1, 10], "anterior": ["2025-01-01", 1, 10],
+                 "offset": [10, 0], "contar": []}[caso]
+        consultas.append(("users", f"favoritas ({caso})", sql, [1] + extra))
+    return consultas
+
+
+TABLAS_PEQUENAS = ("facetas", "departamentos", "provincias")
+
+
+def plan_consulta(db, sql, params):
+    return [row[3] for row in db.execute(f"EXPLAIN QUERY PLAN {sql}", params).fetchall()]
+
+
+def es_recorrido_completo(paso: str) -> bool:
+    """
+    True si el paso del plan recorre una tabla entera ("SCAN oposiciones",
+    también "SCAN ... USING COVERING INDEX"). No cuentan las subconsultas, el
+    índice FTS5 ("SCAN oposiciones_fts VIRTUAL TABLE INDEX ..."), `facetas`,
+    que es pequeña y se cachea por versión de ingesta, ni las tablas de
+    dimensiones (decenas de filas).
+    """
+    paso = paso.strip()
+    return (
+        paso.startswith("SCAN ")
+        and not paso.startswith("SCAN (")
+        and paso.split()[1] not in TABLAS_PEQUENAS
+        and "VIRTUAL TABLE" not in paso
+    )
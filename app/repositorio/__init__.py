@@ -0,0 +1,206 @@
+# app/repositorio/__init__.py
+
+from itertools import groupby
+from typing import NamedTuple
+
+from flask import current_app
+
+# Acceso a datos de las rutas, de daily_task.py y del modelo de usuario: todo
+# lo que lee o escribe en las BBDD pasa por estas funciones y ninguna ruta
+# construye SQL. El backend se elige con DB_BACKEND:
+# - "sqlite" (por defecto): app/repositorio/sqlite.py, sobre los pools de
+#   app/db.py y las consultas de app/queries.py y app/facetas.py;
+# - "sqlalchemy": app/repositorio/sqla.py, SQLAlchemy Core contra DB_URL
+#   (SQLite o PostgreSQL), para sitios que necesiten otra BBDD sin tocar rutas.
+#
+# Las filas que se devuelven son tuplas con acceso por nombre (sqlite3.Row o
+# su equivalente en sqla.py): `fila["titulo"]`, `fila[0]`, `dict(fila)`.
+
+
+class Filtros(NamedTuple):
+    """Filtros de un listado; fechas AAAAMMDD y departamentos/provincia por nombre."""
+    departamentos: tuple = ()
+    fecha: str | None = None
+    desde: str | None = None
+    hasta: str | None = None
+    provincia: str | None = None
+    busqueda: str | None = None
+
+    def como_dict(self) -> dict:
+        """Solo los filtros con valor, como kwargs para app/queries.py."""
+        return {k: v for k, v in self._asdict().items() if v}
+
+
+class Facetas(NamedTuple):
+    departamentos: list  # [{"departamento", "total"}]
+    provincias: list  # [{"provincia", "total"}]
+
+
+class Marcas(NamedTuple):
+    visitadas: set
+    favoritas: set
+
+
+class Suscripcion(NamedTuple):
+    user_id: int
+    email: str
+    departamentos: tuple  # () = todos
+
+
+class DepartamentoDesconocido(ValueError):
+    """Nombres de departamento que no están en la BBDD del BOE."""
+
+    def __init__(self, nombres):
+        self.nombres = sorted(nombres)
+        super().__init__(f"Departamentos desconocidos: {', '.join(self.nombres)}")
+
+
+def comprobar_departamentos(nombres, ids: dict):
+    """Lanza DepartamentoDesconocido si alguno de `nombres` no tiene id en `ids`."""
+    desconocidos = {n for n in nombres if n} - ids.keys()
+    if desconocidos:
+        raise DepartamentoDesconocido(desconocidos)
+
+
+# Columnas de `users` que se pueden cambiar con `actualizar_usuario`
+COLUMNAS_USUARIO = frozenset({
+    "password_hash", "name", "apellidos", "age", "telefono", "foto_perfil",
+    "genero", "dni", "fecha_nacimiento", "nacionalidad", "direccion",
+    "codigo_postal", "ciudad", "provincia", "nivel_estudios", "titulacion",
+    "situacion_laboral", "idiomas", "discapacidad", "porcentaje_discapacidad",
+})
+
+
+class Repositorio:
+    """
+    Interfaz común de los backends. Los métodos de escritura confirman su
+    propia transacción.
+    """
+
+    # ---- Oposiciones ----
+    def version_datos(self) -> int:
+        """`ingest_version` de la BBDD del BOE: sube con cada cambio de `oposiciones`."""
+        raise NotImplementedError
+
+    def listar_oposiciones(self, filtros: Filtros, *, cursor: str | None = None,
+                           page: int = 1, orden: str = "fecha_desc",
+                           por_pagina: int = 10):
+        """Una `Pagina` (app/paginacion.py) del listado, por keyset con `cursor`."""
+        raise NotImplementedError
+
+    def departamentos(self, filtros: Filtros) -> list:
+        """[{"departamento", "total"}] con el resto de filtros (no el texto ni los departamentos)."""
+        raise NotImplementedError
+
+    def provincias(self, filtros: Filtros) -> list:
+        """[{"provincia", "total"}] con el resto de filtros (no el texto ni la provincia)."""
+        raise NotImplementedError
+
+    def facetas(self, filtros: Filtros) -> Facetas:
+        """Los dos desplegables; cada uno cuenta con los demás filtros aplicados."""
+        return Facetas(self.departamentos(filtros), self.provincias(filtros))
+
+    def visitas_por_departamento(self) -> list:
+        """[{"departamento", "total_visitas"}] de todos los usuarios, de más a menos."""
+        raise NotImplementedError
+
+    # ---- Marcas del usuario ----
+    def marcas_usuario(self, user_id: int, ids) -> Marcas:
+        """Cuáles de las oposiciones `ids` ha visitado y tiene en favoritas."""
+        raise NotImplementedError
+
+    def registrar_visita(self, user_id: int, oposicion_id: int):
+        raise NotImplementedError
+
+    def alternar_favorita(self, user_id: int, oposicion_id: int) -> bool:
+        """Marca o desmarca la favorita; True si queda marcada."""
+        raise NotImplementedError
+
+    def listar_favoritas(self, user_id: int, *, cursor: str | None = None,
+                         page: int = 1, por_pagina: int = 10):
+        """`Pagina` de favoritas por (fecha_favorito, id), más reciente primero."""
+        raise NotImplementedError
+
+    # ---- Suscripciones al resumen por correo ----
+    def preferencias_alertas(self, user_id: int) -> tuple:
+        """(alerta_diaria, [departamentos]); [] = todos."""
+        raise NotImplementedError
+
+    def guardar_preferencias_alertas(self, user_id: int, alerta_diaria: int, departamentos):
+        """
+        Guarda el resumen diario y sus `departamentos` (nombres; vacío =
+        todos). Si alguno no existe lanza DepartamentoDesconocido sin
+        guardar nada: aquí nunca se dan de alta departamentos.
+        """
+        raise NotImplementedError
+
+    def suscripciones_pendientes(self) -> list:
+        """[Suscripcion] de los usuarios con el resumen diario activo."""
+        raise NotImplementedError
+
+    def oposiciones_suscripcion(self, user_id: int, *, fecha: str | None = None,
+                                desde: str | None = None, limite: int | None = None) -> list:
+        """Oposiciones del día `fecha` (o desde `desde`) de los departamentos del usuario."""
+        raise NotImplementedError
+
+    # ---- Usuarios ----
+    def usuario_por_id(self, user_id: int):
+        raise NotImplementedError
+
+    def usuario_por_email(self, email: str):
+        raise NotImplementedError
+
+    def crear_usuario(self, email: str, password_hash: str, **campos) -> int:
+        """Da de alta el usuario (`campos` de COLUMNAS_USUARIO); devuelve su id."""
+        raise NotImplementedError
+
+    def actualizar_usuario(self, user_id: int, **campos):
+        """Cambia las columnas `campos` (de COLUMNAS_USUARIO) del usuario."""
+        raise NotImplementedError
+
+    def fotos_en_uso(self, fotos=None) -> set:
+        """
+        Los valores de `fotos` que siguen en el `foto_perfil` de algún
+        usuario (con None, todos los que hay).
+        """
+        raise NotImplementedError
+
+
+def columnas_usuario(campos: dict) -> dict:
+    desconocidas = set(campos) - COLUMNAS_USUARIO
+    if desconocidas:
+        raise ValueError(f"Columnas de users no permitidas: {sorted(desconocidas)}")
+    return campos
+
+
+def agrupar_suscripciones(filas) -> list:
+    """[Suscripcion] desde filas (user_id, email, departamento) ordenadas por user_id."""
+    suscripciones = []
+    for user_id, grupo in groupby(filas, key=lambda f: f["user_id"]):
+        grupo = list(grupo)
+        departamentos = tuple(f["departamento"] for f in grupo if f["departamento"] is not None)
+        suscripciones.append(Suscripcion(user_id, grupo[0]["email"], departamentos))
+    return suscripciones
+
+
+def get_repositorio() -> Repositorio:
+    """Repositorio de la app actual (uno por proceso), según DB_BACKEND."""
+    repositorio = current_app.extensions.get("repositorio")
+    if repositorio is None:
+        backend = current_app.config.get("DB_BACKEND", "sqlite")
+        if backend == "sqlite":
+            from .sqlite import RepositorioSQLite
+
+            repositorio = RepositorioSQLite()
+        elif backend == "sqlalchemy":
+            try:
+                from .sqla import RepositorioSQLAlchemy
+            except ImportError as e:
+                raise RuntimeError(
+                    "DB_BACKEND=sqlalchemy necesita SQLAlchemy (pip install SQLAlchemy)"
+                ) from e
+            repositorio = RepositorioSQLAlchemy(current_app.config)
+        else:
+            raise RuntimeError(f"DB_BACKEND desconocido: {backend!r}")
+        repositorio = current_app.extensions.setdefault("repositorio", repositorio)
+    return repositorio
@@ -0,0 +1,560 @@
+# app/repositorio/sqla.py
+
+from datetime import datetime
+from functools import lru_cache
+
+from sqlalchemy import (
+    Column,
+    Integer,
+    MetaData,
+    Table,
+    Text,
+    create_engine,
+    delete,
+    event,
+    func,
+    insert,
+    literal,
+    or_,
+    select,
+    tuple_,
+    union_all,
+    update,
+)
+from sqlalchemy.exc import IntegrityError
+
+from ..esquema import dia_desde_fecha, fecha_desde_dia
+from ..cache import CacheVersionada
+from ..facetas import CLAVE_VERSION, TAMANO_CACHE
+from ..paginacion import Pagina, contexto_cursor, enlazar_cursores, leer_cursor
+from . import (
+    Marcas,
+    Repositorio,
+    agrupar_suscripciones,
+    columnas_usuario,
+    comprobar_departamentos,
+)
+
+# Las tablas del BOE van en el esquema `boe`: en SQLite es oposiciones.db
+# adjunta (ATTACH) a la conexión de usuarios, como en app/db.py; en
+# PostgreSQL, un esquema `boe` de la misma BBDD.
+ESQUEMA_BOE = "boe"
+
+metadata = MetaData()
+
+departamentos = Table(
+    "departamentos", metadata,
+    Column("id", Integer, primary_key=True),
+    Column("nombre", Text, nullable=False, unique=True),
+    schema=ESQUEMA_BOE,
+)
+# `departamentos` es también un método y un parámetro del repositorio
+departamentos_t = departamentos
+provincias = Table(
+    "provincias", metadata,
+    Column("id", Integer, primary_key=True),
+    Column("nombre", Text, nullable=False, unique=True),
+    schema=ESQUEMA_BOE,
+)
+oposiciones = Table(
+    "oposiciones", metadata,
+    Column("id", Integer, primary_key=True),
+    Column("identificador", Text),
+    Column("control", Text),
+    Column("titulo", Text),
+    Column("url_html", Text, unique=True),
+    Column("url_pdf", Text),
+    Column("departamento_id", Integer),
+    Column("dia", Integer),
+    Column("provincia_id", Integer),
+    schema=ESQUEMA_BOE,
+)
+facetas = Table(
+    "facetas", metadata,
+    Column("dia", Integer, primary_key=True),
+    Column("departamento_id", Integer, primary_key=True),
+    Column("provincia_id", Integer, primary_key=True),
+    Column("total", Integer, nullable=False),
+    schema=ESQUEMA_BOE,
+)
+boe_meta = Table(
+    "boe_meta", metadata,
+    Column("clave", Text, primary_key=True),
+    Column("valor", Text),
+    schema=ESQUEMA_BOE,
+)
+
+users = Table(
+    "users", metadata,
+    Column("id", Integer, primary_key=True),
+    Column("email", Text, unique=True),
+    Column("password_hash", Text),
+    Column("name", Text),
+    Column("apellidos", Text),
+    Column("age", Integer),
+    Column("telefono", Text),
+    Column("foto_perfil", Text),
+    Column("nivel_estudios", Text),
+    Column("titulacion", Text),
+    Column("genero", Text),
+    Column("dni", Text),
+    Column("fecha_nacimiento", Text),
+    Column("nacionalidad", Text),
+    Column("direccion", Text),
+    Column("codigo_postal", Text),
+    Column("ciudad", Text),
+    Column("provincia", Text),
+    Column("situacion_laboral", Text),
+    Column("idiomas", Text),
+    Column("discapacidad", Integer),
+    Column("porcentaje_discapacidad", Integer),
+    Column("version_usuario", Integer, nullable=False, default=0),
+)
+visitas = Table(
+    "visitas", metadata,
+    Column("id", Integer, primary_key=True),
+    Column("user_id", Integer, nullable=False),
+    Column("oposicion_id", Integer, nullable=False),
+    Column("fecha_visita", Text, nullable=False),
+)
+favoritas = Table(
+    "favoritas", metadata,
+    Column("id", Integer, primary_key=True),
+    Column("user_id", Integer, nullable=False),
+    Column("oposicion_id", Integer, nullable=False),
+    Column("fecha_favorito", Text, nullable=False),
+)
+suscripciones = Table(
+    "suscripciones", metadata,
+    Column("user_id", Integer, primary_key=True),
+    Column("alerta_diaria", Integer),
+    Column("alerta_favoritos", Integer),
+    Column("departamento_filtro", Text),
+)
+suscripcion_departamentos = Table(
+    "suscripcion_departamentos", metadata,
+    Column("user_id", Integer, primary_key=True),
+    Column("departamento_id", Integer, primary_key=True),
+)
+
+# Mismas columnas, en el mismo orden, que `vista_oposiciones` (app/esquema.py)
+COLUMNAS_OPOSICION = (
+    "id", "identificador", "control", "titulo", "url_html", "url_pdf",
+    "departamento", "fecha", "provincia", "departamento_id", "dia", "provincia_id",
+)
+_SELECT_OPOSICION = (
+    oposiciones.c.id, oposiciones.c.identificador, oposiciones.c.control,
+    oposiciones.c.titulo, oposiciones.c.url_html, oposiciones.c.url_pdf,
+    departamentos_t.c.nombre.label("departamento"), oposiciones.c.dia,
+    provincias.c.nombre.label("provincia"), oposiciones.c.departamento_id,
+    oposiciones.c.provincia_id,
+)
+_FROM_OPOSICION = oposiciones.outerjoin(
+    departamentos_t, departamentos_t.c.id == oposiciones.c.departamento_id
+).outerjoin(provincias, provincias.c.id == oposiciones.c.provincia_id)
+
+
+class Fila(tuple):
+    """Tupla con acceso por nombre, como sqlite3.Row (`fila["titulo"]`, `dict(fila)`)."""
+
+    __slots__ = ()
+    _claves = ()
+    _indices = {}
+
+    def __getitem__(self, clave):
+        if isinstance(clave, str):
+            return tuple.__getitem__(self, self._indices[clave])
+        return tuple.__getitem__(self, clave)
+
+    def keys(self):
+        return self._claves
+
+
+@lru_cache(maxsize=None)
+def tipo_fila(claves: tuple) -> type:
+    """Subclase de `Fila` para unas columnas (una por forma de consulta)."""
+    return type("Fila", (Fila,), {
+        "__slots__": (), "_claves": claves,
+        "_indices": {c: i for i, c in enumerate(claves)},
+    })
+
+
+def _fila_oposicion(row, extra=()):
+    """Fila de `_SELECT_OPOSICION` (+ `extra` columnas) -> Fila como la de la vista."""
+    (id_, identificador, control, titulo, url_html, url_pdf, departamento, dia,
+     provincia, departamento_id, provincia_id, *resto) = row
+    fecha = fecha_desde_dia(dia)
+    return tipo_fila(COLUMNAS_OPOSICION + tuple(extra))((
+        id_, identificador, control, titulo, url_html, url_pdf, departamento,
+        fecha.strftime("%Y%m%d") if fecha else None, provincia,
+        departamento_id, dia, provincia_id, *resto,
+    ))
+
+
+def _fila(row):
+    return tipo_fila(tuple(row._fields))(row)
+
+
+def crear_motor(config):
+    """Engine de DB_URL (por defecto, usuarios.db con oposiciones.db adjunta)."""
+    url = config.get("DB_URL") or f"sqlite:///{config['USERS_DB_PATH']}"
+    motor = create_engine(url)
+    if motor.dialect.name == "sqlite":
+        ruta_boe = config["BOE_DB_PATH"]
+        busy_timeout_ms = int(config.get("DB_BUSY_TIMEOUT_MS", 5000))
+
+        @event.listens_for(motor, "connect")
+        def _al_conectar(conexion, _registro):
+            conexion.execute(f"ATTACH DATABASE ? AS {ESQUEMA_BOE}", (ruta_boe,))
+            conexion.execute(f"PRAGMA busy_timeout = {busy_timeout_ms}")
+
+    return motor
+
+
+class RepositorioSQLAlchemy(Repositorio):
+    """
+    Backend con SQLAlchemy Core (DB_BACKEND=sqlalchemy) para SQLite o
+    PostgreSQL. SQLAlchemy cachea la compilación de cada forma de consulta, y
+    las filas son tuplas `Fila`. Diferencias con el backend SQLite: la
+    búsqueda es LIKE sobre título, identificador y control (sin FTS5, así que
+    "relevancia" ordena por fecha) y el esquema lo crea quien despliega
+    (`metadata.create_all`); la ingesta del BOE sigue escribiendo en SQLite.
+    """
+
+    def __init__(self, config):
+        self.motor = crear_motor(config)
+        self._cache_facetas = CacheVersionada(TAMANO_CACHE)
+
+    # ---- Oposiciones ----
+    def _condiciones(self, filtros, departamentos=True, provincia=True):
+        condiciones = []
+        if departamentos and filtros.departamentos:
+            condiciones.append(oposiciones.c.departamento_id.in_(
+                select(departamentos_t.c.id).where(
+                    departamentos_t.c.nombre.in_(filtros.departamentos)
+                )
+            ))
+        for valor, operador in ((filtros.fecha, "__eq__"), (filtros.desde, "__ge__"),
+                                (filtros.hasta, "__le__")):
+            if valor:
+                condiciones.append(getattr(oposiciones.c.dia, operador)(dia_desde_fecha(valor)))
+        if provincia and filtros.provincia:
+            condiciones.append(oposiciones.c.provincia_id == (
+                select(provincias.c.id).where(provincias.c.nombre == filtros.provincia)
+                .scalar_subquery()
+            ))
+        for termino in (filtros.busqueda or "").replace('"', " ").split():
+            patron = f"%{termino}%"
+            condiciones.append(or_(
+                oposiciones.c.titulo.ilike(patron),
+                oposiciones.c.identificador.ilike(patron),
+                oposiciones.c.control.ilike(patron),
+            ))
+        return condiciones
+
+    def _paginar(self, conexion, consulta, columnas, claves, convertir, *,
+                 descendente=True, por_pagina=10, page=1, cursor=None, contexto=""):
+        """Keyset sobre `columnas` como app/paginacion.paginar, con los mismos cursores."""
+        datos = leer_cursor(cursor, contexto, len(columnas))
+        if datos is not None:
+            page = max(1, datos["p"])
+            total = datos["t"]
+            hacia_atras = datos["d"] == "ant"
+            # Hacia atrás se recorre en sentido contrario y luego se da la vuelta
+            bajando = descendente != hacia_atras
+            fila, marca = tuple_(*columnas), tuple_(*datos["k"])
+            filas = conexion.execute(
+                consulta.where(fila < marca if bajando else fila > marca)
+                .order_by(*(c.desc() if bajando else c.asc() for c in columnas))
+                .limit(por_pagina)
+            ).all()
+            if hacia_atras:
+                filas.reverse()
+        else:
+            page = max(1, page)
+            total = conexion.execute(
+                select(func.count()).select_from(consulta.subquery())
+            ).scalar_one()
+            filas = conexion.execute(
+                consulta.order_by(*(c.desc() if descendente else c.asc() for c in columnas))
+                .limit(por_pagina).offset((page - 1) * por_pagina)
+            ).all()
+        pagina = Pagina([convertir(f) for f in filas], page, total, por_pagina)
+        enlazar_cursores(pagina, claves, contexto)
+        return pagina
+
+    def _version(self, conexion):
+        valor = conexion.execute(
+            select(boe_meta.c.valor).where(boe_meta.c.clave == CLAVE_VERSION)
+        ).scalar()
+        return int(valor or 0)
+
+    def version_datos(self):
+        with self.motor.connect() as conexion:
+            return self._version(conexion)
+
+    def listar_oposiciones(self, filtros, *, cursor=None, page=1, orden="fecha_desc",
+                           por_pagina=10):
+        descendente = orden not in ("fecha_asc", "asc")
+        consulta = select(*_SELECT_OPOSICION).select_from(_FROM_OPOSICION).where(
+            *self._condiciones(filtros)
+        )
+        with self.motor.connect() as conexion:
+            return self._paginar(
+                conexion, consulta, (oposiciones.c.dia, oposiciones.c.id), ("dia", "id"),
+                _fila_oposicion, descendente=descendente, por_pagina=por_pagina,
+                page=page, cursor=cursor, contexto=contexto_cursor(orden, filtros.como_dict()),
+            )
+
+    def _faceta(self, columna, tabla, clave, filtros):
+        condiciones = []
+        for valor, operador in ((filtros.fecha, "__eq__"), (filtros.desde, "__ge__"),
+                                (filtros.hasta, "__le__")):
+            if valor:
+                condiciones.append(getattr(facetas.c.dia, operador)(dia_desde_fecha(valor)))
+        if columna == "provincia" and filtros.departamentos:
+            condiciones.append(facetas.c.departamento_id.in_(
+                select(departamentos_t.c.id).where(
+                    departamentos_t.c.nombre.in_(filtros.departamentos)
+                )
+            ))
+        if columna == "departamento" and filtros.provincia:
+            condiciones.append(facetas.c.provincia_id == (
+                select(provincias.c.id).where(provincias.c.nombre == filtros.provincia)
+                .scalar_subquery()
+            ))
+        consulta = (
+            select(tabla.c.nombre, func.sum(facetas.c.total))
+            .select_from(facetas.join(tabla, tabla.c.id == facetas.c[clave]))
+            .where(*condiciones)
+            .group_by(facetas.c[clave], tabla.c.nombre)
+            .order_by(tabla.c.nombre)
+        )
+        with self.motor.connect() as conexion:
+            version = self._version(conexion)
+
+            def calcular():
+                return [
+                    {columna: nombre, "total": total}
+                    for nombre, total in conexion.execute(consulta)
+                ]
+
+            return self._cache_facetas.obtener(
+                version, (columna, filtros.fecha, filtros.desde, filtros.hasta,
+                                    tuple(filtros.departamentos) if columna == "provincia" else (),
+                                    filtros.provincia if columna == "departamento" else None),
+                calcular,
+            )
+
+    def departamentos(self, filtros):
+        return self._faceta("departamento", departamentos_t, "departamento_id", filtros)
+
+    def provincias(self, filtros):
+        return self._faceta("provincia", provincias, "provincia_id", filtros)
+
+    def visitas_por_departamento(self):
+        por_oposicion = (
+            select(visitas.c.oposicion_id, func.count().label("total"))
+            .group_by(visitas.c.oposicion_id).subquery()
+        )
+        total_visitas = func.sum(por_oposicion.c.total).label("total_visitas")
+        consulta = (
+            select(departamentos_t.c.nombre, total_visitas)
+            .select_from(
+                por_oposicion
+                .join(oposiciones, oposiciones.c.id == por_oposicion.c.oposicion_id)
+                .join(departamentos_t, departamentos_t.c.id == oposiciones.c.departamento_id)
+            )
+            .group_by(oposiciones.c.departamento_id, departamentos_t.c.nombre)
+            .order_by(total_visitas.desc(), departamentos_t.c.nombre)
+        )
+        with self.motor.connect() as conexion:
+            return [
+                {"departamento": nombre, "total_visitas": total}
+                for nombre, total in conexion.execute(consulta)
+            ]
+
+    # ---- Marcas del usuario ----
+    def marcas_usuario(self, user_id, ids):
+        ids = list(ids)
+        visitadas, favoritas_ = set(), set()
+        if not ids:
+            return Marcas(visitadas, favoritas_)
+        consulta = union_all(*(
+            select(literal(marca).label("marca"), tabla.c.oposicion_id)
+            .where(tabla.c.user_id == user_id, tabla.c.oposicion_id.in_(ids))
+            for marca, tabla in (("v", visitas), ("f", favoritas))
+        ))
+        with self.motor.connect() as conexion:
+            for marca, oposicion_id in conexion.execute(consulta):
+                (visitadas if marca == "v" else favoritas_).add(oposicion_id)
+        return Marcas(visitadas, favoritas_)
+
+    def _subir_version_usuario(self, conexion, user_id):
+        conexion.execute(
+            update(users).where(users.c.id == user_id)
+            .values(version_usuario=users.c.version_usuario + 1)
+        )
+
+    def registrar_visita(self, user_id, oposicion_id):
+        ahora = datetime.utcnow().isoformat()
+        donde = (visitas.c.user_id == user_id, visitas.c.oposicion_id == oposicion_id)
+        with self.motor.begin() as conexion:
+            self._subir_version_usuario(conexion, user_id)
+            if conexion.execute(update(visitas).where(*donde).values(fecha_visita=ahora)).rowcount:
+                return
+            conexion.execute(insert(visitas).values(
+                user_id=user_id, oposicion_id=oposicion_id, fecha_visita=ahora
+            ))
+
+    def alternar_favorita(self, user_id, oposicion_id):
+        with self.motor.begin() as conexion:
+            self._subir_version_usuario(conexion, user_id)
+            quitadas = conexion.execute(delete(favoritas).where(
+                favoritas.c.user_id == user_id, favoritas.c.oposicion_id == oposicion_id
+            )).rowcount
+            if quitadas:
+                return False
+            conexion.execute(insert(favoritas).values(
+                user_id=user_id, oposicion_id=oposicion_id,
+                fecha_favorito=datetime.utcnow().isoformat(),
+            ))
+            return True
+
+    def listar_favoritas(self, user_id, *, cursor=None, page=1, por_pagina=10):
+        consulta = (
+            select(*_SELECT_OPOSICION, favoritas.c.fecha_favorito,
+                   favoritas.c.id.label("favorita_id"))
+            .select_from(_FROM_OPOSICION.join(favoritas, favoritas.c.oposicion_id == oposiciones.c.id))
+            .where(favoritas.c.user_id == user_id)
+        )
+        with self.motor.connect() as conexion:
+            return self._paginar(
+                conexion, consulta, (favoritas.c.fecha_favorito, favoritas.c.id),
+                ("fecha_favorito", "favorita_id"),
+                lambda row: _fila_oposicion(row, ("fecha_favorito", "favorita_id")),
+                por_pagina=por_pagina, page=page, cursor=cursor,
+                contexto=contexto_cursor("favoritas", {"user_id": user_id}),
+            )
+
+    # ---- Suscripciones al resumen por correo ----
+    def _departamentos_suscritos(self, conexion, user_id):
+        return list(conexion.execute(
+            select(departamentos_t.c.nombre)
+            .select_from(suscripcion_departamentos.join(
+                departamentos_t, departamentos_t.c.id == suscripcion_departamentos.c.departamento_id
+            ))
+            .where(suscripcion_departamentos.c.user_id == user_id)
+            .order_by(departamentos_t.c.nombre)
+        ).scalars())
+
+    def preferencias_alertas(self, user_id):
+        with self.motor.connect() as conexion:
+            alerta = conexion.execute(
+                select(suscripciones.c.alerta_diaria).where(suscripciones.c.user_id == user_id)
+            ).scalar()
+            return (alerta or 0), self._departamentos_suscritos(conexion, user_id)
+
+    def guardar_preferencias_alertas(self, user_id, alerta_diaria, departamentos):
+        nombres = sorted({n for n in departamentos if n})
+        with self.motor.begin() as conexion:
+            ids = dict(conexion.execute(
+                select(departamentos_t.c.nombre, departamentos_t.c.id)
+                .where(departamentos_t.c.nombre.in_(nombres))
+            ).all()) if nombres else {}
+            comprobar_departamentos(nombres, ids)
+            if not conexion.execute(
+                update(suscripciones).where(suscripciones.c.user_id == user_id)
+                .values(alerta_diaria=alerta_diaria)
+            ).rowcount:
+                conexion.execute(insert(suscripciones).values(
+                    user_id=user_id, alerta_diaria=alerta_diaria
+                ))
+            conexion.execute(delete(suscripcion_departamentos).where(
+                suscripcion_departamentos.c.user_id == user_id
+            ))
+            if not ids:
+                return
+            conexion.execute(insert(suscripcion_departamentos), [
+                {"user_id": user_id, "departamento_id": i} for i in ids.values()
+            ])
+
+    def suscripciones_pendientes(self):
+        consulta = (
+            select(suscripciones.c.user_id, users.c.email,
+                   departamentos_t.c.nombre.label("departamento"))
+            .select_from(
+                suscripciones
+                .join(users, users.c.id == suscripciones.c.user_id)
+                .outerjoin(suscripcion_departamentos,
+                           suscripcion_departamentos.c.user_id == suscripciones.c.user_id)
+                .outerjoin(departamentos_t,
+                           departamentos_t.c.id == suscripcion_departamentos.c.departamento_id)
+            )
+            .where(suscripciones.c.alerta_diaria == 1)
+            .order_by(suscripciones.c.user_id, departamentos_t.c.nombre)
+        )
+        with self.motor.connect() as conexion:
+            return agrupar_suscripciones(_fila(row) for row in conexion.execute(consulta))
+
+    def oposiciones_suscripcion(self, user_id, *, fecha=None, desde=None, limite=None):
+        condiciones = []
+        if fecha:
+            condiciones.append(oposiciones.c.dia == dia_desde_fecha(fecha))
+        if desde:
+            condiciones.append(oposiciones.c.dia >= dia_desde_fecha(desde))
+        elegidos = select(suscripcion_departamentos.c.departamento_id).where(
+            suscripcion_departamentos.c.user_id == user_id
+        )
+        with self.motor.connect() as conexion:
+            if conexion.execute(elegidos.limit(1)).first() is not None:
+                condiciones.append(oposiciones.c.departamento_id.in_(elegidos))
+            consulta = (
+                select(*_SELECT_OPOSICION).select_from(_FROM_OPOSICION).where(*condiciones)
+                .order_by(oposiciones.c.dia.desc(), oposiciones.c.id.desc())
+            )
+            if limite:
+                consulta = consulta.limit(limite)
+            return [_fila_oposicion(row) for row in conexion.execute(consulta)]
+
+    # ---- Usuarios ----
+    def usuario_por_id(self, user_id):
+        with self.motor.connect() as conexion:
+            row = conexion.execute(select(users).where(users.c.id == user_id)).first()
+        return _fila(row) if row is not None else None
+
+    def usuario_por_email(self, email):
+        with self.motor.connect() as conexion:
+            row = conexion.execute(select(users).where(users.c.email == email.lower())).first()
+        return _fila(row) if row is not None else None
+
+    def crear_usuario(self, email, password_hash, **campos):
+        with self.motor.begin() as conexion:
+            return conexion.execute(
+                insert(users).values(
+                    email=email.lower(), password_hash=password_hash,
+                    **columnas_usuario(campos),
+                ).returning(users.c.id)
+            ).scalar_one()
+
+    def actualizar_usuario(self, user_id, **campos):
+        if not columnas_usuario(campos):
+            return
+        with self.motor.begin() as conexion:
+            conexion.execute(
+                update(users).where(users.c.id == user_id)
+                .values(**campos, version_usuario=users.c.version_usuario + 1)
+            )
+
+    def fotos_en_uso(self, fotos=None):
+        consulta = select(users.c.foto_perfil).distinct()
+        if fotos is None:
+            consulta = consulta.where(users.c.foto_perfil.is_not(None))
+        else:
+            fotos = list(set(fotos))
+            if not fotos:
+                return set()
+            consulta = consulta.where(users.c.foto_perfil.in_(fotos))
+        with self.motor.connect() as conexion:
+            return set(conexion.execute(consulta).scalars())
+
@@ -0,0 +1,161 @@
+# app/repositorio/sqlite.py
+
+from datetime import datetime
+
+from .. import queries
+from ..db import get_boe_db, get_users_db
+from ..facetas import version_ingesta
+from . import (
+    Marcas,
+    Repositorio,
+    agrupar_suscripciones,
+    columnas_usuario,
+    comprobar_departamentos,
+)
+
+# SQL fijo: cada conexión del pool guarda sus sentencias preparadas
+# (DB_STATEMENT_CACHE) y las reutiliza entre peticiones
+SQL_REGISTRAR_VISITA = (
+    "INSERT OR REPLACE INTO visitas (user_id, oposicion_id, fecha_visita) VALUES (?, ?, ?)"
+)
+SQL_QUITAR_FAVORITA = "DELETE FROM favoritas WHERE user_id = ? AND oposicion_id = ?"
+SQL_PONER_FAVORITA = (
+    "INSERT INTO favoritas (user_id, oposicion_id, fecha_favorito) VALUES (?, ?, ?)"
+)
+SQL_PREFERENCIAS = "SELECT alerta_diaria FROM suscripciones WHERE user_id = ?"
+# REPLACE: alerta_favoritos vuelve a su valor por defecto (ya no se usa)
+SQL_GUARDAR_PREFERENCIAS = (
+    "INSERT OR REPLACE INTO suscripciones (user_id, alerta_diaria) VALUES (?, ?)"
+)
+# En la misma transacción que cada cambio del perfil, las visitas o las favoritas
+SQL_SUBIR_VERSION_USUARIO = (
+    "UPDATE users SET version_usuario = version_usuario + 1 WHERE id = ?"
+)
+SQL_USUARIO_POR_ID = "SELECT * FROM users WHERE id = ?"
+SQL_USUARIO_POR_EMAIL = "SELECT * FROM users WHERE email = ?"
+
+
+class RepositorioSQLite(Repositorio):
+    """
+    Backend por defecto: las conexiones del pool de la petición (app/db.py) y
+    las consultas de app/queries.py. Devuelve sqlite3.Row.
+    """
+
+    # ---- Oposiciones ----
+    def version_datos(self):
+        return version_ingesta(get_boe_db())
+
+    def listar_oposiciones(self, filtros, *, cursor=None, page=1, orden="fecha_desc",
+                           por_pagina=10):
+        return queries.listar_oposiciones(
+            get_boe_db(), orden=orden, page=page, cursor=cursor,
+            por_pagina=por_pagina, **filtros.como_dict(),
+        )
+
+    def departamentos(self, filtros):
+        return queries.departamentos(
+            get_boe_db(), fecha=filtros.fecha, desde=filtros.desde,
+            hasta=filtros.hasta, provincia=filtros.provincia,
+        )
+
+    def provincias(self, filtros):
+        return queries.provincias(
+            get_boe_db(), fecha=filtros.fecha, desde=filtros.desde,
+            hasta=filtros.hasta, departamentos=filtros.departamentos,
+        )
+
+    def visitas_por_departamento(self):
+        return queries.visitas_por_departamento(get_users_db())
+
+    # ---- Marcas del usuario ----
+    def marcas_usuario(self, user_id, ids):
+        return Marcas(*queries.marcas_usuario(get_users_db(), user_id, ids))
+
+    def registrar_visita(self, user_id, oposicion_id):
+        db = get_users_db()
+        db.execute(SQL_REGISTRAR_VISITA, (user_id, oposicion_id, datetime.utcnow().isoformat()))
+        db.execute(SQL_SUBIR_VERSION_USUARIO, (user_id,))
+        db.commit()
+
+    def alternar_favorita(self, user_id, oposicion_id):
+        db = get_users_db()
+        db.execute(SQL_SUBIR_VERSION_USUARIO, (user_id,))
+        if db.execute(SQL_QUITAR_FAVORITA, (user_id, oposicion_id)).rowcount > 0:
+            db.commit()
+            return False
+        db.execute(SQL_PONER_FAVORITA, (user_id, oposicion_id, datetime.utcnow().isoformat()))
+        db.commit()
+        return True
+
+    def listar_favoritas(self, user_id, *, cursor=None, page=1, por_pagina=10):
+        return queries.listar_favoritas(
+            get_users_db(), user_id, page=page, cursor=cursor, por_pagina=por_pagina
+        )
+
+    # ---- Suscripciones al resumen por correo ----
+    def preferencias_alertas(self, user_id):
+        db = get_users_db()
+        row = db.execute(SQL_PREFERENCIAS, (user_id,)).fetchone()
+        return (row["alerta_diaria"] if row else 0), queries.departamentos_suscritos(db, user_id)
+
+    def guardar_preferencias_alertas(self, user_id, alerta_diaria, departamentos):
+        db = get_users_db()
+        ids = queries.ids_departamentos(db, departamentos)
+        comprobar_departamentos(departamentos, ids)
+        db.execute(SQL_GUARDAR_PREFERENCIAS, (user_id, alerta_diaria))
+        queries.guardar_departamentos_suscritos(db, user_id, ids.values())
+        db.commit()
+
+    def suscripciones_pendientes(self):
+        return agrupar_suscripciones(queries.suscripciones_pendientes(get_users_db()))
+
+    def oposiciones_suscripcion(self, user_id, *, fecha=None, desde=None, limite=None):
+        return queries.oposiciones_suscripcion(
+            get_users_db(), user_id, fecha=fecha, desde=desde, limite=limite
+        )
+
+    # ---- Usuarios ----
+    def usuario_por_id(self, user_id):
+        return get_users_db().execute(SQL_USUARIO_POR_ID, (user_id,)).fetchone()
+
+    def usuario_por_email(self, email):
+        return get_users_db().execute(SQL_USUARIO_POR_EMAIL, (email.lower(),)).fetchone()
+
+    def crear_usuario(self, email, password_hash, **campos):
+        campos = {"email": email.lower(), "password_hash": password_hash,
+                  **columnas_usuario(campos)}
+        db = get_users_db()
+        cursor = db.execute(
+            f"INSERT INTO users ({', '.join(campos)}) VALUES ({', '.join('?' * len(campos))})",
+            list(campos.values()),
+        )
+        db.commit()
+        return cursor.lastrowid
+
+    def actualizar_usuario(self, user_id, **campos):
+        if not columnas_usuario(campos):
+            return
+        db = get_users_db()
+        db.execute(
+            f"UPDATE users SET {', '.join(f'{c} = ?' for c in campos)}, "
+            "version_usuario = version_usuario + 1 WHERE id = ?",
+            [*campos.values(), user_id],
+        )
+        db.commit()
+
+    def fotos_en_uso(self, fotos=None):
+        db = get_users_db()
+        if fotos is None:
+            filas = db.execute(
+                "SELECT DISTINCT foto_perfil FROM users WHERE foto_perfil IS NOT NULL"
+            )
+            return {row[0] for row in filas}
+        fotos = list(set(fotos))
+        if not fotos:
+            return set()
+        filas = db.execute(
+            "SELECT DISTINCT foto_perfil FROM users WHERE foto_perfil IN "
+            f"({', '.join('?' * len(fotos))})",
+            fotos,
+        )
+        return {row[0] for row in filas}
@@ -0,0 +1,141 @@
+import json
+import re
+from datetime import datetime, timedelta
+from operator import itemgetter
+
+from flask import Blueprint, Response, request
+
+from ..cache import consulta_en_cache, respuesta_condicional
+from ..repositorio import Filtros, get_repositorio
+
+api_bp = Blueprint("api", __name__, url_prefix="/api/v1")
+
+# orjson (opcional) serializa las tuplas de filas varias veces más rápido
+# que json; sin él se usa json con la salida compacta equivalente
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Columnas que se pueden pedir en `campos` (las de vista_oposiciones menos
+# los ids internos de las dimensiones), en el orden por defecto
+CAMPOS = (
+    "id", "identificador", "control", "titulo", "url_html", "url_pdf",
+    "departamento", "fecha", "provincia",
+)
+LIMITE_DEFECTO = 20
+LIMITE_MAXIMO = 100
+_FECHA = re.compile(r"^\d{4}-?\d{2}-?\d{2}$")
+
+
+class ErrorPeticion(Exception):
+    pass
+
+
+def respuesta_json(datos, status=200):
+    if orjson is not None:
+        cuerpo = orjson.dumps(datos)
+    else:
+        cuerpo = json.dumps(datos, ensure_ascii=False, separators=(",", ":"))
+    return Response(cuerpo, status=status, mimetype="application/json")
+
+
+@api_bp.errorhandler(ErrorPeticion)
+def error_peticion(e):
+    return respuesta_json({"error": str(e)}, 400)
+
+
+def _fecha(nombre):
+    """La fecha `nombre` (AAAA-MM-DD o AAAAMMDD) como AAAAMMDD; "" si no viene."""
+    valor = request.args.get(nombre, "").strip()
+    if not valor:
+        return ""
+    valor = valor.replace("-", "") if _FECHA.match(valor) else ""
+    # Además de la forma, que el día exista (2025-13-45 la tiene)
+    try:
+        datetime.strptime(valor, "%Y%m%d")
+    except ValueError:
+        raise ErrorPeticion(f"{nombre} debe ser una fecha AAAA-MM-DD válida") from None
+    return valor
+
+
+def _campos():
+    pedidos = [c for c in request.args.get("campos", "").replace(" ", "").split(",") if c]
+    desconocidos = [c for c in pedidos if c not in CAMPOS]
+    if desconocidos:
+        raise ErrorPeticion(
+            f"campos desconocidos: {', '.join(desconocidos)} (válidos: {', '.join(CAMPOS)})"
+        )
+    return tuple(dict.fromkeys(pedidos)) or CAMPOS
+
+
+def _limite():
+    try:
+        limite = int(request.args.get("limite", LIMITE_DEFECTO))
+    except ValueError:
+        raise ErrorPeticion("limite debe ser un entero") from None
+    if not 1 <= limite <= LIMITE_MAXIMO:
+        raise ErrorPeticion(f"limite debe estar entre 1 y {LIMITE_MAXIMO}")
+    return limite
+
+
+def _proyectar(filas, campos):
+    """Las filas como listas de `campos`, por posición (sin un dict por fila)."""
+    if not filas:
+        return []
+    columnas = list(filas[0].keys())
+    coger = itemgetter(*(columnas.index(c) for c in campos))
+    if len(campos) == 1:
+        return [(coger(fila),) for fila in filas]
+    return [coger(fila) for fila in filas]
+
+
+@api_bp.route("/oposiciones")
+@respuesta_condicional(
+    "departamentos", "busqueda", "provincia", "fecha_desde", "fecha_hasta", "orden",
+    "cursor", "campos", "limite", "facetas",
+)
+def oposiciones():
+    """
+    Oposiciones de los últimos 30 días con los filtros de /user_oposiciones
+    (departamentos repetible, provincia, busqueda, fecha_desde/fecha_hasta
+    AAAA-MM-DD, orden). Pagina con `cursor` (el `siguiente`/`anterior` de la
+    respuesta) y `limite`; `campos=a,b` elige las columnas de cada fila y
+    `facetas=1` añade los contadores por departamento y provincia.
+    """
+    repositorio = get_repositorio()
+    campos = _campos()
+    limite = _limite()
+    orden = request.args.get("orden", "fecha_desc")
+    desde = (datetime.today() - timedelta(days=30)).strftime("%Y%m%d")
+    filtros = Filtros(
+        departamentos=tuple(d for d in request.args.getlist("departamentos") if d.strip()),
+        desde=max(desde, _fecha("fecha_desde")),
+        hasta=_fecha("fecha_hasta"),
+        provincia=request.args.get("provincia", ""),
+        busqueda=request.args.get("busqueda", ""),
+    )
+    cursor = request.args.get("cursor")
+    pagina = consulta_en_cache(
+        ("listar_oposiciones", filtros, orden, cursor, limite),
+        lambda: repositorio.listar_oposiciones(
+            filtros, orden=orden, cursor=cursor, por_pagina=limite
+        ),
+    )
+
+    datos = {
+        "campos": campos,
+        "oposiciones": _proyectar(pagina.filas, campos),
+        "total": pagina.total,
+        "pagina": pagina.page,
+        "paginas": pagina.total_pages,
+        "anterior": pagina.anterior,
+        "siguiente": pagina.siguiente,
+    }
+    if request.args.get("facetas") == "1":
+        departamentos, provincias = repositorio.facetas(filtros)
+        datos["facetas"] = {
+            "departamentos": {d["departamento"]: d["total"] for d in departamentos},
+            "provincias": {p["provincia"]: p["total"] for p in provincias},
+        }
+    return respuesta_json(datos)
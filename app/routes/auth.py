@@ -1,6 +1,3 @@
-from datetime import datetime
-import os
-
 from flask import (
     Blueprint,
     render_template,
@@ -8,14 +5,13 @@ from flask import (
     redirect,
     url_for,
     flash,
-    current_app,
 )
 from flask_login import login_user, logout_user, login_required, current_user
 from werkzeug.security import generate_password_hash, check_password_hash
-from werkzeug.utils import secure_filename
 
-from ..db import get_users_db
+from ..fotos import FotoNoValida, recibir_foto
 from ..models import User
+from ..repositorio import get_repositorio
 from ..email_utils import (
     send_password_reset_email,
     generate_reset_token,
@@ -35,34 +31,20 @@ def create_user(
     nivel_estudios=None,
     titulacion=None,
 ):
-    db = get_users_db()
-    password_hash = generate_password_hash(password)
-    db.execute(
-        """
-        INSERT INTO users (email, password_hash, name, apellidos, age, telefono,
-                        nivel_estudios, titulacion) 
-        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-    """,
-        (
-            email.lower(),
-            password_hash,
-            name,
-            apellidos,
-            age,
-            telefono,
-            nivel_estudios,
-            titulacion,
-        ),
+    return get_repositorio().crear_usuario(
+        email,
+        generate_password_hash(password),
+        name=name,
+        apellidos=apellidos,
+        age=age,
+        telefono=telefono,
+        nivel_estudios=nivel_estudios,
+        titulacion=titulacion,
     )
-    db.commit()
 
 
 def find_user_by_email(email):
-    db = get_users_db()
-    return db.execute(
-        "SELECT * FROM users WHERE email = ?",
-        (email.lower(),),
-    ).fetchone()
+    return get_repositorio().usuario_por_email(email)
 
 
 @auth_bp.route("/login", methods=["GET", "POST"])
@@ -143,29 +125,10 @@ def register():
 
         user = find_user_by_email(email)
 
-        foto_perfil = None
-        if "foto_perfil" in request.files:
-            file = request.files["foto_perfil"]
-            if file and file.filename:
-                allowed_extensions = {"png", "jpg", "jpeg", "gif", "webp"}
-                filename = file.filename.lower()
-                if "." in filename and filename.rsplit(".", 1)[1] in allowed_extensions:
-                    filename = secure_filename(
-                        f"user_{user['id']}_{int(datetime.now().timestamp())}."
-                        f"{filename.rsplit('.', 1)[1]}"
-                    )
-                    upload_folder = current_app.config["UPLOAD_FOLDER"]
-                    filepath = os.path.join(upload_folder, filename)
-                    os.makedirs(os.path.dirname(filepath), exist_ok=True)
-                    file.save(filepath)
-                    foto_perfil = f"/static/uploads/profiles/{filename}"
-
-                    db = get_users_db()
-                    db.execute(
-                        "UPDATE users SET foto_perfil = ? WHERE id = ?",
-                        (foto_perfil, user["id"]),
-                    )
-                    db.commit()
+        try:
+            recibir_foto(user["id"], request.files.get("foto_perfil"))
+        except FotoNoValida as e:
+            flash(f"No se ha guardado la foto de perfil: {e}", "warning")
 
         user = find_user_by_email(email)
         login_user(
@@ -189,7 +152,7 @@ def register():
 @auth_bp.route("/change_password", methods=["POST"])
 @login_required
 def change_password():
-    db = get_users_db()
+    repositorio = get_repositorio()
     user_id = current_user.id
 
     current_password = request.form.get("current_password")
@@ -204,9 +167,7 @@ def change_password():
         flash("Las nuevas contraseñas no coinciden.", "danger")
         return redirect(url_for("user.configuracion_cuenta"))
 
-    row = db.execute(
-        "SELECT password_hash FROM users WHERE id = ?", (user_id,)
-    ).fetchone()
+    row = repositorio.usuario_por_id(user_id)
     if not row:
         flash("Usuario no encontrado.", "danger")
         return redirect(url_for("main.index"))
@@ -218,8 +179,7 @@ def change_password():
         return redirect(url_for("user.configuracion_cuenta"))
 
     new_hash = generate_password_hash(new_password)
-    db.execute("UPDATE users SET password_hash = ? WHERE id = ?", (new_hash, user_id))
-    db.commit()
+    repositorio.actualizar_usuario(user_id, password_hash=new_hash)
 
     flash("¡Contraseña actualizada correctamente!", "success")
     return redirect(url_for("user.configuracion_cuenta"))
@@ -288,12 +248,12 @@ def reset_password(token):
             return redirect(url_for("auth.reset_password", token=token))
 
         # Actualizar contraseña
-        db = get_users_db()
-        new_hash = generate_password_hash(new_password)
-        db.execute(
-            "UPDATE users SET password_hash = ? WHERE email = ?", (new_hash, email)
-        )
-        db.commit()
+        repositorio = get_repositorio()
+        user = repositorio.usuario_por_email(email)
+        if user:
+            repositorio.actualizar_usuario(
+                user["id"], password_hash=generate_password_hash(new_password)
+            )
 
         flash(
             "¡Contraseña restablecida correctamente! Ahora puedes iniciar sesión.",
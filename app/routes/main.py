@@ -1,46 +1,77 @@
 from datetime import datetime
-from flask import Blueprint, render_template, flash, redirect, url_for, request
+from flask import (
+    Blueprint,
+    abort,
+    flash,
+    jsonify,
+    redirect,
+    render_template,
+    request,
+    send_from_directory,
+    url_for,
+)
 from flask_login import current_user, login_required
 
-from ..db import get_boe_db, get_users_db
+from ..cache import (
+    cachear_pagina,
+    consulta_en_cache,
+    metricas_caches,
+    respuesta_condicional,
+)
+from ..db import metricas_pools
+from ..imagenes import MAX_AGE_IMAGENES, get_manifiesto
+from ..repositorio import Filtros, get_repositorio
 from ..scraping.boe_scraper import (
+    SyncEnCurso,
     scrape_boe_dia,
     scrape_boe_ultimos_dias,
     sync_boe_hasta_hoy,
 )
+from ..scraping.refresco import solicitar_refresco
 
 main_bp = Blueprint("main", __name__)
 
 
 @main_bp.route("/")
 def index():
-    try:
-        # Sincronizar la BBDD con los días faltantes hasta hoy.
-        # Si la tabla está vacía, `sync_boe_hasta_hoy` bajará hasta 30 días atrás.
-        sync_boe_hasta_hoy(max_dias_inicial=30, max_dias_guardados=30)
-    except Exception as e:
-        # Usa logger si quieres
-        print(f"Error al actualizar datos automáticamente: {e}")
-    db = get_boe_db()
+    # Se sirve al momento lo que ya hay en la BBDD; si toca, se lanza un
+    # refresco del BOE en segundo plano (como mucho uno por intervalo).
+    solicitar_refresco()
+    return _index()
+
+
+@respuesta_condicional()
+@cachear_pagina()
+def _index():
     hoy = datetime.today().strftime("%Y%m%d")
     fecha_mostrar = datetime.today().strftime("%d/%m/%Y")
-    deps = db.execute(
-        """
-        SELECT DISTINCT departamento
-        FROM oposiciones
-        WHERE departamento IS NOT NULL AND fecha = ?
-        ORDER BY departamento
-        """,
-        (hoy,),
-    ).fetchall()
+    deps = get_repositorio().departamentos(Filtros(fecha=hoy))
     return render_template("index.html", departamentos=deps, fecha_hoy=fecha_mostrar)
 
 
+@main_bp.route("/img/dept/<huella>/<fichero>")
+def imagen_departamento(huella, fichero):
+    """
+    Imagen de departamento con la huella de su contenido en la URL (ver
+    app/imagenes.py): si cambia la imagen cambia la URL, así que se puede
+    cachear un año sin revalidar.
+    """
+    manifiesto = get_manifiesto()
+    imagen = manifiesto.por_fichero(fichero)
+    if imagen is None or imagen.huella != huella:
+        abort(404)
+    respuesta = send_from_directory(manifiesto.directorio, fichero, max_age=MAX_AGE_IMAGENES)
+    respuesta.cache_control.public = True
+    respuesta.cache_control.immutable = True
+    return respuesta
+
+
 @main_bp.route("/departamento/<nombre>")
+@respuesta_condicional("busqueda", "provincia", "orden", "page", "cursor")
+@cachear_pagina("busqueda", "provincia", "orden", "page", "cursor")
 def mostrar_departamento(nombre):
 
-    boe_db = get_boe_db()
-    users_db = get_users_db()
+    repositorio = get_repositorio()
 
     hoy = datetime.today().strftime("%Y%m%d")
     user = current_user
@@ -48,78 +79,36 @@ def mostrar_departamento(nombre):
     provincia = request.args.get("provincia", "")
     orden = request.args.get("orden", "fecha_desc")
     page = int(request.args.get("page", 1))
-    por_pagina = 10
-    offset = (page - 1) * por_pagina
-
-    # 🔥 SOLO oposiciones de hoy
-    sql = "SELECT * FROM oposiciones WHERE departamento = ? AND fecha = ?"
-    params = [nombre, hoy]
-
-    # Filtro de búsqueda (opcional)
-    if busqueda:
-        like = f"%{busqueda}%"
-        sql += " AND (titulo LIKE ? OR identificador LIKE ? OR control LIKE ?)"
-        params += [like, like, like]
-
-    # Filtro por provincia (opcional)
-    if provincia:
-        sql += " AND provincia = ?"
-        params.append(provincia) 
-        
-    # Orden + paginación
-    if orden == "fecha_asc":
-        order_direction = "ASC"
-    elif orden == "fecha_desc":
-        order_direction = "DESC"
-    else:
-        # Compatibilidad con valores antiguos
-        order_direction = "DESC" if orden == "desc" else "ASC"
-    
-    sql += f" ORDER BY fecha {order_direction} LIMIT ? OFFSET ?"
-    params += [por_pagina, offset]
-
-    rows = boe_db.execute(sql, params).fetchall()
-
-    # Total SOLO de hoy
-    total = boe_db.execute(
-        "SELECT COUNT(*) FROM oposiciones WHERE departamento = ? AND fecha = ?",
-        (nombre, hoy),
-    ).fetchone()[0]
-
-    total_pages = (total + por_pagina - 1) // por_pagina
-
-    # Provincias disponibles
-    provincias = boe_db.execute(
-        "SELECT DISTINCT provincia FROM oposiciones "
-        "WHERE provincia IS NOT NULL ORDER BY provincia"
-    ).fetchall()
-
-    # Visitadas / Favoritas
+
+    # 🔥 SOLO oposiciones de hoy. Búsqueda con FTS5 y paginación por keyset
+    # sobre (fecha, id); ver app/queries.py
+    filtros = Filtros(departamentos=(nombre,), fecha=hoy, provincia=provincia, busqueda=busqueda)
+    cursor = request.args.get("cursor")
+    pagina = consulta_en_cache(
+        ("listar_oposiciones", filtros, orden, page, cursor),
+        lambda: repositorio.listar_oposiciones(filtros, orden=orden, page=page, cursor=cursor),
+    )
+
+    # Provincias con oposiciones hoy en este departamento, con su nº
+    provincias = repositorio.provincias(Filtros(departamentos=(nombre,), fecha=hoy))
+
+    # Visitadas / Favoritas, solo entre las oposiciones de esta página
     visitadas = []
     favoritas = []
 
     if user.is_authenticated:
-        visitadas = [
-            row["oposicion_id"]
-            for row in users_db.execute(
-                "SELECT oposicion_id FROM visitas WHERE user_id = ?",
-                (user.id,),
-            ).fetchall()
-        ]
-        favoritas = [
-            row["oposicion_id"]
-            for row in users_db.execute(
-                "SELECT oposicion_id FROM favoritas WHERE user_id = ?",
-                (user.id,),
-            ).fetchall()
-        ]
+        visitadas, favoritas = repositorio.marcas_usuario(
+            user.id, [row["id"] for row in pagina.filas]
+        )
 
     return render_template(
         "tarjeta.html",
         departamento=nombre,
-        rows=rows,
-        page=page,
-        total_pages=total_pages,
+        rows=pagina.filas,
+        page=pagina.page,
+        total_pages=pagina.total_pages,
+        cursor_anterior=pagina.anterior,
+        cursor_siguiente=pagina.siguiente,
         provincias=provincias,
         busqueda=busqueda,
         provincia_filtro=provincia,
@@ -127,14 +116,18 @@ def mostrar_departamento(nombre):
         hoy=hoy,
         visitadas=visitadas,
         favoritas=favoritas,
-        total=total
+        total=pagina.total
     )
 
 
 @main_bp.route("/admin/scrape_ultimos_30")
 @login_required
 def admin_scrape_ultimos_30():
-    nuevas = scrape_boe_ultimos_dias(30)
+    try:
+        nuevas = scrape_boe_ultimos_dias(30, esperar=False)
+    except SyncEnCurso:
+        flash("Ya hay una sincronización del BOE en curso. Inténtalo en unos minutos.", "warning")
+        return redirect(url_for("user.oposiciones_vigentes"))
     flash(
         f"Se han insertado {len(nuevas)} oposiciones nuevas de los últimos 30 días.", "success")
     return redirect(url_for("user.oposiciones_vigentes"))
@@ -142,44 +135,8 @@ def admin_scrape_ultimos_30():
 
 @main_bp.route("/estadisticas")
 def estadisticas():
-    boe_db = get_boe_db()
-    users_db = get_users_db()
-
-    visitas = users_db.execute(
-        """
-        SELECT oposicion_id, COUNT(id) AS total_visitas
-        FROM visitas
-        GROUP BY oposicion_id
-        """
-    ).fetchall()
-
-    if not visitas:
-        return render_template(
-            "estadisticas.html",
-            stats=[],
-            labels=[],
-            values=[],
-        )
-
-    opos_ids = [v["oposicion_id"] for v in visitas]
-    placeholders = ",".join("?" * len(opos_ids))
-    opos_rows = boe_db.execute(
-        f"SELECT id, departamento FROM oposiciones WHERE id IN ({placeholders})",
-        opos_ids,
-    ).fetchall()
-    dept_por_id = {row["id"]: row["departamento"] for row in opos_rows}
-
-    agg = {}
-    for v in visitas:
-        dep = dept_por_id.get(v["oposicion_id"])
-        if not dep:
-            continue
-        agg[dep] = agg.get(dep, 0) + v["total_visitas"]
-
-    stats = [
-        {"departamento": dep, "total_visitas": total}
-        for dep, total in sorted(agg.items(), key=lambda x: x[1], reverse=True)
-    ]
+    # Una sola consulta: visitas (usuarios) JOIN boe.oposiciones
+    stats = get_repositorio().visitas_por_departamento()
     labels = [s["departamento"] for s in stats]
     values = [s["total_visitas"] for s in stats]
 
@@ -193,9 +150,28 @@ def admin_sync_boe():
     Sincroniza la BBDD del BOE SOLO con los días que falten hasta hoy.
     Usa sync_boe_hasta_hoy y luego redirige a las oposiciones vigentes.
     """
-    nuevas = sync_boe_hasta_hoy()  # por defecto, si está vacía baja hasta 30 días atrás
+    try:
+        # por defecto, si está vacía baja hasta 30 días atrás
+        nuevas = sync_boe_hasta_hoy(esperar=False)
+    except SyncEnCurso:
+        flash("Ya hay una sincronización del BOE en curso. Inténtalo en unos minutos.", "warning")
+        return redirect(url_for("user.oposiciones_vigentes"))
     flash(
         f"Sincronización completada. Insertadas {len(nuevas)} oposiciones nuevas.",
         "success",
     )
     return redirect(url_for("user.oposiciones_vigentes"))
+
+
+@main_bp.route("/admin/db_pool")
+@login_required
+def admin_db_pool():
+    """Métricas de los pools de conexiones SQLite de este proceso."""
+    return jsonify(metricas_pools())
+
+
+@main_bp.route("/admin/cache")
+@login_required
+def admin_cache():
+    """Aciertos/fallos de las cachés de páginas, consultas y facetas de este proceso."""
+    return jsonify(metricas_caches())
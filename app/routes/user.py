@@ -1,4 +1,3 @@
-import os
 from datetime import datetime, timedelta
 
 from flask import (
@@ -9,51 +8,29 @@ from flask import (
     url_for,
     flash,
     jsonify,
-    current_app,
 )
 from flask_login import login_required, current_user
-from werkzeug.utils import secure_filename
 
 from app.scraping.boe_scraper import scrape_boe_ultimos_dias, sync_boe_hasta_hoy
-from ..db import get_users_db, get_boe_db
+from ..cache import consulta_en_cache, respuesta_condicional
 from ..email_utils import send_new_oposiciones_email
+from ..fotos import FotoNoValida, recibir_foto
+from ..repositorio import DepartamentoDesconocido, Filtros, get_repositorio
 
 user_bp = Blueprint("user", __name__)
 
 
 # --- FUNCIONES AUXILIARES ---
 def registrar_visita(user_id, oposicion_id):
-    db = get_users_db()
-    fecha = datetime.utcnow().isoformat()
     try:
-        db.execute(
-            "INSERT OR REPLACE INTO visitas (user_id, oposicion_id, fecha_visita) "
-            "VALUES (?, ?, ?)",
-            (user_id, oposicion_id, fecha),
-        )
-        db.commit()
+        get_repositorio().registrar_visita(user_id, oposicion_id)
     except Exception as e:
         print(f"Error al registrar visita: {e}")
 
 
 def toggle_favorito(user_id, oposicion_id):
-    db = get_users_db()
-    fecha = datetime.utcnow().isoformat()
     try:
-        cursor = db.execute(
-            "DELETE FROM favoritas WHERE user_id = ? AND oposicion_id = ?",
-            (user_id, oposicion_id),
-        )
-        if cursor.rowcount > 0:
-            db.commit()
-            return False
-        db.execute(
-            "INSERT INTO favoritas (user_id, oposicion_id, fecha_favorito) "
-            "VALUES (?, ?, ?)",
-            (user_id, oposicion_id, fecha),
-        )
-        db.commit()
-        return True
+        return get_repositorio().alternar_favorita(user_id, oposicion_id)
     except Exception as e:
         print(f"Error al gestionar favorito: {e}")
         return False
@@ -69,15 +46,16 @@ def user_home():
 
 @user_bp.route("/user_oposiciones")
 @login_required
+@respuesta_condicional(
+    "departamentos", "busqueda", "provincia", "fecha_desde", "fecha_hasta", "orden",
+    "page", "cursor",
+)
 def oposiciones_vigentes():
-    boe_db = get_boe_db()
-    users_db = get_users_db()
+    repositorio = get_repositorio()
     user = current_user
     desde = (datetime.today() - timedelta(days=30)).strftime("%Y%m%d")
 
     page = int(request.args.get("page", 1))
-    por_pagina = 10
-    offset = (page - 1) * por_pagina
 
     raw_departamentos = request.args.getlist("departamentos")
     selected_departamentos = [d for d in raw_departamentos if d.strip()]
@@ -88,142 +66,85 @@ def oposiciones_vigentes():
     fecha_hasta = request.args.get("fecha_hasta", "")
     orden = request.args.get("orden", "fecha_desc")
 
-    sql_part = "FROM oposiciones WHERE fecha >= ?"
-    params = [desde]
-
-    if selected_departamentos:
-        sql_part += " AND departamento IN ({})".format(
-            ",".join(["?"] * len(selected_departamentos))
-        )
-        params.extend(selected_departamentos)
-
-    if busqueda:
-        like = f"%{busqueda}%"
-        sql_part += " AND (titulo LIKE ? OR identificador LIKE ? OR control LIKE ?)"
-        params += [like, like, like]
-
-    if provincia:
-        sql_part += " AND provincia = ?"
-        params.append(provincia)
-
-    if fecha_desde:
-        sql_part += " AND fecha >= ?"
-        params.append(fecha_desde.replace("-", ""))
-
-    if fecha_hasta:
-        sql_part += " AND fecha <= ?"
-        params.append(fecha_hasta.replace("-", ""))
+    filtros = Filtros(
+        departamentos=tuple(selected_departamentos),
+        desde=max(desde, fecha_desde.replace("-", "")),
+        hasta=fecha_hasta.replace("-", ""),
+        provincia=provincia,
+        busqueda=busqueda,
+    )
 
-    total_query = f"SELECT COUNT(*) {sql_part}"
-    total = boe_db.execute(total_query, params).fetchone()[0]
-    total_pages = (total + por_pagina - 1) // por_pagina
+    # Búsqueda con FTS5 y paginación por keyset sobre (fecha, id); ver
+    # app/queries.py. La misma página la comparten todos los usuarios.
+    cursor = request.args.get("cursor")
+    pagina = consulta_en_cache(
+        ("listar_oposiciones", filtros, orden, page, cursor),
+        lambda: repositorio.listar_oposiciones(filtros, orden=orden, page=page, cursor=cursor),
+    )
 
-    if orden == "fecha_asc":
-        order_direction = "ASC"
-    else:
-        order_direction = "DESC"
-
-    data_query = f"SELECT * {sql_part} ORDER BY fecha {order_direction} LIMIT ? OFFSET ?"
-    data_params = params + [por_pagina, offset]
-    oposiciones = boe_db.execute(data_query, data_params).fetchall()
-
-    departamentos = boe_db.execute(
-        """
-        SELECT DISTINCT departamento 
-        FROM oposiciones 
-        WHERE fecha >= ? AND departamento IS NOT NULL 
-        ORDER BY departamento
-        """,
-        (desde,),
-    ).fetchall()
-
-    provincias = boe_db.execute(
-        "SELECT DISTINCT provincia FROM oposiciones "
-        "WHERE provincia IS NOT NULL ORDER BY provincia"
-    ).fetchall()
-
-    visitadas = [
-        row["oposicion_id"]
-        for row in users_db.execute(
-            "SELECT oposicion_id FROM visitas WHERE user_id = ?",
-            (user.id,),
-        ).fetchall()
-    ]
-    favoritas = [
-        row["oposicion_id"]
-        for row in users_db.execute(
-            "SELECT oposicion_id FROM favoritas WHERE user_id = ?",
-            (user.id,),
-        ).fetchall()
-    ]
+    # Cada desplegable cuenta con el resto de filtros aplicados (salvo el texto)
+    departamentos, provincias = repositorio.facetas(filtros)
+    visitadas, favoritas = repositorio.marcas_usuario(
+        user.id, [row["id"] for row in pagina.filas]
+    )
 
     return render_template(
         "user_oposiciones.html",
         departamentos=departamentos,
         selected_departamentos=selected_departamentos,
-        oposiciones=oposiciones,
+        oposiciones=pagina.filas,
         provincias=provincias,
         busqueda=busqueda,
         provincia_filtro=provincia,
         fecha_desde=fecha_desde,
         fecha_hasta=fecha_hasta,
         orden=orden,
-        page=page,
-        total_pages=total_pages,
+        page=pagina.page,
+        total_pages=pagina.total_pages,
+        cursor_anterior=pagina.anterior,
+        cursor_siguiente=pagina.siguiente,
         visitadas=visitadas,
         favoritas=favoritas,
         hoy=datetime.today().strftime("%Y%m%d"),
         titulo_pagina=f"📢 Oposiciones Vigentes de {user.name} {user.apellidos}",
-        total=total
+        total=pagina.total
     )
 
 
 @user_bp.route("/user_alertas", methods=["GET", "POST"])
 @login_required
 def newsletter_prefs():
-    boe_db = get_boe_db()
-    users_db = get_users_db()
+    repositorio = get_repositorio()
     user_id = current_user.id
 
     if request.method == "POST":
         alerta_diaria = 1 if request.form.get("alerta_diaria") else 0
         # 🔴 ELIMINADO: ya no capturamos alerta_favoritos del formulario
 
-        # Capturar lista múltiple de departamentos
+        # Capturar lista múltiple de departamentos ("Todos" o ninguno = todos)
         seleccionados = request.form.getlist("departamentos")
-        
-        if "Todos" in seleccionados or not seleccionados:
-            dept_string = "Todos"
-        else:
-            dept_string = ",".join(seleccionados)
+        if "Todos" in seleccionados:
+            seleccionados = []
 
-        # 🔴 ACTUALIZADO: La SQL ya no guarda alerta_favoritos explícitamente
+        # 🔴 ACTUALIZADO: ya no se guarda alerta_favoritos explícitamente
         # (Se usará el valor por defecto de la tabla, que es 0)
-        users_db.execute(
-            """
-            INSERT OR REPLACE INTO suscripciones (user_id, alerta_diaria, departamento_filtro)
-            VALUES (?, ?, ?)
-        """,
-            (user_id, alerta_diaria, dept_string),
-        )
-        users_db.commit()
+        try:
+            repositorio.guardar_preferencias_alertas(user_id, alerta_diaria, seleccionados)
+        except DepartamentoDesconocido as e:
+            flash(f"No se han guardado las preferencias. {e}", "danger")
+            return redirect(url_for("user.newsletter_prefs"))
         flash("¡Preferencias de alertas actualizadas!", "success")
         return redirect(url_for("user.newsletter_prefs"))
 
-    prefs = users_db.execute(
-        "SELECT * FROM suscripciones WHERE user_id = ?", (user_id,)
-    ).fetchone()
+    alerta_diaria, suscritos = repositorio.preferencias_alertas(user_id)
 
-    if not prefs:
-        prefs = {
-            "alerta_diaria": 0,
-            "departamento_filtro": "Todos",
-        }
+    # La plantilla comprueba `dept in prefs["departamento_filtro"]`
+    prefs = {
+        "alerta_diaria": alerta_diaria,
+        "departamento_filtro": suscritos or ["Todos"],
+    }
 
-    dept_rows = boe_db.execute(
-        "SELECT DISTINCT departamento FROM oposiciones WHERE departamento IS NOT NULL ORDER BY departamento"
-    ).fetchall()
-    departamentos = [d["departamento"] for d in dept_rows]
+    departamentos = [d["departamento"] for d in repositorio.departamentos(Filtros())]
 
     return render_template(
         "user_newsletter.html",
@@ -242,7 +163,6 @@ def configuracion_cuenta():
 @user_bp.route("/update_profile", methods=["POST"])
 @login_required
 def update_profile():
-    db = get_users_db()
     user = current_user
 
     name = request.form.get("name", "").strip()
@@ -277,45 +197,27 @@ def update_profile():
         if otro_genero:
             genero = otro_genero
 
-    foto_perfil = user.foto_perfil
-    
-    if "foto_perfil" in request.files:
-        file = request.files["foto_perfil"]
-        if file and file.filename:
-            allowed_extensions = {"png", "jpg", "jpeg", "gif", "webp"}
-            filename = file.filename.lower()
-            if "." in filename and filename.rsplit(".", 1)[1] in allowed_extensions:
-                
-                filename = secure_filename(
-                    f"user_{user.id}_{int(datetime.now().timestamp())}."
-                    f"{filename.rsplit('.', 1)[1]}"
-                )
-                upload_folder = current_app.config["UPLOAD_FOLDER"]
-                filepath = os.path.join(upload_folder, filename)
-                os.makedirs(os.path.dirname(filepath), exist_ok=True)
-                file.save(filepath)
-                foto_perfil = f"/static/uploads/profiles/{filename}"
-
-    db.execute(
-        """
-        UPDATE users 
-        SET name = ?, apellidos = ?, telefono = ?, foto_perfil = ?, genero = ?,
-            dni = ?, fecha_nacimiento = ?, nacionalidad = ?, direccion = ?, codigo_postal = ?,
-            ciudad = ?, provincia = ?, nivel_estudios = ?, titulacion = ?, situacion_laboral = ?,
-            idiomas = ?, discapacidad = ?, porcentaje_discapacidad = ?
-        WHERE id = ?
-    """,
-        (
-            name, apellidos, telefono, foto_perfil, genero,
-            dni, fecha_nacimiento, nacionalidad, direccion, codigo_postal,
-            ciudad, provincia, nivel_estudios, titulacion, situacion_laboral,
-            idiomas, discapacidad, porcentaje_discapacidad,
-            user.id,
-        ),
+    get_repositorio().actualizar_usuario(
+        user.id,
+        name=name, apellidos=apellidos, telefono=telefono,
+        genero=genero, dni=dni, fecha_nacimiento=fecha_nacimiento,
+        nacionalidad=nacionalidad, direccion=direccion, codigo_postal=codigo_postal,
+        ciudad=ciudad, provincia=provincia, nivel_estudios=nivel_estudios,
+        titulacion=titulacion, situacion_laboral=situacion_laboral, idiomas=idiomas,
+        discapacidad=discapacidad, porcentaje_discapacidad=porcentaje_discapacidad,
     )
-    db.commit()
 
-    flash("Perfil actualizado correctamente", "success")
+    # La foto se procesa en segundo plano y cambia al terminar (app/fotos.py)
+    try:
+        foto_recibida = recibir_foto(user.id, request.files.get("foto_perfil"))
+    except FotoNoValida as e:
+        flash(f"Perfil actualizado, pero no se ha cambiado la foto: {e}", "warning")
+        return redirect(url_for("user.configuracion_cuenta"))
+
+    if foto_recibida:
+        flash("Perfil actualizado correctamente. La nueva foto aparecerá en unos segundos.", "success")
+    else:
+        flash("Perfil actualizado correctamente", "success")
     return redirect(url_for("user.configuracion_cuenta"))
 
 
@@ -338,26 +240,22 @@ def toggle_favorito_route(oposicion_id):
 @user_bp.route("/user_favoritas")
 @login_required
 def oposiciones_favoritas():
-    boe_db = get_boe_db()
-    users_db = get_users_db()
+    repositorio = get_repositorio()
     user = current_user
 
     # Filtros para la vista de favoritas
     desde = (datetime.today() - timedelta(days=30)).strftime("%Y%m%d")
-    departamentos = boe_db.execute(
-        "SELECT DISTINCT departamento FROM oposiciones WHERE fecha >= ? AND departamento IS NOT NULL ORDER BY departamento",
-        (desde,),
-    ).fetchall()
-    provincias = boe_db.execute(
-        "SELECT DISTINCT provincia FROM oposiciones WHERE provincia IS NOT NULL ORDER BY provincia"
-    ).fetchall()
-
-    fav_rows = users_db.execute(
-        "SELECT oposicion_id, fecha_favorito FROM favoritas WHERE user_id = ?",
-        (user.id,),
-    ).fetchall()
-
-    if not fav_rows:
+    departamentos, provincias = repositorio.facetas(Filtros(desde=desde))
+
+    # Keyset sobre (fecha_favorito, id), con JOIN a boe.oposiciones en la
+    # misma consulta
+    pagina = repositorio.listar_favoritas(
+        user.id,
+        page=int(request.args.get("page", 1)),
+        cursor=request.args.get("cursor"),
+    )
+
+    if not pagina.filas:
         return render_template(
             "user_oposiciones.html",
             oposiciones=[],
@@ -371,40 +269,18 @@ def oposiciones_favoritas():
             visitadas=[],
             favoritas=[],
             hoy=datetime.now().strftime("%Y-%m-%d"),
-            total=0,
-            page=1,
-            total_pages=1,
+            total=pagina.total,
+            page=pagina.page,
+            total_pages=pagina.total_pages,
             orden="desc",
             titulo_pagina=f"⭐ Oposiciones Favoritas de {user.name} {user.apellidos}",
         )
 
-    opos_ids = [row["oposicion_id"] for row in fav_rows]
-    placeholders = ",".join("?" * len(opos_ids))
-
-    oposiciones = boe_db.execute(
-        f"SELECT * FROM oposiciones WHERE id IN ({placeholders})",
-        opos_ids,
-    ).fetchall()
-
-    fecha_por_id = {row["oposicion_id"]: row["fecha_favorito"] for row in fav_rows}
-
-    oposiciones_ordenadas = sorted(
-        oposiciones,
-        key=lambda o: fecha_por_id.get(o["id"], ""),
-        reverse=True,
-    )
-
-    visitadas = [
-        row["oposicion_id"]
-        for row in users_db.execute(
-            "SELECT oposicion_id FROM visitas WHERE user_id = ?",
-            (user.id,),
-        ).fetchall()
-    ]
+    visitadas, _ = repositorio.marcas_usuario(user.id, [o["id"] for o in pagina.filas])
 
     return render_template(
         "user_oposiciones.html",
-        oposiciones=oposiciones_ordenadas,
+        oposiciones=pagina.filas,
         departamentos=departamentos,
         selected_departamentos=[],
         provincias=provincias,
@@ -413,11 +289,13 @@ def oposiciones_favoritas():
         fecha_desde="",
         fecha_hasta="",
         visitadas=visitadas,
-        favoritas=[o["id"] for o in oposiciones_ordenadas],
+        favoritas=[o["id"] for o in pagina.filas],
         hoy=datetime.now().strftime("%Y-%m-%d"),
-        total=len(oposiciones_ordenadas),
-        page=1,
-        total_pages=1,
+        total=pagina.total,
+        page=pagina.page,
+        total_pages=pagina.total_pages,
+        cursor_anterior=pagina.anterior,
+        cursor_siguiente=pagina.siguiente,
         orden="desc",
         titulo_pagina=f"⭐ Oposiciones Favoritas de {user.name} {user.apellidos}",
     )
@@ -426,38 +304,14 @@ def oposiciones_favoritas():
 @user_bp.route("/enviar_resumen_ahora", methods=["POST"])
 @login_required
 def enviar_resumen_ahora():
-    boe_db = get_boe_db()
-    users_db = get_users_db()
+    repositorio = get_repositorio()
     user = current_user
 
-    prefs = users_db.execute(
-        "SELECT * FROM suscripciones WHERE user_id = ?", (user.id,)
-    ).fetchone()
-
-    dept_filter_str = (
-        prefs["departamento_filtro"]
-        if prefs and prefs["departamento_filtro"]
-        else "Todos"
-    )
+    _, departamentos = repositorio.preferencias_alertas(user.id)
+    dept_filter_str = ", ".join(departamentos) or "Todos"
 
     fecha_busqueda = datetime.now().strftime("%Y%m%d")
-    
-    sql = "SELECT * FROM oposiciones WHERE fecha >= ?"
-    params = [fecha_busqueda]
-
-    # Lógica de limpieza y múltiples departamentos
-    if dept_filter_str and dept_filter_str != "Todos":
-        clean_str = dept_filter_str.replace("[", "").replace("]", "").replace("'", "").replace('"', "")
-        lista_depts = [d.strip() for d in clean_str.split(',') if d.strip()]
-        
-        if lista_depts:
-            placeholders = ','.join(['?'] * len(lista_depts))
-            sql += f" AND departamento IN ({placeholders})"
-            params.extend(lista_depts)
-
-    sql += " ORDER BY fecha DESC LIMIT 200"
-    rows = boe_db.execute(sql, params).fetchall()
-
+    rows = repositorio.oposiciones_suscripcion(user.id, desde=fecha_busqueda, limite=200)
     oposiciones = [dict(row) for row in rows]
 
     if oposiciones:
@@ -0,0 +1,133 @@
+# app/scraping/backfill.py
+
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date
+
+from flask import current_app
+
+from app.db import get_boe_db
+from app.queries import actualizar_estadisticas
+from app.scraping.boe_client import ESTADO_ERROR
+from app.scraping.boe_scraper import (
+    _en_exclusiva,
+    _guardar_resultado,
+    descargar_sumarios,
+    parsear_resultado,
+)
+from app.scraping.sync_log import dias_sin_completar
+
+
+def _formato_eta(segundos: float) -> str:
+    segundos = int(segundos)
+    return f"{segundos // 3600:02d}:{segundos % 3600 // 60:02d}:{segundos % 60:02d}"
+
+
+class Progreso:
+    """Lleva la cuenta de días/items procesados e imprime ritmo y ETA."""
+
+    def __init__(self, total_dias: int):
+        self.total_dias = total_dias
+        self.dias = 0
+        self.items = 0
+        self.nuevas = 0
+        self.errores = 0
+        self.inicio = time.monotonic()
+
+    def sumar(self, dias: int, items: int, nuevas: int, errores: int):
+        self.dias += dias
+        self.items += items
+        self.nuevas += nuevas
+        self.errores += errores
+
+    def informe(self) -> str:
+        transcurrido = max(time.monotonic() - self.inicio, 1e-9)
+        dias_s = self.dias / transcurrido
+        items_s = self.items / transcurrido
+        restantes = self.total_dias - self.dias
+        eta = _formato_eta(restantes / dias_s) if dias_s else "--:--:--"
+        porcentaje = 100 * self.dias / self.total_dias if self.total_dias else 100
+        return (
+            f"[backfill] {self.dias}/{self.total_dias} días ({porcentaje:.1f}%) · "
+            f"{dias_s:.2f} días/s · {items_s:.0f} items/s · "
+            f"{self.nuevas} nuevas · {self.errores} errores · ETA {eta}"
+        )
+
+
+def backfill(desde: date, hasta: date, max_workers: int | None = None,
+             procesos: int | None = None, lote_dias: int | None = None,
+             salida=print):
+    """
+    Ingesta histórica del BOE entre `desde` y `hasta` (ambos incluidos).
+
+    - Reanudable: cada día queda anotado en `sync_log` en la misma
+      transacción que sus oposiciones, y al volver a lanzarlo solo se
+      procesan los días que no constan o que fallaron.
+    - Las descargas van en paralelo (`max_workers` hilos), el parseo y la
+      extracción de provincia en un pool de `procesos` y un único escritor
+      confirma lotes de `lote_dias` días; las tres etapas van solapadas.
+    - Se queda con el lease de sincronización mientras dura, así que no
+      se pisa con el refresco automático ni con otros procesos
+      (si ya hay una sincronización en curso lanza `SyncEnCurso`).
+
+    Devuelve el objeto `Progreso` final.
+    """
+    config = current_app.config
+    if max_workers is None:
+        max_workers = config.get("BOE_SYNC_WORKERS", 4)
+    if lote_dias is None:
+        lote_dias = config.get("BOE_INSERT_LOTE_DIAS", 7)
+    lote_dias = max(1, lote_dias)
+
+    boe_db = get_boe_db()
+
+    def ejecutar(lease):
+        # Se calcula ya con el lease cogido: es el punto de reanudación
+        fechas = dias_sin_completar(boe_db, desde, hasta)
+        progreso = Progreso(len(fechas))
+        salida(
+            f"[backfill] {desde} → {hasta}: {len(fechas)} días pendientes "
+            f"({max_workers} descargas, {procesos or 'auto'} procesos, "
+            f"lotes de {lote_dias} días)"
+        )
+        if not fechas:
+            return progreso
+
+        lote = {"dias": 0, "items": 0, "nuevas": 0, "errores": 0}
+
+        def guardar(resultado, filas):
+            lote["nuevas"] += len(_guardar_resultado(resultado, boe_db, filas))
+            lote["items"] += len(filas)
+            lote["errores"] += resultado.estado == ESTADO_ERROR
+            lote["dias"] += 1
+            if lote["dias"] >= lote_dias:
+                confirmar()
+
+        def confirmar():
+            boe_db.commit()
+            lease.renovar()
+            progreso.sumar(**lote)
+            lote.update(dias=0, items=0, nuevas=0, errores=0)
+            salida(progreso.informe())
+
+        # Tubería: descargas (hilos) -> parseo (procesos) -> escritor único,
+        # con un número acotado de días en vuelo entre etapas
+        ventana = max(1, max_workers) * 4
+        with ProcessPoolExecutor(max_workers=procesos) as pool:
+            parseos = deque()
+            for resultado in descargar_sumarios(fechas, max_workers):
+                parseos.append(pool.submit(parsear_resultado, resultado))
+                if len(parseos) >= ventana:
+                    guardar(*parseos.popleft().result())
+            while parseos:
+                guardar(*parseos.popleft().result())
+        if lote["dias"]:
+            confirmar()
+        if actualizar_estadisticas(boe_db):
+            salida("[backfill] Estadísticas del planificador actualizadas (ANALYZE)")
+        return progreso
+
+    # Un backfill no espera al resultado de otra sincronización: si hay una
+    # en curso, lanza SyncEnCurso y se puede relanzar después
+    return _en_exclusiva(boe_db, ejecutar, esperar=False)
@@ -0,0 +1,247 @@
+# app/scraping/boe_client.py
+
+import random
+import threading
+import time
+from datetime import date
+from typing import NamedTuple
+
+import requests
+from requests.adapters import HTTPAdapter
+from flask import current_app
+
+from app.scraping.sumario_cache import SumarioCache
+
+BOE_SUMARIO_URL = "https://www.boe.es/datosabiertos/api/boe/sumario/{fecha}"
+
+BOE_HEADERS = {
+    "User-Agent": "Mozilla/5.0 (compatible; scraping_boe/1.0)",
+    "Accept": "application/xml, text/xml, */*; q=0.01",
+}
+
+# Respuestas ante las que conviene bajar el ritmo y reintentar
+ESTADOS_REINTENTABLES = {429, 500, 502, 503, 504}
+
+# Resultados posibles de una descarga
+ESTADO_OK = "ok"
+ESTADO_SIN_SUMARIO = "sin_sumario"
+ESTADO_ERROR = "error"
+
+
+def _accept_encoding():
+    # urllib3 solo descomprime brotli si está instalado brotli/brotlicffi
+    try:
+        import brotli  # noqa: F401
+    except ImportError:
+        try:
+            import brotlicffi  # noqa: F401
+        except ImportError:
+            return "gzip, deflate"
+    return "gzip, deflate, br"
+
+
+class ResultadoDescarga(NamedTuple):
+    fecha: date
+    estado: str
+    http_status: int | None = None
+    contenido: bytes | None = None
+    error: str | None = None
+    etag: str | None = None
+
+    @property
+    def ok(self):
+        return self.estado == ESTADO_OK
+
+
+class LimiteAdaptativo:
+    """
+    Semáforo con límite dinámico (AIMD) para las descargas concurrentes.
+
+    Ante un 429/5xx el límite se reduce a la mitad; cada descarga correcta
+    lo sube en uno hasta `maximo`.
+    """
+
+    def __init__(self, maximo: int, minimo: int = 1):
+        self.maximo = max(1, maximo)
+        self.minimo = max(1, min(minimo, self.maximo))
+        self.limite = self.maximo
+        self._en_curso = 0
+        self._cond = threading.Condition()
+
+    def adquirir(self):
+        with self._cond:
+            while self._en_curso >= self.limite:
+                self._cond.wait()
+            self._en_curso += 1
+
+    def liberar(self, ok: bool = True):
+        with self._cond:
+            self._en_curso -= 1
+            if ok:
+                self.limite = min(self.maximo, self.limite + 1)
+            else:
+                self.limite = max(self.minimo, self.limite // 2)
+            self._cond.notify_all()
+
+
+class BoeClient:
+    """
+    Cliente HTTP reutilizable para la API de datos abiertos del BOE.
+
+    Mantiene una `requests.Session` con conexiones keep-alive (como mucho
+    `max_conexiones` por host), pide respuestas comprimidas y reintenta
+    los errores transitorios con espera exponencial y jitter.
+    Distingue entre "el día no tiene sumario" y "la descarga ha fallado".
+
+    Con una `cache` guarda cada sumario descargado y, al volver a pedirlo,
+    envía If-None-Match/If-Modified-Since; un 304 se sirve desde la caché.
+    En modo `offline` solo se lee de la caché, sin tocar la red.
+    """
+
+    def __init__(self, url: str = BOE_SUMARIO_URL, timeout: float = 10,
+                 max_reintentos: int = 3, max_conexiones: int = 4,
+                 espera_base: float = 0.5, espera_max: float = 30.0,
+                 cache: SumarioCache | None = None, offline: bool = False):
+        self.url = url
+        self.cache = cache
+        self.offline = offline
+        self.timeout = timeout
+        self.max_reintentos = max_reintentos
+        self.espera_base = espera_base
+        self.espera_max = espera_max
+
+        self.session = requests.Session()
+        self.session.headers.update(BOE_HEADERS)
+        self.session.headers["Accept-Encoding"] = _accept_encoding()
+        adapter = HTTPAdapter(
+            pool_connections=1,
+            pool_maxsize=max_conexiones,
+            pool_block=True,
+            max_retries=0,
+        )
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+    def close(self):
+        self.session.close()
+        if self.cache is not None:
+            self.cache.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _espera(self, intento: int, retry_after: str = "") -> float:
+        if retry_after.isdigit():
+            return min(self.espera_max, float(retry_after))
+        tope = min(self.espera_max, self.espera_base * 2 ** intento)
+        return random.uniform(tope / 2, tope)
+
+    def descargar(self, fecha: date, limite: LimiteAdaptativo | None = None,
+                  offline: bool | None = None) -> ResultadoDescarga:
+        """
+        Descarga el XML del sumario de `fecha`.
+
+        Si se pasa `limite`, cada intento ocupa un hueco del limitador y los
+        429/5xx lo reducen antes de reintentar.
+        """
+        if offline is None:
+            offline = self.offline
+        en_cache = self.cache.obtener(fecha) if self.cache is not None else None
+
+        if offline:
+            if en_cache is None:
+                return ResultadoDescarga(
+                    fecha, ESTADO_ERROR, error="sin copia en caché (modo offline)"
+                )
+            return ResultadoDescarga(
+                fecha, ESTADO_OK, 200, en_cache.contenido, etag=en_cache.etag
+            )
+
+        cabeceras = {}
+        if en_cache is not None:
+            if en_cache.etag:
+                cabeceras["If-None-Match"] = en_cache.etag
+            if en_cache.last_modified:
+                cabeceras["If-Modified-Since"] = en_cache.last_modified
+
+        url = self.url.format(fecha=fecha.strftime("%Y%m%d"))
+        resultado = None
+
+        for intento in range(self.max_reintentos + 1):
+            if limite is not None:
+                limite.adquirir()
+            r = None
+            error = None
+            try:
+                r = self.session.get(url, headers=cabeceras, timeout=self.timeout)
+                # Leemos el cuerpo dentro del hueco del limitador
+                r.content
+            except requests.RequestException as e:
+                error = f"{type(e).__name__}: {e}"
+            finally:
+                transitorio = r is None or r.status_code in ESTADOS_REINTENTABLES
+                if limite is not None:
+                    limite.liberar(ok=not transitorio)
+
+            if not transitorio:
+                if r.status_code == 304 and en_cache is not None:
+                    self.cache.tocar(
+                        fecha, r.headers.get("ETag"), r.headers.get("Last-Modified")
+                    )
+                    return ResultadoDescarga(
+                        fecha, ESTADO_OK, 304, en_cache.contenido,
+                        etag=r.headers.get("ETag") or en_cache.etag,
+                    )
+                if r.status_code == 200 and r.content:
+                    if self.cache is not None:
+                        self.cache.guardar(
+                            fecha,
+                            r.content,
+                            r.headers.get("ETag"),
+                            r.headers.get("Last-Modified"),
+                        )
+                    return ResultadoDescarga(
+                        fecha, ESTADO_OK, 200, r.content, etag=r.headers.get("ETag")
+                    )
+                if r.status_code in (200, 404):
+                    return ResultadoDescarga(fecha, ESTADO_SIN_SUMARIO, r.status_code)
+                return ResultadoDescarga(
+                    fecha, ESTADO_ERROR, r.status_code, error=f"HTTP {r.status_code}"
+                )
+
+            resultado = ResultadoDescarga(
+                fecha,
+                ESTADO_ERROR,
+                r.status_code if r is not None else None,
+                error=error or f"HTTP {r.status_code}",
+            )
+            if intento < self.max_reintentos:
+                retry_after = r.headers.get("Retry-After", "") if r is not None else ""
+                time.sleep(self._espera(intento, retry_after))
+
+        return resultado
+
+
+def get_boe_client() -> BoeClient:
+    """Devuelve el cliente del BOE compartido por la app (uno por proceso)."""
+    client = current_app.extensions.get("boe_client")
+    if client is None:
+        config = current_app.config
+        cache = None
+        if config.get("BOE_CACHE_DIR"):
+            cache = SumarioCache(
+                config["BOE_CACHE_DIR"],
+                max_bytes=config.get("BOE_CACHE_MAX_MB", 200) * 1024 * 1024,
+            )
+        client = current_app.extensions["boe_client"] = BoeClient(
+            url=config.get("BOE_SUMARIO_URL", BOE_SUMARIO_URL),
+            timeout=config.get("BOE_HTTP_TIMEOUT", 10),
+            max_reintentos=config.get("BOE_HTTP_REINTENTOS", 3),
+            max_conexiones=config.get("BOE_SYNC_WORKERS", 4),
+            cache=cache,
+            offline=config.get("BOE_OFFLINE", False),
+        )
+    return client
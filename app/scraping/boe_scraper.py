@@ -1,164 +1,290 @@
 # app/scraping/boe.py
 
-import requests
-from datetime import datetime, date, timedelta
-from bs4 import BeautifulSoup
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, timedelta
 import sqlite3
 
+from lxml import etree
+
+from flask import current_app
+
 from app.db import get_boe_db
+from app.esquema import dia_desde_fecha, fecha_desde_dia, ids_dimension
+from app.facetas import podar_facetas, sumar_facetas
+from app.queries import actualizar_estadisticas
+from app.scraping.boe_client import (
+    ESTADO_ERROR,
+    ESTADO_OK,
+    BoeClient,
+    LimiteAdaptativo,
+    ResultadoDescarga,
+    get_boe_client,
+)
+from app.scraping.gazetteer import extraer_provincia
+from app.scraping.sumario_parser import SECCIONES_OPOSICIONES, iter_items
+from app.scraping.sync_lock import SyncEnCurso, en_exclusiva
+from app.scraping.sync_log import dias_pendientes, registrar_resultado
+
+
+def descargar_sumarios(fechas, max_workers: int = 1,
+                       client: BoeClient | None = None):
+    """
+    Descarga los sumarios de `fechas` con hasta `max_workers` peticiones
+    simultáneas y va devolviendo un `ResultadoDescarga` por día EN EL MISMO
+    ORDEN que `fechas`, para que quien escribe en la BBDD lo haga de forma
+    ordenada y desde un único hilo.
+    """
+    if client is None:
+        client = get_boe_client()
+    fechas = list(fechas)
+    if max_workers <= 1 or len(fechas) <= 1:
+        for fecha in fechas:
+            yield client.descargar(fecha)
+        return
+
+    # Como mucho `ventana` sumarios descargados a la espera de quien los
+    # consume, para que un rango largo (backfill) no se acumule en memoria
+    ventana = max_workers * 4
+    limite = LimiteAdaptativo(max_workers)
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        futuros = deque()
+        for fecha in fechas:
+            futuros.append(pool.submit(client.descargar, fecha, limite))
+            if len(futuros) >= ventana:
+                yield futuros.popleft().result()
+        while futuros:
+            yield futuros.popleft().result()
+
+
+def _log_resultado(resultado: ResultadoDescarga, nuevas):
+    if nuevas:
+        print(f"[BOE] {resultado.fecha} -> {len(nuevas)} oposiciones nuevas")
+    elif resultado.estado == ESTADO_ERROR:
+        print(f"[BOE] {resultado.fecha} -> error al descargar ({resultado.error})")
+    else:
+        print(f"[BOE] {resultado.fecha} -> sin oposiciones nuevas o sin sección 2B")
 
 
-def extraer_provincia(texto):
-    if not texto:
-        return None
-    import re as _re
+# RETURNING existe desde SQLite 3.35; antes usamos rowcount/lastrowid
+_SOPORTA_RETURNING = sqlite3.sqlite_version_info >= (3, 35, 0)
 
-    texto = _re.sub(r"\s+", " ", texto).strip()
+_INSERT_OPOSICION = """
+    INSERT OR IGNORE INTO oposiciones (
+        identificador, control, titulo, url_html, url_pdf,
+        departamento_id, dia, provincia_id
+    )
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+"""
 
-    provincias = [
-        "Álava", "Albacete", "Alicante", "Almería", "Asturias",
-        "Ávila", "Badajoz", "Barcelona", "Bizkaia", "Burgos",
-        "Cáceres", "Cádiz", "Cantabria", "Castellón", "Ciudad Real",
-        "Córdoba", "A Coruña", "Cuenca", "Gipuzkoa", "Girona",
-        "Granada", "Guadalajara", "Huelva", "Huesca", "Illes Balears",
-        "Jaén", "León", "Lleida", "Lugo", "Madrid",
-        "Málaga", "Murcia", "Navarra", "Ourense", "Palencia",
-        "Las Palmas", "Pontevedra", "La Rioja", "Salamanca",
-        "Santa Cruz de Tenerife", "Segovia", "Sevilla", "Soria",
-        "Tarragona", "Teruel", "Toledo", "Valencia", "Valladolid",
-        "Zamora", "Zaragoza", "Ceuta", "Melilla"
-    ]
-    for p in provincias:
-        if _re.search(rf"\b{_re.escape(p)}\b", texto, _re.IGNORECASE):
-            return p
+_CAMPOS_OPOSICION = ("identificador", "control", "titulo", "url_html", "url_pdf")
 
-    caps = _re.findall(r"\b[A-ZÑ]{4,15}\b", texto)
-    if caps:
-        return caps[0].capitalize()
-    return None
 
+def insertar_oposiciones(boe_db, filas, commit: bool = True):
+    """
+    Inserta `filas` (dicts con identificador, control, titulo, url_html,
+    url_pdf, departamento, fecha AAAAMMDD y provincia) en una sola
+    transacción. Departamento y provincia se guardan por id (ver
+    app/esquema.py). Las que ya existían (mismo `url_html`) se ignoran.
+    Devuelve solo las filas realmente insertadas, con su `id`.
+    """
+    departamentos = ids_dimension(boe_db, "departamentos", (f["departamento"] for f in filas))
+    provincias = ids_dimension(boe_db, "provincias", (f["provincia"] for f in filas))
+    nuevas = []
+    claves = []
+    sql = _INSERT_OPOSICION + (" RETURNING id" if _SOPORTA_RETURNING else "")
+    for fila in filas:
+        clave = {
+            "departamento_id": departamentos.get(fila["departamento"]),
+            "dia": dia_desde_fecha(fila["fecha"]),
+            "provincia_id": provincias.get(fila["provincia"]),
+        }
+        cur = boe_db.execute(
+            sql,
+            (*(fila[c] for c in _CAMPOS_OPOSICION),
+             clave["departamento_id"], clave["dia"], clave["provincia_id"]),
+        )
+        if _SOPORTA_RETURNING:
+            row = cur.fetchone()
+            nuevo_id = row[0] if row else None
+        else:
+            nuevo_id = cur.lastrowid if cur.rowcount == 1 else None
+        if nuevo_id is not None:
+            nuevas.append({"id": nuevo_id, **fila})
+            claves.append(clave)
+    # Contadores de los filtros, en la misma transacción
+    sumar_facetas(boe_db, claves)
+    if commit:
+        boe_db.commit()
+    return nuevas
+
+
+def parsear_sumario(fecha: date, contenido):
+    """
+    Convierte el XML de un sumario en la lista de filas (dicts) de la
+    sección 2B lista para `insertar_oposiciones`.
+    Lanza `etree.LxmlError` si el XML no se puede leer.
+    """
+    if not contenido:
+        return []
+    fecha_str = fecha.strftime("%Y%m%d")
+
+    filas = []
+    for item in iter_items(contenido, SECCIONES_OPOSICIONES):
+        filas.append(
+            {
+                "identificador": item.identificador,
+                "control": item.control,
+                "titulo": item.titulo,
+                "url_html": item.url_html,
+                "url_pdf": item.url_pdf,
+                "departamento": item.departamento,
+                "fecha": fecha_str,
+                "provincia": extraer_provincia(item.titulo)
+                or extraer_provincia(item.control),
+            }
+        )
+    return filas
 
-BOE_SUMARIO_URL = "https://www.boe.es/datosabiertos/api/boe/sumario/{fecha}"
 
+def guardar_sumario(fecha: date, contenido, boe_db=None, commit: bool = True):
+    """
+    Parsea el XML de un sumario y guarda en la BBDD las oposiciones de la
+    sección 2B en una única transacción.
+    Devuelve la lista de oposiciones nuevas insertadas.
 
-def scrape_boe_dia(fecha: date, boe_db=None):
+    Con `commit=False` deja la transacción abierta para agrupar varios días.
+    """
+    try:
+        filas = parsear_sumario(fecha, contenido)
+    except etree.LxmlError as e:
+        print(f"[BOE] {fecha} -> XML del sumario no válido: {e}")
+        return []
+    if not filas:
+        return []
+    if boe_db is None:
+        boe_db = get_boe_db()
+    return insertar_oposiciones(boe_db, filas, commit=commit)
+
+
+def scrape_boe_dia(fecha: date, boe_db=None, client: BoeClient | None = None,
+                   offline: bool | None = None):
     """
     Descarga y guarda en la BBDD las oposiciones del BOE (sección 2B)
     para un día concreto (objeto date).
+    Con `offline=True` solo usa la copia local del sumario (caché en disco),
+    útil para reprocesar o para pruebas sin red.
     Devuelve la lista de oposiciones nuevas insertadas.
     """
     if boe_db is None:
         boe_db = get_boe_db()
+    if client is None:
+        client = get_boe_client()
+    resultado = client.descargar(fecha, offline=offline)
+    nuevas = _guardar_resultado(resultado, boe_db)
+    boe_db.commit()
+    return nuevas
 
-    fecha_str = fecha.strftime("%Y%m%d")
 
-    headers = {
-        "User-Agent": "Mozilla/5.0 (compatible; scraping_boe/1.0)",
-        "Accept": "application/xml, text/xml, */*; q=0.01",
-    }
+def _workers_por_defecto(max_workers):
+    if max_workers is not None:
+        return max_workers
+    return current_app.config.get("BOE_SYNC_WORKERS", 1)
 
-    url = BOE_SUMARIO_URL.format(fecha=fecha_str)
-    try:
-        r = requests.get(url, headers=headers, timeout=10)
-        if r.status_code != 200 or not r.content:
-            return []
-    except requests.RequestException:
-        return []
 
-    try:
-        soup = BeautifulSoup(r.content, "lxml-xml")
-    except Exception:
-        soup = BeautifulSoup(r.content, "xml")
+def parsear_resultado(resultado: ResultadoDescarga):
+    """
+    Parsea el sumario de un `ResultadoDescarga`. Devuelve el resultado (sin
+    el XML, marcado como error si no se pudo leer) y sus filas.
+    Es una función pura, así que se puede ejecutar en otro proceso.
+    """
+    filas = []
+    if resultado.estado == ESTADO_OK:
+        try:
+            filas = parsear_sumario(resultado.fecha, resultado.contenido)
+        except etree.LxmlError as e:
+            resultado = resultado._replace(
+                estado=ESTADO_ERROR, error=f"XML no válido: {e}"
+            )
+    return resultado._replace(contenido=None), filas
 
-    seccion = soup.find("seccion", {"codigo": "2B"})
-    if not seccion:
-        return []
 
-    items = seccion.find_all("item")
-    newly_inserted = []
-
-    for item in items:
-        identificador_tag = item.find("identificador")
-        control_tag = item.find("control")
-        titulo_tag = item.find("titulo")
-        url_html_tag = item.find("url_html")
-        url_pdf_tag = item.find("url_pdf")
-
-        identificador = identificador_tag.text.strip() if identificador_tag else None
-        control = control_tag.text.strip() if control_tag else None
-        titulo = titulo_tag.text.strip() if titulo_tag else None
-        url_html = url_html_tag.text.strip() if url_html_tag else None
-        url_pdf = url_pdf_tag.text.strip() if url_pdf_tag else None
-
-        dept_parent = item.find_parent("departamento")
-        departamento = (
-            dept_parent.get("nombre")
-            if dept_parent and dept_parent.has_attr("nombre")
-            else None
-        )
+def _guardar_resultado(resultado: ResultadoDescarga, boe_db, filas=None):
+    """
+    Guarda las oposiciones de un día y anota el resultado en `sync_log`,
+    sin hacer commit. Devuelve las oposiciones nuevas.
+    Si ya vienen parseadas (`filas`), no se vuelve a leer el XML.
+    """
+    if filas is None:
+        resultado, filas = parsear_resultado(resultado)
+    nuevas = insertar_oposiciones(boe_db, filas, commit=False) if filas else []
+    registrar_resultado(boe_db, resultado, len(filas))
+    return nuevas
 
-        provincia = extraer_provincia(titulo) or extraer_provincia(control)
 
-        try:
-            boe_db.execute(
-                """
-                INSERT INTO oposiciones (
-                    identificador, control, titulo, url_html, url_pdf,
-                    departamento, fecha, provincia
-                )
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-                """,
-                (
-                    identificador,
-                    control,
-                    titulo,
-                    url_html,
-                    url_pdf,
-                    departamento,
-                    fecha_str,
-                    provincia,
-                ),
-            )
+def _guardar_resultados(resultados, boe_db, fallidos=None, lease=None):
+    """
+    Guarda en orden los `ResultadoDescarga` que va recibiendo, haciendo
+    commit cada BOE_INSERT_LOTE_DIAS días (y al final). Si hay `lease`,
+    se renueva en cada commit para que no caduque en sincronizaciones largas.
+    """
+    lote = max(1, current_app.config.get("BOE_INSERT_LOTE_DIAS", 1))
+    todas_nuevas = []
+    pendientes = 0
+
+    for resultado in resultados:
+        nuevas = _guardar_resultado(resultado, boe_db)
+        _log_resultado(resultado, nuevas)
+        todas_nuevas.extend(nuevas)
+        if fallidos is not None and resultado.estado == ESTADO_ERROR:
+            fallidos.append(resultado.fecha)
+
+        pendientes += 1
+        if pendientes >= lote:
             boe_db.commit()
+            pendientes = 0
+            if lease is not None:
+                lease.renovar()
 
-            newly_inserted.append(
-                {
-                    "identificador": identificador,
-                    "control": control,
-                    "titulo": titulo,
-                    "url_html": url_html,
-                    "url_pdf": url_pdf,
-                    "departamento": departamento,
-                    "fecha": fecha_str,
-                    "provincia": provincia,
-                }
-            )
-        except sqlite3.IntegrityError:
-            # url_html ya existía (UNIQUE), la saltamos
-            continue
+    boe_db.commit()
+    return todas_nuevas
 
-    return newly_inserted
 
+def _en_exclusiva(boe_db, funcion, esperar):
+    config = current_app.config
+    return en_exclusiva(
+        boe_db,
+        funcion,
+        esperar=esperar,
+        timeout=config.get("BOE_SYNC_ESPERA_MAX", 600),
+        duracion=config.get("BOE_SYNC_LEASE_SEGUNDOS", 600),
+    )
 
-def scrape_boe_ultimos_dias(dias: int = 30):
+
+def scrape_boe_ultimos_dias(dias: int = 30, max_workers: int | None = None,
+                            esperar: bool = True):
     """
     Hace scraping del BOE para los últimos `dias` días (incluyendo hoy).
-    Recorre fecha a fecha hacia atrás y llama a `scrape_boe_dia`.
+    Recorre fecha a fecha hacia atrás: las descargas se hacen en paralelo
+    (`max_workers`, por defecto BOE_SYNC_WORKERS) pero se guardan en orden.
     Devuelve una lista con todas las oposiciones nuevas insertadas.
+
+    Si otro proceso ya está sincronizando, espera a que termine y devuelve
+    su resultado (o lanza `SyncEnCurso` al momento con `esperar=False`).
     """
     boe_db = get_boe_db()
     hoy = date.today()
 
-    todas_nuevas = []
+    fechas = [hoy - timedelta(days=i) for i in range(dias)]
 
-    for i in range(dias):
-        fecha_obj = hoy - timedelta(days=i)
-        nuevas = scrape_boe_dia(fecha_obj, boe_db=boe_db)
-        if nuevas:
-            print(f"[BOE] {fecha_obj} -> {len(nuevas)} oposiciones nuevas")
-            todas_nuevas.extend(nuevas)
+    def sincronizar(lease):
+        return _guardar_resultados(
+            descargar_sumarios(fechas, _workers_por_defecto(max_workers)),
+            boe_db,
+            lease=lease,
+        )
 
-    return todas_nuevas
+    return _en_exclusiva(boe_db, sincronizar, esperar)
 
 
 def get_last_boe_date(boe_db=None) -> date | None:
@@ -169,59 +295,65 @@ def get_last_boe_date(boe_db=None) -> date | None:
     if boe_db is None:
         boe_db = get_boe_db()
 
-    row = boe_db.execute(
-        "SELECT MAX(fecha) AS max_fecha FROM oposiciones").fetchone()
-    max_fecha = row["max_fecha"] if row and row["max_fecha"] else None
-
-    if not max_fecha:
-        return None
-
-    try:
-        return datetime.strptime(max_fecha, "%Y%m%d").date()
-    except ValueError:
-        return None
+    row = boe_db.execute("SELECT MAX(dia) AS max_dia FROM oposiciones").fetchone()
+    return fecha_desde_dia(row["max_dia"]) if row else None
 
 
 def sync_boe_hasta_hoy(max_dias_inicial: int = 30,
-                       max_dias_guardados: int = 30):
+                       max_dias_guardados: int | None = None,
+                       max_workers: int | None = None,
+                       esperar: bool = True):
     """
     Sincroniza la BBDD del BOE SOLO con los días que falten hasta hoy.
 
-    - Si la tabla está vacía: baja hasta `max_dias_inicial` días hacia atrás.
-    - Si ya hay datos: empieza desde (última_fecha + 1) hasta hoy.
-   - Siempre, al final, borra registros con fecha anterior a (hoy - max_dias_guardados + 1).
+    - Mira los últimos `max_dias_inicial` días con edición del BOE (no hay
+      BOE en domingo) y descarga solo los que no constan en `sync_log`
+      o cuyo reintento ya toca (los fallidos esperan cada vez más).
+    - Siempre, al final, borra registros con fecha anterior a (hoy - max_dias_guardados + 1)
+      (por defecto BOE_DIAS_GUARDADOS; 0 = no borrar nada).
+
+    Los días se descargan con hasta `max_workers` peticiones simultáneas
+    (por defecto BOE_SYNC_WORKERS) y se guardan en orden de fecha.
+
+    Solo una sincronización corre a la vez (entre todos los procesos): si
+    ya hay otra en curso, espera y devuelve su resultado, o lanza
+    `SyncEnCurso` al momento con `esperar=False`.
 
     Devuelve una lista con TODAS las oposiciones nuevas insertadas.
     """
     boe_db = get_boe_db()
+    if max_dias_guardados is None:
+        max_dias_guardados = current_app.config.get("BOE_DIAS_GUARDADOS", 30)
+    return _en_exclusiva(
+        boe_db,
+        lambda lease: _sync_boe_hasta_hoy(
+            boe_db, lease, max_dias_inicial, max_dias_guardados, max_workers
+        ),
+        esperar,
+    )
+
+
+def _sync_boe_hasta_hoy(boe_db, lease, max_dias_inicial, max_dias_guardados,
+                        max_workers):
     hoy = date.today()
 
-    last_date = get_last_boe_date(boe_db=boe_db)
-
-    if last_date is None:
-        # BBDD vacía: empezamos max_dias_inicial días atrás
-        start_date = hoy - timedelta(days=max_dias_inicial - 1)
-    else:
-        # Ya tengo algo: empiezo desde el día siguiente al último guardado
-        start_date = last_date + timedelta(days=1)
-
-    # Si la última fecha ya es hoy o posterior, no hay nada que hacer
-    if start_date > hoy:
-        print("[BOE] BBDD ya está sincronizada hasta hoy")
-        return []
+    start_date = hoy - timedelta(days=max_dias_inicial - 1)
+    fechas = dias_pendientes(boe_db, start_date, hoy)
 
     todas_nuevas = []
-    current = start_date
-
-    while current <= hoy:
-        nuevas = scrape_boe_dia(current, boe_db=boe_db)
-        if nuevas:
-            print(f"[BOE] {current} -> {len(nuevas)} oposiciones nuevas")
-            todas_nuevas.extend(nuevas)
-        else:
-            print(
-                f"[BOE] {current} -> sin oposiciones nuevas o sin sección 2B")
-        current += timedelta(days=1)
+    if not fechas:
+        print("[BOE] BBDD ya está sincronizada hasta hoy")
+    else:
+        fallidos = []
+        todas_nuevas = _guardar_resultados(
+            descargar_sumarios(fechas, _workers_por_defecto(max_workers)),
+            boe_db,
+            fallidos,
+            lease=lease,
+        )
+        if fallidos:
+            print(f"[BOE] {len(fallidos)} días no se pudieron descargar: "
+                  + ", ".join(str(f) for f in fallidos))
 
     # --- Eliminar registros antiguos (mantener solo `max_dias_guardados` días) ---
     try:
@@ -229,13 +361,17 @@ def sync_boe_hasta_hoy(max_dias_inicial: int = 30,
             cutoff = hoy - timedelta(days=(max_dias_guardados - 1))
             cutoff_str = cutoff.strftime("%Y%m%d")
             cur = boe_db.execute(
-                "DELETE FROM oposiciones WHERE fecha < ?",
-                (cutoff_str,),
+                "DELETE FROM oposiciones WHERE dia < ?",
+                (dia_desde_fecha(cutoff),),
             )
+            boe_db.execute("DELETE FROM sync_log WHERE fecha < ?", (cutoff_str,))
+            podar_facetas(boe_db, dia_desde_fecha(cutoff))
             boe_db.commit()
             # sqlite3.Cursor.rowcount puede ser -1 depending on driver; show info
             print(f"[BOE] Eliminados registros anteriores a {cutoff_str}")
     except Exception as e:
         print(f"[BOE] Error al eliminar registros antiguos: {e}")
 
+    if actualizar_estadisticas(boe_db):
+        print("[BOE] Estadísticas del planificador actualizadas (ANALYZE)")
     return todas_nuevas
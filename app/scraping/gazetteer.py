@@ -0,0 +1,331 @@
+# app/scraping/gazetteer.py
+
+import csv
+import os
+import re
+import unicodedata
+from functools import lru_cache
+from typing import NamedTuple
+
+RUTA_MUNICIPIOS = os.path.join(os.path.dirname(__file__), "datos", "municipios.tsv")
+
+# Nombre canónico (el que se guarda en `oposiciones.provincia`) -> alias:
+# nombres cooficiales, históricos e islas
+PROVINCIAS = {
+    "Álava": ("Araba",),
+    "Albacete": (),
+    "Alicante": ("Alacant",),
+    "Almería": (),
+    "Asturias": ("Principado de Asturias",),
+    "Ávila": (),
+    "Badajoz": (),
+    "Barcelona": (),
+    "Bizkaia": ("Vizcaya",),
+    "Burgos": (),
+    "Cáceres": (),
+    "Cádiz": (),
+    "Cantabria": (),
+    "Castellón": ("Castelló", "Castellón de la Plana", "Castelló de la Plana"),
+    "Ciudad Real": (),
+    "Córdoba": (),
+    "A Coruña": ("La Coruña", "Coruña"),
+    "Cuenca": (),
+    "Gipuzkoa": ("Guipúzcoa",),
+    "Girona": ("Gerona",),
+    "Granada": (),
+    "Guadalajara": (),
+    "Huelva": (),
+    "Huesca": (),
+    "Illes Balears": (
+        "Islas Baleares", "Baleares", "Balears", "Mallorca", "Palma de Mallorca",
+        "Menorca", "Ibiza", "Eivissa", "Formentera",
+    ),
+    "Jaén": (),
+    "León": (),
+    "Lleida": ("Lérida",),
+    "Lugo": (),
+    "Madrid": (),
+    "Málaga": (),
+    "Murcia": (),
+    "Navarra": ("Nafarroa",),
+    "Ourense": ("Orense",),
+    "Palencia": (),
+    "Las Palmas": ("Gran Canaria", "Lanzarote", "Fuerteventura"),
+    "Pontevedra": (),
+    "La Rioja": (),
+    "Salamanca": (),
+    "Santa Cruz de Tenerife": ("Tenerife", "La Palma", "La Gomera", "El Hierro"),
+    "Segovia": (),
+    "Sevilla": (),
+    "Soria": (),
+    "Tarragona": (),
+    "Teruel": (),
+    "Toledo": (),
+    "Valencia": ("València",),
+    "Valladolid": (),
+    "Zamora": (),
+    "Zaragoza": (),
+    "Ceuta": (),
+    "Melilla": (),
+}
+
+# Código de provincia del INE (CPRO) -> nombre canónico
+PROVINCIAS_INE = {
+    "01": "Álava", "02": "Albacete", "03": "Alicante", "04": "Almería",
+    "05": "Ávila", "06": "Badajoz", "07": "Illes Balears", "08": "Barcelona",
+    "09": "Burgos", "10": "Cáceres", "11": "Cádiz", "12": "Castellón",
+    "13": "Ciudad Real", "14": "Córdoba", "15": "A Coruña", "16": "Cuenca",
+    "17": "Girona", "18": "Granada", "19": "Guadalajara", "20": "Gipuzkoa",
+    "21": "Huelva", "22": "Huesca", "23": "Jaén", "24": "León",
+    "25": "Lleida", "26": "La Rioja", "27": "Lugo", "28": "Madrid",
+    "29": "Málaga", "30": "Murcia", "31": "Navarra", "32": "Ourense",
+    "33": "Asturias", "34": "Palencia", "35": "Las Palmas", "36": "Pontevedra",
+    "37": "Salamanca", "38": "Santa Cruz de Tenerife", "39": "Cantabria",
+    "40": "Segovia", "41": "Sevilla", "42": "Soria", "43": "Tarragona",
+    "44": "Teruel", "45": "Toledo", "46": "Valencia", "47": "Valladolid",
+    "48": "Bizkaia", "49": "Zamora", "50": "Zaragoza", "51": "Ceuta",
+    "52": "Melilla",
+}
+
+# Expresiones que contienen el nombre de una provincia pero no la indican
+EXCLUSIONES = (
+    "Castilla y León",
+    "Castilla-La Mancha",
+    "Ponce de León",
+    "organismo de cuenca",
+    "cuenca hidrográfica",
+    "cuencas hidrográficas",
+)
+
+# "Ayuntamiento de X", "Ajuntament d'X", "Concello de X", "Universidad de X"...
+_CONTEXTO_MUNICIPIO = (
+    r"(?:ayuntamiento|ajuntament|concello|universidad|universitat|universidade)"
+    r"\s+(?:del?\s+|d'\s*|d[oa]s?\s+)"
+)
+
+# Artículos pospuestos del INE: "Coruña, A", "Rozas de Madrid, Las"
+_ARTICULO_INE = re.compile(r"^(.*),\s*(el|la|los|las|l'|lo|o|a|os|as|es|sa|s')$", re.I)
+
+
+def _tabla_plegado():
+    # Cada carácter se pliega a UN carácter (minúscula y sin tilde), así las
+    # posiciones del texto plegado coinciden con las del original
+    tabla = {}
+    for codigo in range(0x250):
+        c = chr(codigo)
+        base = "".join(
+            x for x in unicodedata.normalize("NFKD", c) if not unicodedata.combining(x)
+        ).lower()
+        if len(base) == 1 and base != c:
+            tabla[codigo] = base
+    for c in "’´`":
+        tabla[ord(c)] = "'"
+    return tabla
+
+
+_PLEGADO = _tabla_plegado()
+
+
+def plegar(texto: str) -> str:
+    """Minúsculas y sin tildes ni diéresis (ñ -> n), conservando la longitud."""
+    return texto.translate(_PLEGADO)
+
+
+def _clave(nombre: str) -> str:
+    """Forma normalizada de un nombre: plegado y con espacios/guiones unificados."""
+    clave = re.sub(r"[\s\-]+", " ", plegar(nombre)).strip()
+    return re.sub(r"'\s*", "'", clave)
+
+
+def variantes_ine(nombre: str):
+    """
+    Formas con las que puede aparecer un municipio del INE en un texto:
+    "Alicante/Alacant" -> ambas; "Rozas de Madrid, Las" -> "Las Rozas de Madrid"
+    y "Rozas de Madrid" (para "Ayuntamiento de las/del...").
+    """
+    variantes = []
+    for parte in nombre.split("/"):
+        parte = parte.strip()
+        if not parte:
+            continue
+        m = _ARTICULO_INE.match(parte)
+        if m:
+            base, articulo = m.group(1).strip(), m.group(2)
+            separador = "" if articulo.endswith("'") else " "
+            variantes.append(f"{articulo}{separador}{base}")
+            variantes.append(base)
+        else:
+            variantes.append(parte)
+    return variantes
+
+
+def cargar_municipios(ruta: str = RUTA_MUNICIPIOS):
+    """Lee el TSV de municipios (CPRO, NOMBRE) -> [(nombre, provincia)]."""
+    municipios = []
+    if not os.path.exists(ruta):
+        return municipios
+    with open(ruta, encoding="utf-8") as f:
+        for linea in f:
+            if not linea.strip() or linea.startswith("#"):
+                continue
+            cpro, nombre = linea.rstrip("\n").split("\t", 1)
+            provincia = PROVINCIAS_INE.get(cpro.zfill(2))
+            if provincia:
+                municipios.append((nombre, provincia))
+    return municipios
+
+
+def convertir_ine(lineas):
+    """
+    Convierte el diccionario de municipios del INE (exportado a CSV, con
+    columnas CPRO y NOMBRE) en filas (CPRO, NOMBRE) para `municipios.tsv`.
+    Ignora las líneas de título que el INE pone antes de la cabecera.
+    """
+    lineas = list(lineas)
+    inicio = next(
+        (i for i, linea in enumerate(lineas) if "CPRO" in linea.upper()), None
+    )
+    if inicio is None:
+        raise ValueError("No se encuentra la cabecera CPRO/NOMBRE del INE")
+    dialecto = csv.Sniffer().sniff(lineas[inicio], delimiters=";,\t")
+    filas = []
+    for fila in csv.DictReader(lineas[inicio:], dialect=dialecto):
+        fila = {(k or "").strip().upper(): (v or "").strip() for k, v in fila.items()}
+        if fila.get("CPRO") and fila.get("NOMBRE"):
+            filas.append((fila["CPRO"].zfill(2), fila["NOMBRE"]))
+    return filas
+
+
+class _Entrada(NamedTuple):
+    tipo: str  # "provincia", "municipio" o "excluir"
+    provincias: frozenset
+
+
+class _Coincidencia(NamedTuple):
+    entrada: _Entrada
+    en_contexto: bool
+    inicio: int
+    fin: int
+
+
+def _patron_trie(claves):
+    """
+    Una sola regex con todas las `claves` factorizadas en un trie
+    (p. ej. "leon|lerida|lleida" -> "l(?:e(?:on|rida)|leida)"), de modo que
+    el coste por posición no crece con el número de nombres. Ante varios
+    nombres que empiezan igual gana el más largo.
+    """
+    trie = {}
+    for clave in claves:
+        nodo = trie
+        for c in clave:
+            nodo = nodo.setdefault(c, {})
+        nodo[""] = True
+
+    def emitir(nodo):
+        final = "" in nodo
+        ramas = []
+        for c in sorted(k for k in nodo if k):
+            if c == " ":
+                atomo = r"[\s\-]+"
+            elif c == "'":
+                atomo = r"'\s*"
+            else:
+                atomo = re.escape(c)
+            ramas.append(atomo + emitir(nodo[c]))
+        if not ramas:
+            return ""
+        cuerpo = ramas[0] if len(ramas) == 1 else "(?:" + "|".join(ramas) + ")"
+        if final:
+            return "(?:" + cuerpo + ")?"
+        return cuerpo
+
+    return emitir(trie)
+
+
+class Gazetteer:
+    """
+    Reconoce provincias y municipios españoles en un texto en una sola pasada.
+
+    Se compila una única expresión regular (un trie de todos los nombres ya
+    plegados) que se aplica sobre el texto plegado, así que no distingue
+    mayúsculas ni tildes. Resuelve:
+    - provincias por su nombre oficial o cooficial (Bizkaia/Vizcaya,
+      A Coruña/La Coruña...) y por sus islas (Tenerife, Mallorca...);
+    - "Ayuntamiento de X" (o "Universidad de X") a la provincia del
+      municipio X, usando la provincia entre paréntesis si la hay
+      ("Ayuntamiento de Mieres (Asturias)");
+    - como último recurso, municipios de varias palabras fuera de ese contexto.
+    """
+
+    def __init__(self, municipios=()):
+        entradas = {}
+
+        for canonica, alias in PROVINCIAS.items():
+            for nombre in (canonica, *alias):
+                entradas[_clave(nombre)] = _Entrada("provincia", frozenset([canonica]))
+
+        municipios_por_clave = {}
+        for nombre, provincia in municipios:
+            for variante in variantes_ine(nombre):
+                municipios_por_clave.setdefault(_clave(variante), set()).add(provincia)
+        for clave, provincias in municipios_por_clave.items():
+            if clave not in entradas:
+                entradas[clave] = _Entrada("municipio", frozenset(provincias))
+
+        for nombre in EXCLUSIONES:
+            entradas[_clave(nombre)] = _Entrada("excluir", frozenset())
+
+        self._entradas = entradas
+        self._regex = re.compile(
+            rf"(?<!\w)(?P<contexto>{_CONTEXTO_MUNICIPIO})?"
+            rf"(?P<nombre>{_patron_trie(entradas)})(?!\w)"
+        )
+
+    def _coincidencias(self, plegado: str):
+        for m in self._regex.finditer(plegado):
+            entrada = self._entradas.get(_clave(m.group("nombre")))
+            if entrada is not None and entrada.tipo != "excluir":
+                yield _Coincidencia(
+                    entrada, m.group("contexto") is not None, m.start("nombre"), m.end()
+                )
+
+    def provincia(self, texto: str | None) -> str | None:
+        if not texto:
+            return None
+        plegado = plegar(texto)
+        encontradas = list(self._coincidencias(plegado))
+
+        # 1) "Ayuntamiento de X" (con la provincia entre paréntesis si viene)
+        for i, c in enumerate(encontradas):
+            if not c.en_contexto:
+                continue
+            siguiente = encontradas[i + 1] if i + 1 < len(encontradas) else None
+            if (siguiente is not None and siguiente.entrada.tipo == "provincia"
+                    and plegado[c.fin:siguiente.inicio].strip() == "("):
+                return next(iter(siguiente.entrada.provincias))
+            if len(c.entrada.provincias) == 1:
+                return next(iter(c.entrada.provincias))
+
+        # 2) Primera provincia que se nombra
+        for c in encontradas:
+            if c.entrada.tipo == "provincia":
+                return next(iter(c.entrada.provincias))
+
+        # 3) Municipio inequívoco de varias palabras ("Alcalá de Henares")
+        for c in encontradas:
+            if (len(c.entrada.provincias) == 1
+                    and " " in _clave(plegado[c.inicio:c.fin])):
+                return next(iter(c.entrada.provincias))
+        return None
+
+
+@lru_cache(maxsize=1)
+def get_gazetteer() -> Gazetteer:
+    """Gazetteer compartido (se construye una vez por proceso)."""
+    return Gazetteer(cargar_municipios())
+
+
+def extraer_provincia(texto: str | None) -> str | None:
+    """Provincia que menciona `texto` (título o control del BOE), o None."""
+    return get_gazetteer().provincia(texto)
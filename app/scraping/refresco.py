@@ -0,0 +1,84 @@
+# app/scraping/refresco.py
+
+import threading
+import time
+
+from flask import current_app
+
+from app.db import get_boe_db
+from app.scraping.boe_scraper import SyncEnCurso, sync_boe_hasta_hoy
+
+
+def reclamar_turno(boe_db, clave: str, intervalo: float,
+                   ahora: float | None = None) -> bool:
+    """
+    Reserva de forma atómica la ejecución de la tarea `clave` si la última
+    fue hace al menos `intervalo` segundos. Como el turno se guarda en
+    `boe_meta`, solo un proceso (worker, cron...) lo consigue por intervalo.
+    """
+    ahora = time.time() if ahora is None else ahora
+    cur = boe_db.execute(
+        """
+        INSERT INTO boe_meta (clave, valor) VALUES (?, ?)
+        ON CONFLICT(clave) DO UPDATE SET valor = excluded.valor
+        WHERE CAST(boe_meta.valor AS REAL) <= ?
+        """,
+        (clave, str(ahora), ahora - intervalo),
+    )
+    boe_db.commit()
+    return cur.rowcount == 1
+
+
+class RefrescoBoe:
+    """
+    Refresca la BBDD del BOE en un hilo en segundo plano, de modo que las
+    páginas se sirven siempre al momento con lo que ya hay guardado
+    (stale-while-revalidate).
+
+    `solicitar()` no bloquea: como mucho lanza un hilo por intervalo en este
+    proceso, y el hilo solo sincroniza si gana el turno global en la BBDD.
+    """
+
+    CLAVE = "ultimo_refresco"
+
+    def __init__(self, app):
+        self.app = app
+        self.intervalo = app.config.get("BOE_REFRESCO_INTERVALO", 900)
+        self._lock = threading.Lock()
+        self._hilo = None
+        self._ultima_solicitud = None
+
+    def solicitar(self) -> bool:
+        if not self.intervalo or self.intervalo <= 0:
+            return False
+        ahora = time.monotonic()
+        with self._lock:
+            if self._hilo is not None and self._hilo.is_alive():
+                return False
+            if (self._ultima_solicitud is not None
+                    and ahora - self._ultima_solicitud < self.intervalo):
+                return False
+            self._ultima_solicitud = ahora
+            self._hilo = threading.Thread(
+                target=self._ejecutar, name="boe-refresco", daemon=True
+            )
+            self._hilo.start()
+        return True
+
+    def _ejecutar(self):
+        with self.app.app_context():
+            try:
+                if not reclamar_turno(get_boe_db(), self.CLAVE, self.intervalo):
+                    return
+                sync_boe_hasta_hoy(max_dias_inicial=30, esperar=False)
+            except SyncEnCurso:
+                # Otro proceso (cron, admin...) ya está sincronizando
+                pass
+            except Exception as e:
+                print(f"[BOE] Error en el refresco en segundo plano: {e}")
+
+
+def solicitar_refresco() -> bool:
+    """Pide (sin esperar) un refresco del BOE a la instancia de la app actual."""
+    refresco = current_app.extensions.get("boe_refresco")
+    return refresco.solicitar() if refresco is not None else False
@@ -0,0 +1,170 @@
+# app/scraping/sumario_cache.py
+
+import gzip
+import hashlib
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from datetime import date
+from typing import NamedTuple
+
+
+class EntradaCache(NamedTuple):
+    contenido: bytes
+    etag: str | None
+    last_modified: str | None
+
+
+class SumarioCache:
+    """
+    Caché en disco de las respuestas crudas del sumario del BOE.
+
+    Cada XML se guarda comprimido con gzip en `objetos/<ab>/<sha256>.xml.gz`
+    (direccionado por contenido) y un índice SQLite relaciona cada fecha con
+    su objeto, su ETag/Last-Modified y el último uso. Si se supera
+    `max_bytes` se expulsan las fechas usadas hace más tiempo (LRU).
+    """
+
+    def __init__(self, directorio: str, max_bytes: int = 200 * 1024 * 1024):
+        self.directorio = directorio
+        self.max_bytes = max_bytes
+        os.makedirs(os.path.join(directorio, "objetos"), exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(
+            os.path.join(directorio, "indice.db"),
+            timeout=30,
+            check_same_thread=False,
+        )
+        self._db.execute(
+            """
+            CREATE TABLE IF NOT EXISTS entradas (
+                fecha TEXT PRIMARY KEY,
+                sha256 TEXT NOT NULL,
+                tamano INTEGER NOT NULL,
+                etag TEXT,
+                last_modified TEXT,
+                usado_en REAL NOT NULL
+            )
+        """
+        )
+        self._db.execute(
+            "CREATE INDEX IF NOT EXISTS idx_entradas_usado ON entradas(usado_en)"
+        )
+        self._db.commit()
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+    def _ruta(self, sha256: str) -> str:
+        return os.path.join(self.directorio, "objetos", sha256[:2], f"{sha256}.xml.gz")
+
+    def obtener(self, fecha: date) -> EntradaCache | None:
+        clave = fecha.strftime("%Y%m%d")
+        with self._lock:
+            row = self._db.execute(
+                "SELECT sha256, etag, last_modified FROM entradas WHERE fecha = ?",
+                (clave,),
+            ).fetchone()
+            if row is None:
+                return None
+            try:
+                with gzip.open(self._ruta(row[0]), "rb") as f:
+                    contenido = f.read()
+            except (OSError, EOFError):
+                # Objeto borrado o corrupto: olvidamos la entrada
+                self._db.execute("DELETE FROM entradas WHERE fecha = ?", (clave,))
+                self._db.commit()
+                return None
+            self._db.execute(
+                "UPDATE entradas SET usado_en = ? WHERE fecha = ?",
+                (time.time(), clave),
+            )
+            self._db.commit()
+        return EntradaCache(contenido, row[1], row[2])
+
+    def guardar(self, fecha: date, contenido: bytes,
+                etag: str | None = None, last_modified: str | None = None):
+        sha256 = hashlib.sha256(contenido).hexdigest()
+        ruta = self._ruta(sha256)
+        if not os.path.exists(ruta):
+            os.makedirs(os.path.dirname(ruta), exist_ok=True)
+            fd, tmp = tempfile.mkstemp(dir=os.path.dirname(ruta), suffix=".tmp")
+            with os.fdopen(fd, "wb") as f:
+                f.write(gzip.compress(contenido, compresslevel=6))
+            os.replace(tmp, ruta)
+        tamano = os.path.getsize(ruta)
+
+        with self._lock:
+            anterior = self._db.execute(
+                "SELECT sha256 FROM entradas WHERE fecha = ?",
+                (fecha.strftime("%Y%m%d"),),
+            ).fetchone()
+            self._db.execute(
+                """
+                INSERT OR REPLACE INTO entradas
+                    (fecha, sha256, tamano, etag, last_modified, usado_en)
+                VALUES (?, ?, ?, ?, ?, ?)
+                """,
+                (fecha.strftime("%Y%m%d"), sha256, tamano, etag,
+                 last_modified, time.time()),
+            )
+            if anterior and anterior[0] != sha256:
+                self._borrar_objeto_si_huerfano(anterior[0])
+            self._db.commit()
+            self._expulsar()
+
+    def tocar(self, fecha: date, etag: str | None = None,
+              last_modified: str | None = None):
+        """Marca como usada una entrada revalidada (304) y actualiza sus validadores."""
+        with self._lock:
+            self._db.execute(
+                """
+                UPDATE entradas
+                SET usado_en = ?,
+                    etag = COALESCE(?, etag),
+                    last_modified = COALESCE(?, last_modified)
+                WHERE fecha = ?
+                """,
+                (time.time(), etag, last_modified, fecha.strftime("%Y%m%d")),
+            )
+            self._db.commit()
+
+    def tamano_total(self) -> int:
+        with self._lock:
+            return self._tamano_total()
+
+    def _tamano_total(self) -> int:
+        row = self._db.execute(
+            "SELECT COALESCE(SUM(tamano), 0) FROM "
+            "(SELECT DISTINCT sha256, tamano FROM entradas)"
+        ).fetchone()
+        return row[0]
+
+    def _borrar_objeto_si_huerfano(self, sha256: str):
+        en_uso = self._db.execute(
+            "SELECT 1 FROM entradas WHERE sha256 = ? LIMIT 1", (sha256,)
+        ).fetchone()
+        if not en_uso:
+            try:
+                os.remove(self._ruta(sha256))
+            except FileNotFoundError:
+                pass
+
+    def _expulsar(self):
+        if not self.max_bytes:
+            return
+        total = self._tamano_total()
+        while total > self.max_bytes:
+            row = self._db.execute(
+                "SELECT fecha, sha256 FROM entradas ORDER BY usado_en LIMIT 1"
+            ).fetchone()
+            if row is None:
+                break
+            self._db.execute("DELETE FROM entradas WHERE fecha = ?", (row[0],))
+            self._borrar_objeto_si_huerfano(row[1])
+            total = self._tamano_total()
+        self._db.commit()
@@ -0,0 +1,85 @@
+# app/scraping/sumario_parser.py
+
+import io
+from typing import NamedTuple
+
+from lxml import etree
+
+# Secciones que nos interesan por defecto: II.B Oposiciones y concursos
+SECCIONES_OPOSICIONES = ("2B",)
+
+
+class ItemSumario(NamedTuple):
+    seccion: str | None
+    departamento: str | None
+    identificador: str | None
+    control: str | None
+    titulo: str | None
+    url_html: str | None
+    url_pdf: str | None
+
+
+def _texto(elem):
+    if elem is None:
+        return None
+    return (elem.text or "").strip()
+
+
+def iter_items(fuente, secciones=SECCIONES_OPOSICIONES):
+    """
+    Recorre en streaming el XML de un sumario del BOE y va devolviendo un
+    `ItemSumario` por cada <item> de las `secciones` pedidas
+    (None = todas).
+
+    `fuente` puede ser el contenido (bytes), un fichero abierto o una ruta.
+    Los elementos ya procesados se liberan según se avanza, así que la
+    memoria no crece con el tamaño del sumario.
+    """
+    if isinstance(fuente, (bytes, bytearray)):
+        fuente = io.BytesIO(fuente)
+    secciones = set(secciones) if secciones is not None else None
+
+    seccion = None
+    departamento = None
+    dentro = False
+
+    contexto = etree.iterparse(
+        fuente,
+        events=("start", "end"),
+        tag=("seccion", "departamento", "item"),
+        recover=True,
+        resolve_entities=False,
+    )
+    for evento, elem in contexto:
+        tag = elem.tag
+        if evento == "start":
+            if tag == "seccion":
+                seccion = elem.get("codigo")
+                dentro = secciones is None or seccion in secciones
+            elif tag == "departamento":
+                departamento = elem.get("nombre")
+            continue
+
+        if tag == "item":
+            if dentro:
+                yield ItemSumario(
+                    seccion,
+                    departamento,
+                    _texto(elem.find("identificador")),
+                    _texto(elem.find("control")),
+                    _texto(elem.find("titulo")),
+                    _texto(elem.find("url_html")),
+                    _texto(elem.find("url_pdf")),
+                )
+        elif tag == "departamento":
+            departamento = None
+        elif tag == "seccion":
+            seccion = None
+            dentro = False
+
+        # Liberar lo ya procesado (y los hermanos anteriores)
+        elem.clear(keep_tail=False)
+        padre = elem.getparent()
+        if padre is not None:
+            while elem.getprevious() is not None:
+                del padre[0]
@@ -0,0 +1,157 @@
+# app/scraping/sync_lock.py
+
+import os
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+
+
+class SyncEnCurso(Exception):
+    """Otro proceso está sincronizando el BOE en este momento."""
+
+
+class LeaseSync:
+    """
+    Cerrojo entre procesos basado en una fila de `sync_lease` con caducidad.
+
+    Solo un proceso puede tener el lease de `nombre` a la vez; si muere sin
+    liberarlo, caduca a los `duracion` segundos y otro puede quedárselo.
+    Al liberarlo se anota el rango de ids insertados, para que quien estaba
+    esperando pueda devolver el resultado de esa sincronización.
+    """
+
+    def __init__(self, boe_db, nombre: str = "sync_boe", duracion: float = 600):
+        self.boe_db = boe_db
+        self.nombre = nombre
+        self.duracion = duracion
+        self.propietario = (
+            f"{socket.gethostname()}:{os.getpid()}:"
+            f"{threading.get_ident()}:{uuid.uuid4().hex[:8]}"
+        )
+
+    def adquirir(self) -> bool:
+        ahora = time.time()
+        # Comprobación de solo lectura: si está cogido no intentamos escribir
+        # (evita esperar al cerrojo de escritura de quien está sincronizando)
+        row = self.boe_db.execute(
+            "SELECT propietario, expira_en FROM sync_lease WHERE nombre = ?",
+            (self.nombre,),
+        ).fetchone()
+        if row is not None and row[0] is not None and row[1] >= ahora:
+            return False
+        try:
+            cur = self.boe_db.execute(
+            """
+                INSERT INTO sync_lease (nombre, propietario, expira_en)
+                VALUES (?, ?, ?)
+                ON CONFLICT(nombre) DO UPDATE SET
+                    propietario = excluded.propietario,
+                    expira_en = excluded.expira_en
+                WHERE sync_lease.propietario IS NULL OR sync_lease.expira_en < ?
+                """,
+                (self.nombre, self.propietario, ahora + self.duracion, ahora),
+            )
+            self.boe_db.commit()
+        except sqlite3.OperationalError:
+            # BBDD ocupada por otro escritor: lo tratamos como "cogido"
+            self.boe_db.rollback()
+            return False
+        return cur.rowcount == 1
+
+    def renovar(self):
+        self.boe_db.execute(
+            "UPDATE sync_lease SET expira_en = ? WHERE nombre = ? AND propietario = ?",
+            (time.time() + self.duracion, self.nombre, self.propietario),
+        )
+        self.boe_db.commit()
+
+    def liberar(self, id_desde: int | None = None, id_hasta: int | None = None):
+        self.boe_db.execute(
+            """
+            UPDATE sync_lease
+            SET propietario = NULL, expira_en = NULL,
+                id_desde = ?, id_hasta = ?, terminado_en = ?
+            WHERE nombre = ? AND propietario = ?
+            """,
+            (id_desde, id_hasta, time.time(), self.nombre, self.propietario),
+        )
+        self.boe_db.commit()
+
+    def resultado_desde(self, instante: float):
+        """
+        Si alguien terminó una sincronización después de `instante`,
+        devuelve su rango de ids (id_desde, id_hasta); si no, None.
+        """
+        row = self.boe_db.execute(
+            "SELECT id_desde, id_hasta, terminado_en FROM sync_lease WHERE nombre = ?",
+            (self.nombre,),
+        ).fetchone()
+        if row is None or row[2] is None or row[2] < instante:
+            return None
+        return row[0], row[1]
+
+
+def en_exclusiva(boe_db, funcion, esperar: bool = True, timeout: float = 600,
+                 duracion: float = 600, intervalo: float = 0.5):
+    """
+    Ejecuta `funcion(lease)` como única sincronización del BOE en curso.
+
+    Si otro proceso ya está sincronizando:
+    - con `esperar=False` lanza `SyncEnCurso` al momento;
+    - con `esperar=True` espera a que termine y devuelve las oposiciones
+      que insertó esa otra sincronización (o lanza `SyncEnCurso` si pasa
+      `timeout`). Si el otro proceso muere, su lease caduca y la
+      sincronización se hace aquí.
+    """
+    lease = LeaseSync(boe_db, duracion=duracion)
+    inicio = time.time()
+
+    if not lease.adquirir():
+        if not esperar:
+            raise SyncEnCurso("Ya hay una sincronización del BOE en curso")
+        while True:
+            time.sleep(intervalo)
+            rango = lease.resultado_desde(inicio)
+            if rango is not None:
+                return _oposiciones_en_rango(boe_db, *rango)
+            if lease.adquirir():
+                # Puede que la otra terminara justo antes: usamos su resultado
+                rango = lease.resultado_desde(inicio)
+                if rango is not None:
+                    lease.liberar(*rango)
+                    return _oposiciones_en_rango(boe_db, *rango)
+                break
+            if time.time() - inicio > timeout:
+                raise SyncEnCurso(
+                    "Tiempo de espera agotado: la sincronización sigue en curso"
+                )
+
+    id_desde = _max_id(boe_db) + 1
+    try:
+        return funcion(lease)
+    finally:
+        # Si `funcion` falló a mitad, descartamos lo que no llegó a confirmarse
+        boe_db.rollback()
+        lease.liberar(id_desde, _max_id(boe_db))
+
+
+def _max_id(boe_db) -> int:
+    return boe_db.execute("SELECT COALESCE(MAX(id), 0) FROM oposiciones").fetchone()[0]
+
+
+def _oposiciones_en_rango(boe_db, id_desde, id_hasta):
+    if id_desde is None or id_hasta is None or id_hasta < id_desde:
+        return []
+    rows = boe_db.execute(
+        """
+        SELECT id, identificador, control, titulo, url_html, url_pdf,
+               departamento, fecha, provincia
+        FROM vista_oposiciones
+        WHERE id BETWEEN ? AND ?
+        ORDER BY id
+        """,
+        (id_desde, id_hasta),
+    ).fetchall()
+    return [dict(row) for row in rows]
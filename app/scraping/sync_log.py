@@ -0,0 +1,126 @@
+# app/scraping/sync_log.py
+
+from datetime import date, datetime, timedelta
+
+from app.scraping.boe_client import (
+    ESTADO_ERROR,
+    ESTADO_OK,
+    ESTADO_SIN_SUMARIO,
+    ResultadoDescarga,
+)
+
+# Un día que ha fallado se reintenta pasados 5 min, 10, 20... hasta 1 día
+REINTENTO_BASE = timedelta(minutes=5)
+REINTENTO_MAX = timedelta(days=1)
+
+# Un día reciente sin sumario puede que aún no esté publicado
+REINTENTO_SIN_SUMARIO = timedelta(hours=1)
+
+
+def hay_edicion(fecha: date) -> bool:
+    """Calendario de publicación del BOE: de lunes a sábado (no hay edición en domingo)."""
+    return fecha.weekday() != 6
+
+
+def _ahora(ahora: datetime | None) -> datetime:
+    return ahora or datetime.utcnow()
+
+
+def registrar_resultado(boe_db, resultado: ResultadoDescarga, item_count: int,
+                        ahora: datetime | None = None, hoy: date | None = None):
+    """
+    Guarda en `sync_log` el resultado de descargar un día y calcula cuándo
+    toca volver a intentarlo (NULL = el día está completo).
+    No hace commit: va en la misma transacción que las oposiciones.
+    """
+    ahora = _ahora(ahora)
+    hoy = hoy or date.today()
+    fecha_str = resultado.fecha.strftime("%Y%m%d")
+
+    row = boe_db.execute(
+        "SELECT intentos FROM sync_log WHERE fecha = ?", (fecha_str,)
+    ).fetchone()
+    intentos = (row[0] if row else 0) + 1 if resultado.estado == ESTADO_ERROR else 0
+
+    proximo = None
+    if resultado.estado == ESTADO_ERROR:
+        espera = min(REINTENTO_MAX, REINTENTO_BASE * 2 ** (intentos - 1))
+        proximo = ahora + espera
+    elif resultado.estado == ESTADO_SIN_SUMARIO and resultado.fecha >= hoy - timedelta(days=1):
+        proximo = ahora + REINTENTO_SIN_SUMARIO
+
+    boe_db.execute(
+        """
+        INSERT OR REPLACE INTO sync_log
+            (fecha, status, http_status, item_count, fetched_at, etag,
+             intentos, proximo_intento)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+        """,
+        (
+            fecha_str,
+            resultado.estado,
+            resultado.http_status,
+            item_count,
+            ahora.isoformat(),
+            resultado.etag,
+            intentos,
+            proximo.isoformat() if proximo else None,
+        ),
+    )
+
+
+def dias_pendientes(boe_db, desde: date, hasta: date,
+                    ahora: datetime | None = None):
+    """
+    Días entre `desde` y `hasta` (ambos incluidos) que hay que descargar:
+    los que tienen edición del BOE y no constan en `sync_log`, o cuyo
+    reintento ya ha vencido. Los días `ok` no se vuelven a pedir.
+    """
+    ahora = _ahora(ahora)
+    rows = boe_db.execute(
+        """
+        SELECT fecha, status, proximo_intento
+        FROM sync_log
+        WHERE fecha BETWEEN ? AND ?
+        """,
+        (desde.strftime("%Y%m%d"), hasta.strftime("%Y%m%d")),
+    ).fetchall()
+    log = {row[0]: (row[1], row[2]) for row in rows}
+
+    pendientes = []
+    actual = desde
+    while actual <= hasta:
+        if hay_edicion(actual):
+            entrada = log.get(actual.strftime("%Y%m%d"))
+            if entrada is None:
+                pendientes.append(actual)
+            else:
+                status, proximo = entrada
+                if status != ESTADO_OK and proximo and proximo <= ahora.isoformat():
+                    pendientes.append(actual)
+        actual += timedelta(days=1)
+    return pendientes
+
+
+def dias_sin_completar(boe_db, desde: date, hasta: date):
+    """
+    Días con edición entre `desde` y `hasta` que no están terminados en
+    `sync_log` (no constan o fallaron), sin mirar los plazos de reintento.
+    Es el punto de reanudación de un backfill interrumpido.
+    """
+    rows = boe_db.execute(
+        """
+        SELECT fecha FROM sync_log
+        WHERE fecha BETWEEN ? AND ? AND status != ?
+        """,
+        (desde.strftime("%Y%m%d"), hasta.strftime("%Y%m%d"), ESTADO_ERROR),
+    ).fetchall()
+    hechos = {row[0] for row in rows}
+
+    pendientes = []
+    actual = desde
+    while actual <= hasta:
+        if hay_edicion(actual) and actual.strftime("%Y%m%d") not in hechos:
+            pendientes.append(actual)
+        actual += timedelta(days=1)
+    return pendientes
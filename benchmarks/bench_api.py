@@ -0,0 +1,95 @@
+"""
+Benchmark de /api/v1/oposiciones: coste de convertir una página de filas a
+JSON construyendo un dict por fila con jsonify (lo habitual) frente a
+proyectar las tuplas por posición y serializarlas con json o con orjson (lo
+que hace app/routes/api.py), y latencia de la petición completa.
+
+    python -m benchmarks.bench_api [--filas 300000] [--limite 100] [--repeticiones 200]
+
+Tiempos en ms (mediana) por página.
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import statistics
+import tempfile
+import time
+from datetime import date, timedelta
+
+from benchmarks.bench_arranque import poblar
+
+
+def medir(funcion, repeticiones):
+    tiempos = []
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        funcion()
+        tiempos.append((time.perf_counter() - inicio) * 1000)
+    return statistics.median(tiempos)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--filas", type=int, default=300_000)
+    parser.add_argument("--limite", type=int, default=100)
+    parser.add_argument("--repeticiones", type=int, default=200)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ["BOE_DB_PATH"] = os.path.join(tmp, "bench.db")
+        os.environ["USERS_DB_PATH"] = os.path.join(tmp, "usuarios.db")
+        os.environ["BOE_REFRESCO_INTERVALO"] = "0"
+        # Config lee el entorno al importarse: la app se importa después
+        from flask import jsonify
+
+        from app import create_app
+        from app.repositorio import Filtros, get_repositorio
+        from app.routes import api
+
+        with contextlib.redirect_stdout(io.StringIO()):
+            app = create_app()
+        poblar(app, args.filas, inicio=date.today() - timedelta(days=args.filas // 350))
+        print(f"{args.filas} oposiciones, páginas de {args.limite}")
+
+        with app.test_request_context():
+            pagina = get_repositorio().listar_oposiciones(Filtros(), por_pagina=args.limite)
+            filas = pagina.filas
+
+            def dicts_jsonify():
+                jsonify([{c: fila[c] for c in api.CAMPOS} for fila in filas]).get_data()
+
+            def tuplas_json():
+                json.dumps(api._proyectar(filas, api.CAMPOS), ensure_ascii=False,
+                           separators=(",", ":"))
+
+            def tuplas_orjson():
+                api.orjson.dumps(api._proyectar(filas, api.CAMPOS))
+
+            pruebas = [("dict por fila + jsonify", dicts_jsonify), ("tuplas + json", tuplas_json)]
+            if api.orjson is not None:
+                pruebas.append(("tuplas + orjson", tuplas_orjson))
+            else:
+                print("  (orjson no está instalado)")
+            for nombre, funcion in pruebas:
+                print(f"  {nombre:<26} {medir(funcion, args.repeticiones):8.3f} ms")
+
+        # Petición completa (sin caché de consultas ni ETag: cada una consulta)
+        app.config["CACHE_CONSULTAS_TAMANO"] = 0
+        cliente = app.test_client()
+        url = f"/api/v1/oposiciones?limite={args.limite}"
+        for nombre, orjson in (("petición con json", None), ("petición con orjson", api.orjson)):
+            if nombre.endswith("orjson") and orjson is None:
+                continue
+            anterior, api.orjson = api.orjson, orjson
+            try:
+                ms = medir(lambda: cliente.get(url), args.repeticiones)
+            finally:
+                api.orjson = anterior
+            print(f"  {nombre:<26} {ms:8.3f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,140 @@
+"""
+Benchmark del arranque de cada worker (`create_app`) con las BBDD ya al día:
+antes se repetían en cada arranque todos los pasos de creación y migración
+del esquema (CREATE ... IF NOT EXISTS, PRAGMA table_info, triggers y
+configuración del FTS, ANALYZE si hacía falta...); ahora solo se lee
+`PRAGMA user_version` de cada BBDD.
+
+    python -m benchmarks.bench_arranque [--filas 300000] [--repeticiones 20]
+
+"antes" = create_app() + los pasos de todas las migraciones y la comprobación
+de estadísticas, que es lo que hacían init_boe_db/init_users_db/
+migrate_users_db. Tiempos en ms (mediana); incluyen abrir las conexiones de
+cada pool, igual en los dos casos.
+
+También se mide un arranque mientras otro proceso tiene abierta una
+transacción de escritura en oposiciones.db (p. ej. un lote del scraper): los
+pasos de antes escriben (configuración del FTS), así que esperan al
+busy_timeout (`--busy-timeout-ms`) y fallan.
+"""
+
+import argparse
+import contextlib
+import io
+import os
+import random
+import sqlite3
+import statistics
+import tempfile
+import time
+from datetime import date, timedelta
+
+from benchmarks.fixtures import DEPARTAMENTOS
+
+
+def poblar(app, n, semilla=0, inicio=date(2024, 1, 1)):
+    from app.db import get_boe_db
+    from app.esquema import dia_desde_fecha, ids_dimension
+    from app.facetas import reconstruir_facetas
+    from app.queries import actualizar_estadisticas
+
+    rnd = random.Random(semilla)
+    with app.app_context():
+        db = get_boe_db()
+        departamentos = list(ids_dimension(db, "departamentos", DEPARTAMENTOS).values())
+        db.executemany(
+            "INSERT INTO oposiciones (identificador, titulo, url_html, departamento_id, dia) "
+            "VALUES (?, ?, ?, ?, ?)",
+            (
+                (f"BOE-A-2024-{i}", f"Resolución por la que se convoca proceso selectivo {i}",
+                 f"https://www.boe.es/{i}", rnd.choice(departamentos),
+                 dia_desde_fecha(inicio + timedelta(days=i // 350)))
+                for i in range(n)
+            ),
+        )
+        reconstruir_facetas(db)
+        db.commit()
+        actualizar_estadisticas(db, forzar=True)
+
+
+def pasos_antes():
+    """Lo que se repetía en cada arranque con el esquema ya creado."""
+    from app.db import get_boe_db, get_users_db
+    from app.migraciones import MIGRACIONES_BOE, MIGRACIONES_USERS
+    from app.queries import actualizar_estadisticas
+
+    for get_db, migraciones in ((get_boe_db, MIGRACIONES_BOE),
+                                (get_users_db, MIGRACIONES_USERS)):
+        db = get_db()
+        for migracion in migraciones:
+            migracion.funcion(db)
+        db.commit()
+    actualizar_estadisticas(get_boe_db())
+
+
+def medir(funcion, repeticiones):
+    tiempos = []
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        funcion()
+        tiempos.append((time.perf_counter() - inicio) * 1000)
+    return statistics.median(tiempos)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--filas", type=int, default=300_000)
+    parser.add_argument("--repeticiones", type=int, default=20)
+    parser.add_argument("--busy-timeout-ms", type=int, default=2000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ["BOE_DB_PATH"] = os.path.join(tmp, "bench.db")
+        os.environ["USERS_DB_PATH"] = os.path.join(tmp, "usuarios.db")
+        os.environ["BOE_REFRESCO_INTERVALO"] = "0"
+        os.environ["DB_BUSY_TIMEOUT_MS"] = str(args.busy_timeout_ms)
+        # Config lee el entorno al importarse: la app se importa después
+        from app import create_app
+
+        inicio = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            app = create_app()
+        poblar(app, args.filas)
+        print(f"{args.filas} oposiciones ({time.perf_counter() - inicio:.1f} s en generar)")
+
+        def antes():
+            nueva = create_app()
+            with nueva.app_context():
+                pasos_antes()
+
+        def ahora():
+            nueva = create_app()
+            with nueva.app_context():
+                pass
+
+        with contextlib.redirect_stdout(io.StringIO()):
+            ms_antes = medir(antes, args.repeticiones)
+            ms_ahora = medir(ahora, args.repeticiones)
+        print(f"  {'antes (todos los pasos)':<28} {ms_antes:9.2f} ms")
+        print(f"  {'ahora (PRAGMA user_version)':<28} {ms_ahora:9.2f} ms")
+
+        print("con otra transacción escribiendo en oposiciones.db")
+        escritor = sqlite3.connect(os.environ["BOE_DB_PATH"])
+        escritor.execute("BEGIN IMMEDIATE")
+        for nombre, funcion in (("antes (todos los pasos)", antes),
+                                ("ahora (PRAGMA user_version)", ahora)):
+            inicio = time.perf_counter()
+            try:
+                with contextlib.redirect_stdout(io.StringIO()):
+                    funcion()
+                resultado = "ok"
+            except sqlite3.OperationalError as e:
+                resultado = f"falla: {e}"
+            ms = (time.perf_counter() - inicio) * 1000
+            print(f"  {nombre:<28} {ms:9.2f} ms  {resultado}")
+        escritor.rollback()
+        escritor.close()
+
+
+if __name__ == "__main__":
+    main()
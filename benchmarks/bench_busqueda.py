@@ -0,0 +1,152 @@
+"""
+Benchmark de la búsqueda de oposiciones: el filtro anterior
+(`titulo LIKE ? OR identificador LIKE ? OR control LIKE ?`, recorrido
+completo de la tabla) frente al índice FTS5 `oposiciones_fts`.
+
+    python -m benchmarks.bench_busqueda [--filas 100000 1000000] [--repeticiones 20]
+
+Para cada tamaño genera una BBDD en disco con títulos sintéticos y mide la
+latencia (mediana, ms) de la consulta de `/user_oposiciones` (COUNT + primera
+página) con varios tipos de búsqueda, y cuántos resultados encuentra cada
+una: LIKE no encuentra "informatica" en "INFORMÁTICA".
+"""
+
+import argparse
+import os
+import random
+import statistics
+import tempfile
+import time
+from datetime import date, timedelta
+
+from benchmarks.fixtures import LUGARES, MUNICIPIOS, TITULOS, UNIVERSIDADES
+
+# (nombre, texto que escribe el usuario, orden)
+CONSULTAS = [
+    ("término", "convocatoria", "fecha_desc"),
+    ("sin tildes", "informatica", "fecha_desc"),
+    ("prefijo", "selec", "fecha_desc"),
+    ("frase", '"proceso selectivo"', "fecha_desc"),
+    ("identificador", "BOE-A-2024-0102000", "fecha_desc"),
+    ("relevancia", "universidad granada", "relevancia"),
+]
+
+
+def filas_sinteticas(n, desde=date(2024, 1, 1), por_dia=350, semilla=0):
+    rnd = random.Random(semilla)
+    for i in range(n):
+        dia = desde + timedelta(days=i // por_dia)
+        fecha = dia.strftime("%Y%m%d")
+        titulo = rnd.choice(TITULOS).format(
+            dia=rnd.randint(1, 28),
+            lugar=rnd.choice(LUGARES),
+            municipio=rnd.choice(MUNICIPIOS),
+            universidad=rnd.choice(UNIVERSIDADES),
+            plazas=rnd.randint(1, 9),
+        )
+        ident = f"BOE-A-{fecha[:4]}-{fecha[4:]}{i % por_dia:05d}"
+        yield (
+            ident, f"{rnd.randint(1000, 9999)}/{fecha[:4]}", titulo,
+            f"https://www.boe.es/diario_boe/txt.php?id={ident}-{i}",
+            "MINISTERIO DE HACIENDA", fecha,
+        )
+
+
+def poblar(boe_db, n):
+    from app.esquema import dia_desde_fecha, ids_dimension
+
+    inicio = time.perf_counter()
+    departamento_id = ids_dimension(
+        boe_db, "departamentos", ["MINISTERIO DE HACIENDA"]
+    )["MINISTERIO DE HACIENDA"]
+    filas = filas_sinteticas(n)
+    while True:
+        lote = [
+            (*f[:4], departamento_id, dia_desde_fecha(f[5]))
+            for _, f in zip(range(20000), filas)
+        ]
+        if not lote:
+            break
+        boe_db.executemany(
+            "INSERT INTO oposiciones (identificador, control, titulo, url_html, "
+            "departamento_id, dia) VALUES (?, ?, ?, ?, ?, ?)",
+            lote,
+        )
+    boe_db.commit()
+    return time.perf_counter() - inicio
+
+
+def consulta_like(boe_db, texto, orden):
+    like = f"%{texto.strip(chr(34))}%"
+    sql_part = (
+        "FROM vista_oposiciones WHERE dia >= ? "
+        "AND (titulo LIKE ? OR identificador LIKE ? OR control LIKE ?)"
+    )
+    params = [0, like, like, like]
+    total = boe_db.execute(f"SELECT COUNT(*) {sql_part}", params).fetchone()[0]
+    boe_db.execute(
+        f"SELECT * {sql_part} ORDER BY dia DESC LIMIT 10 OFFSET 0", params
+    ).fetchall()
+    return total
+
+
+def consulta_fts(boe_db, texto, orden):
+    from app.busqueda import FiltroBusqueda
+
+    filtro = FiltroBusqueda(boe_db, texto)
+    sql_part = (
+        f"FROM vista_oposiciones AS oposiciones{filtro.join} "
+        f"WHERE oposiciones.dia >= ?{filtro.where}"
+    )
+    params = [0] + filtro.params
+    total = boe_db.execute(f"SELECT COUNT(*) {sql_part}", params).fetchone()[0]
+    boe_db.execute(
+        f"SELECT oposiciones.* {sql_part}{filtro.order_by(orden)} LIMIT 10 OFFSET 0",
+        params,
+    ).fetchall()
+    return total
+
+
+def medir(boe_db, funcion, texto, orden, repeticiones):
+    tiempos = []
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        total = funcion(boe_db, texto, orden)
+        tiempos.append((time.perf_counter() - inicio) * 1000)
+    return statistics.median(tiempos), total
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--filas", type=int, nargs="+", default=[100_000, 1_000_000])
+    parser.add_argument("--repeticiones", type=int, default=20)
+    args = parser.parse_args()
+
+    for n in args.filas:
+        with tempfile.TemporaryDirectory() as tmp:
+            os.environ["BOE_DB_PATH"] = os.path.join(tmp, "bench.db")
+            os.environ["USERS_DB_PATH"] = os.path.join(tmp, "usuarios.db")
+            # Config lee el entorno al importarse: la app se importa después
+            from app import create_app
+            from app.config import Config
+            from app.db import get_boe_db
+
+            Config.BOE_DB_PATH = os.environ["BOE_DB_PATH"]
+            Config.USERS_DB_PATH = os.environ["USERS_DB_PATH"]
+            app = create_app()
+            with app.app_context():
+                boe_db = get_boe_db()
+                segundos = poblar(boe_db, n)
+                print(f"{n} filas (insertadas con índice FTS en {segundos:.1f} s)")
+                print(f"  {'consulta':<14} {'LIKE ms':>9} {'filas':>8}   {'FTS5 ms':>9} {'filas':>8}")
+                for nombre, texto, orden in CONSULTAS:
+                    ms_like, total_like = medir(boe_db, consulta_like, texto, orden, args.repeticiones)
+                    ms_fts, total_fts = medir(boe_db, consulta_fts, texto, orden, args.repeticiones)
+                    print(
+                        f"  {nombre:<14} {ms_like:9.2f} {total_like:8}   "
+                        f"{ms_fts:9.2f} {total_fts:8}"
+                    )
+
+
+if __name__ == "__main__":
+    main()
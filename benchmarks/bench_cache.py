@@ -0,0 +1,116 @@
+"""
+Benchmark de la caché de páginas públicas (app/cache.py): latencia de `/` y
+`/departamento/<nombre>` para un anónimo sin caché (cada petición consulta y
+renderiza), con ella y revalidando con If-None-Match (304), y cuántos
+renderizados provocan N peticiones simultáneas a una página que no está en
+caché (antes, N; ahora, 1).
+
+    python -m benchmarks.bench_cache [--filas 300000] [--peticiones 200] [--simultaneas 50]
+
+Tiempos en ms por petición (mediana) con el cliente de pruebas de Flask,
+sin red.
+"""
+
+import argparse
+import contextlib
+import io
+import os
+import statistics
+import tempfile
+import threading
+import time
+from datetime import date, timedelta
+from urllib.parse import quote
+
+from benchmarks.bench_arranque import poblar
+from benchmarks.fixtures import DEPARTAMENTOS
+
+
+def medir(cliente, url, peticiones, etag=None, estado=200):
+    cabeceras = {"If-None-Match": etag} if etag else {}
+    tiempos = []
+    for _ in range(peticiones):
+        inicio = time.perf_counter()
+        respuesta = cliente.get(url, headers=cabeceras)
+        tiempos.append((time.perf_counter() - inicio) * 1000)
+        assert respuesta.status_code == estado, (url, respuesta.status_code)
+    return statistics.median(tiempos)
+
+
+def simultaneas(app, url, n):
+    """Lanza `n` peticiones a la vez a `url`; devuelve cuántas renderizaron."""
+    import flask
+
+    renderizados = 0
+    lock = threading.Lock()
+    original = flask.templating._render
+
+    def contar(*a, **kw):
+        nonlocal renderizados
+        with lock:
+            renderizados += 1
+        time.sleep(0.05)  # que las demás lleguen mientras tanto
+        return original(*a, **kw)
+
+    barrera = threading.Barrier(n)
+
+    def peticion():
+        cliente = app.test_client()
+        barrera.wait()
+        assert cliente.get(url).status_code == 200
+
+    flask.templating._render = contar
+    try:
+        hilos = [threading.Thread(target=peticion) for _ in range(n)]
+        for hilo in hilos:
+            hilo.start()
+        for hilo in hilos:
+            hilo.join()
+    finally:
+        flask.templating._render = original
+    return renderizados
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--filas", type=int, default=300_000)
+    parser.add_argument("--peticiones", type=int, default=200)
+    parser.add_argument("--simultaneas", type=int, default=50)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ["BOE_DB_PATH"] = os.path.join(tmp, "bench.db")
+        os.environ["USERS_DB_PATH"] = os.path.join(tmp, "usuarios.db")
+        os.environ["BOE_REFRESCO_INTERVALO"] = "0"
+        # Config lee el entorno al importarse: la app se importa después
+        from app import create_app
+        from app.cache import get_cache
+
+        with contextlib.redirect_stdout(io.StringIO()):
+            app = create_app()
+        # 350 oposiciones por día, la última tanda hoy
+        poblar(app, args.filas, inicio=date.today() - timedelta(days=args.filas // 350))
+        print(f"{args.filas} oposiciones")
+
+        urls = ["/", f"/departamento/{quote(DEPARTAMENTOS[0])}?orden=fecha_desc"]
+        for tamano, nombre in ((0, "sin caché"), (512, "con caché")):
+            app.config["CACHE_PAGINAS_TAMANO"] = tamano
+            app.config["CACHE_CONSULTAS_TAMANO"] = tamano
+            app.extensions.pop("caches", None)
+            cliente = app.test_client()
+            for url in urls:
+                ms = medir(cliente, url, args.peticiones)
+                print(f"  {nombre:<10} {url[:40]:<42} {ms:8.3f} ms")
+            if tamano:
+                for url in urls:
+                    etag = cliente.get(url).headers["ETag"]
+                    ms = medir(cliente, url, args.peticiones, etag=etag, estado=304)
+                    print(f"  {'304':<10} {url[:40]:<42} {ms:8.3f} ms")
+            n = simultaneas(app, urls[1] + "&page=2", args.simultaneas)
+            print(f"  {nombre:<10} {args.simultaneas} peticiones simultáneas -> {n} renderizados")
+        with app.app_context():
+            print(f"  métricas: {get_cache('paginas').metricas()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,197 @@
+"""
+Benchmark del esquema de `oposiciones`: departamento, fecha y provincia como
+texto en cada fila (esquema anterior) frente al normalizado de
+app/esquema.py (tablas de dimensiones con clave entera y fecha en días).
+
+    python -m benchmarks.bench_esquema [--filas 300000 1000000] [--repeticiones 20]
+
+Para cada tamaño genera la BBDD con el esquema anterior, la mide, la migra
+con `migrar_esquema_normalizado` y vuelve a medir:
+- tamaño del fichero y de la tabla y cada índice (tras VACUUM, vía dbstat);
+- latencia (mediana, ms) de los listados más habituales: total + primera
+  página, con los mismos filtros en los dos esquemas.
+"""
+
+import argparse
+import os
+import random
+import sqlite3
+import statistics
+import tempfile
+import time
+from datetime import date, timedelta
+
+from app.scraping.gazetteer import PROVINCIAS
+
+RUTA_DEPARTAMENTOS = os.path.join(
+    os.path.dirname(__file__), "..", "static", "img", "dept"
+)
+
+SQL_ESQUEMA_ANTERIOR = (
+    """
+    CREATE TABLE oposiciones (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        identificador TEXT, control TEXT, titulo TEXT, url_html TEXT UNIQUE,
+        url_pdf TEXT, departamento TEXT, fecha TEXT, provincia TEXT
+    )
+    """,
+    "CREATE INDEX idx_oposiciones_fecha ON oposiciones(fecha)",
+    "CREATE INDEX idx_oposiciones_departamento_fecha ON oposiciones(departamento, fecha)",
+    "CREATE INDEX idx_oposiciones_fecha_provincia ON oposiciones(fecha, provincia)",
+)
+
+
+def nombres_departamentos():
+    """Nombres reales (y largos) de departamentos, sacados de sus imágenes."""
+    return sorted(
+        os.path.splitext(f)[0].replace("_", " ")
+        for f in os.listdir(RUTA_DEPARTAMENTOS)
+        if f.endswith(".avif")
+    )
+
+
+def poblar_anterior(ruta, n, departamentos, semilla=0):
+    rnd = random.Random(semilla)
+    provincias = list(PROVINCIAS) + [None] * 20
+    db = sqlite3.connect(ruta)
+    for sql in SQL_ESQUEMA_ANTERIOR:
+        db.execute(sql)
+    inicio = date(2024, 1, 1)
+    db.executemany(
+        "INSERT INTO oposiciones (identificador, control, titulo, url_html, url_pdf, "
+        "departamento, fecha, provincia) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+        (
+            (
+                f"BOE-A-2024-{i}", f"{rnd.randint(1000, 9999)}/2024",
+                "Resolución por la que se convoca proceso selectivo",
+                f"https://www.boe.es/diario_boe/txt.php?id=BOE-A-2024-{i}",
+                f"https://www.boe.es/boe/dias/pdfs/BOE-A-2024-{i}.pdf",
+                rnd.choice(departamentos),
+                (inicio + timedelta(days=i // 350)).strftime("%Y%m%d"),
+                rnd.choice(provincias),
+            )
+            for i in range(n)
+        ),
+    )
+    db.commit()
+    db.close()
+
+
+def tamanos(db):
+    """(bytes del fichero, {tabla o índice: bytes}) de `oposiciones`."""
+    db.execute("VACUUM")
+    paginas = db.execute("PRAGMA page_count").fetchone()[0]
+    pagina = db.execute("PRAGMA page_size").fetchone()[0]
+    objetos = {
+        row[0]: row[1]
+        for row in db.execute(
+            "SELECT name, SUM(pgsize) FROM dbstat WHERE name = 'oposiciones' "
+            "OR name LIKE 'idx_oposiciones_%' GROUP BY name ORDER BY name"
+        )
+    }
+    return paginas * pagina, objetos
+
+
+def consultas(departamentos, ultimo_dia):
+    """(nombre, filtros de `listar_oposiciones`) de los listados medidos."""
+    hoy = ultimo_dia.strftime("%Y%m%d")
+    desde = (ultimo_dia - timedelta(days=30)).strftime("%Y%m%d")
+    return [
+        ("departamento del día", {"departamentos": [departamentos[0]], "fecha": hoy}),
+        ("vigentes (30 días)", {"desde": desde}),
+        ("vigentes + provincia", {"desde": desde, "provincia": "Madrid"}),
+        ("vigentes + 3 departamentos", {"desde": desde, "departamentos": departamentos[:3]}),
+    ]
+
+
+def listar_anterior(db, departamentos=(), fecha=None, desde=None, provincia=None):
+    """Mismo listado sobre el esquema anterior (columnas de texto)."""
+    from app.paginacion import paginar
+
+    condiciones, params = [], []
+    if departamentos:
+        condiciones.append(f"departamento IN ({','.join('?' * len(departamentos))})")
+        params.extend(departamentos)
+    if fecha:
+        condiciones.append("fecha = ?")
+        params.append(fecha)
+    if desde:
+        condiciones.append("fecha >= ?")
+        params.append(desde)
+    if provincia:
+        condiciones.append("provincia = ?")
+        params.append(provincia)
+    return paginar(
+        db, "SELECT *", "FROM oposiciones WHERE " + " AND ".join(condiciones),
+        params, ("fecha", "id"),
+    )
+
+
+def medir(funcion, repeticiones):
+    tiempos = []
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        pagina = funcion()
+        tiempos.append((time.perf_counter() - inicio) * 1000)
+    return statistics.median(tiempos), pagina.total
+
+
+def conectar(ruta):
+    db = sqlite3.connect(ruta)
+    db.row_factory = sqlite3.Row
+    return db
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--filas", type=int, nargs="+", default=[300_000, 1_000_000])
+    parser.add_argument("--repeticiones", type=int, default=20)
+    args = parser.parse_args()
+
+    from app.esquema import crear_esquema, migrar_esquema_normalizado
+    from app.queries import actualizar_estadisticas, crear_indices, listar_oposiciones
+
+    departamentos = nombres_departamentos()
+    for n in args.filas:
+        with tempfile.TemporaryDirectory() as tmp:
+            ruta = os.path.join(tmp, "bench.db")
+            poblar_anterior(ruta, n, departamentos)
+            ultimo_dia = date(2024, 1, 1) + timedelta(days=(n - 1) // 350)
+            casos = consultas(departamentos, ultimo_dia)
+
+            db = conectar(ruta)
+            db.execute("ANALYZE")
+            db.commit()
+            antes = tamanos(db)
+            ms_antes = [medir(lambda: listar_anterior(db, **f), args.repeticiones) for _, f in casos]
+
+            inicio = time.perf_counter()
+            migrar_esquema_normalizado(db)
+            crear_esquema(db)
+            crear_indices(db)
+            db.commit()
+            segundos = time.perf_counter() - inicio
+            actualizar_estadisticas(db, forzar=True)
+            despues = tamanos(db)
+            ms_despues = [
+                medir(lambda: listar_oposiciones(db, **f), args.repeticiones) for _, f in casos
+            ]
+            db.close()
+
+            print(f"{n} filas (migradas en {segundos:.1f} s)")
+            print(f"  {'':<42} {'anterior':>12} {'normalizado':>12}")
+            print(f"  {'fichero (MB)':<42} {antes[0] / 2**20:12.1f} {despues[0] / 2**20:12.1f}")
+            for nombre in sorted(set(antes[1]) | set(despues[1])):
+                a, d = antes[1].get(nombre), despues[1].get(nombre)
+                print(
+                    f"  {nombre + ' (MB)':<42} "
+                    f"{'-' if a is None else f'{a / 2**20:.1f}':>12} "
+                    f"{'-' if d is None else f'{d / 2**20:.1f}':>12}"
+                )
+            for (nombre, _), (ms_a, total_a), (ms_d, total_d) in zip(casos, ms_antes, ms_despues):
+                aviso = "" if total_a == total_d else f"  ¡{total_a} != {total_d}!"
+                print(f"  {nombre + ' (ms)':<42} {ms_a:12.2f} {ms_d:12.2f}{aviso}")
+
+
+if __name__ == "__main__":
+    main()
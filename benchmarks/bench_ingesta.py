@@ -0,0 +1,134 @@
+"""
+Benchmark de ingesta de extremo a extremo (descarga + parseo + BBDD) contra
+el servidor local del BOE (`benchmarks.servidor_boe`), sin tocar boe.es.
+
+    python -m benchmarks.bench_ingesta [--dias 60] [--latencia 50]
+                                       [--errores 0.0] [--workers 1,4,8]
+                                       [--procesos 1,4] [--dir fixtures/sumarios]
+
+Mide días/s e items/s de:
+- `scrape_boe_dia` día a día (un solo hilo, como las llamadas sueltas);
+- `sync_boe_hasta_hoy` con cada valor de --workers;
+- el backfill con cada combinación de --workers y --procesos.
+
+Cada escenario parte de una BBDD vacía y de un cliente HTTP nuevo.
+Con --dir se reproducen sumarios grabados (en rotación si hacen falta más días).
+"""
+
+import argparse
+import contextlib
+import io
+import os
+import tempfile
+import time
+from datetime import date, timedelta
+
+from benchmarks.servidor_boe import ServidorBoe, fuente_grabada, fuente_sintetica
+
+
+def _lista(texto: str):
+    return [int(x) for x in texto.split(",") if x.strip()]
+
+
+def preparar(app, url: str, workers: int):
+    """Vacía la BBDD del BOE y crea un cliente con `workers` conexiones."""
+    from app.db import get_boe_db
+
+    cliente = app.extensions.pop("boe_client", None)
+    if cliente is not None:
+        cliente.close()
+    app.config.update(
+        BOE_SUMARIO_URL=url,
+        BOE_SYNC_WORKERS=workers,
+        BOE_CACHE_DIR="",
+        BOE_DIAS_GUARDADOS=0,
+    )
+    with app.app_context():
+        boe_db = get_boe_db()
+        for tabla in ("oposiciones", "sync_log", "sync_lease"):
+            boe_db.execute(f"DELETE FROM {tabla}")
+        boe_db.commit()
+
+
+def medir(nombre, app, servidor, dias, funcion):
+    servidor.reiniciar_contadores()
+    with app.app_context(), contextlib.redirect_stdout(io.StringIO()):
+        inicio = time.perf_counter()
+        items = funcion()
+        segundos = time.perf_counter() - inicio
+    print(
+        f"  {nombre:<28} {dias / segundos:7.1f} días/s  {items / segundos:8.0f} items/s  "
+        f"{segundos:6.2f} s  ({servidor.peticiones} peticiones, "
+        f"{servidor.errores_inyectados} errores inyectados)"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--dias", type=int, default=60, help="días naturales hasta hoy")
+    parser.add_argument("--latencia", type=float, default=50, help="ms por petición")
+    parser.add_argument("--jitter", type=float, default=10, help="± ms")
+    parser.add_argument("--errores", type=float, default=0.0)
+    parser.add_argument("--workers", type=_lista, default=[1, 4, 8])
+    parser.add_argument("--procesos", type=_lista, default=[1, 4])
+    parser.add_argument("--dir", help="directorio con sumarios grabados")
+    args = parser.parse_args()
+
+    hoy = date.today()
+    desde = hoy - timedelta(days=args.dias - 1)
+    fechas = [desde + timedelta(days=i) for i in range(args.dias)]
+    publicados = sum(f.weekday() != 6 for f in fechas)
+
+    fuente = fuente_grabada(args.dir, ciclica=True) if args.dir else fuente_sintetica()
+    with tempfile.TemporaryDirectory() as tmp, ServidorBoe(
+        fuente,
+        latencia=args.latencia / 1000,
+        jitter=args.jitter / 1000,
+        errores=args.errores,
+        semilla=0,
+    ) as servidor:
+        os.environ["BOE_DB_PATH"] = os.path.join(tmp, "bench.db")
+        os.environ["USERS_DB_PATH"] = os.path.join(tmp, "usuarios.db")
+        os.environ["BOE_REFRESCO_INTERVALO"] = "0"
+        os.environ["BOE_CACHE_DIR"] = ""
+        # Config lee el entorno al importarse: la app se importa después
+        from app import create_app
+        from app.scraping.backfill import backfill
+        from app.scraping.boe_scraper import scrape_boe_dia, sync_boe_hasta_hoy
+
+        app = create_app()
+
+        print(
+            f"{args.dias} días ({publicados} con edición), latencia "
+            f"{args.latencia:.0f}±{args.jitter:.0f} ms, errores {args.errores:.0%}"
+        )
+
+        preparar(app, servidor.url, 1)
+        medir(
+            "scrape_boe_dia (secuencial)", app, servidor, args.dias,
+            lambda: sum(len(scrape_boe_dia(f)) for f in fechas),
+        )
+
+        for workers in args.workers:
+            preparar(app, servidor.url, workers)
+            medir(
+                f"sync_boe_hasta_hoy w={workers}", app, servidor, args.dias,
+                lambda: len(sync_boe_hasta_hoy(
+                    max_dias_inicial=args.dias, max_workers=workers
+                )),
+            )
+
+        for workers in args.workers:
+            for procesos in args.procesos:
+                preparar(app, servidor.url, workers)
+                medir(
+                    f"backfill w={workers} p={procesos}", app, servidor, args.dias,
+                    lambda: backfill(
+                        desde, hoy, max_workers=workers, procesos=procesos,
+                        salida=lambda *_: None,
+                    ).nuevas,
+                )
+
+
+if __name__ == "__main__":
+    main()
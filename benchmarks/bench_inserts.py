@@ -0,0 +1,123 @@
+"""
+Benchmark de escritura en `oposiciones`: un commit por fila capturando
+IntegrityError (implementación anterior) frente a `insertar_oposiciones`
+(INSERT OR IGNORE ... RETURNING en una transacción por lote de días).
+
+    python -m benchmarks.bench_inserts [--lote-dias 7]
+
+Mide filas/s sobre 30 días y 1 año de sumarios sintéticos, en BBDD en disco
+vacía y en una segunda pasada donde todo son duplicados.
+"""
+
+import argparse
+import os
+import sqlite3
+import tempfile
+import time
+
+from datetime import date
+
+from benchmarks.fixtures import dias_publicados, sumario_sintetico
+
+
+def insertar_fila_a_fila(boe_db, filas):
+    """
+    Copia del bucle anterior de `scrape_boe_dia`: commit por fila (con los
+    ids de departamento/provincia ya resueltos, como en el esquema actual).
+    """
+    from app.esquema import dia_desde_fecha, ids_dimension
+
+    departamentos = ids_dimension(boe_db, "departamentos", (f["departamento"] for f in filas))
+    provincias = ids_dimension(boe_db, "provincias", (f["provincia"] for f in filas))
+    boe_db.commit()
+    nuevas = []
+    for fila in filas:
+        try:
+            boe_db.execute(
+                """
+                INSERT INTO oposiciones (
+                    identificador, control, titulo, url_html, url_pdf,
+                    departamento_id, dia, provincia_id
+                )
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                """,
+                (
+                    fila["identificador"], fila["control"], fila["titulo"],
+                    fila["url_html"], fila["url_pdf"],
+                    departamentos.get(fila["departamento"]),
+                    dia_desde_fecha(fila["fecha"]), provincias.get(fila["provincia"]),
+                ),
+            )
+            boe_db.commit()
+            nuevas.append(fila)
+        except sqlite3.IntegrityError:
+            continue
+    return nuevas
+
+
+def insertar_por_lotes(boe_db, dias, lote_dias):
+    from app.scraping.boe_scraper import insertar_oposiciones
+
+    nuevas = []
+    for i, filas in enumerate(dias, start=1):
+        nuevas.extend(insertar_oposiciones(boe_db, filas, commit=False))
+        if i % lote_dias == 0:
+            boe_db.commit()
+    boe_db.commit()
+    return nuevas
+
+
+def medir(nombre, app, funcion):
+    from app.db import get_boe_db
+
+    with app.app_context():
+        boe_db = get_boe_db()
+        boe_db.execute("DELETE FROM oposiciones")
+        boe_db.execute("DELETE FROM facetas")
+        boe_db.commit()
+        resultados = []
+        for pasada in ("vacía", "duplicados"):
+            inicio = time.perf_counter()
+            filas, nuevas = funcion(boe_db)
+            segundos = time.perf_counter() - inicio
+            resultados.append(
+                f"{pasada}: {filas / segundos:9.0f} filas/s ({nuevas} nuevas)"
+            )
+        print(f"  {nombre:<14} " + "   ".join(resultados))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--lote-dias", type=int, default=7)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ["BOE_DB_PATH"] = os.path.join(tmp, "bench.db")
+        os.environ["USERS_DB_PATH"] = os.path.join(tmp, "usuarios.db")
+        # Config lee el entorno al importarse: la app se importa después
+        from app import create_app
+        from app.scraping.boe_scraper import parsear_sumario
+
+        app = create_app()
+
+        for etiqueta, n_dias in (("30 días", 30), ("1 año", 312)):
+            dias = [
+                parsear_sumario(f, sumario_sintetico(f))
+                for f in dias_publicados(date(2024, 1, 1), n_dias)
+            ]
+            total = sum(len(d) for d in dias)
+            print(f"{etiqueta}: {len(dias)} sumarios, {total} filas")
+
+            def antes(db):
+                nuevas = sum(len(insertar_fila_a_fila(db, d)) for d in dias)
+                return total, nuevas
+
+            def despues(db):
+                return total, len(insertar_por_lotes(db, dias, args.lote_dias))
+
+            medir("fila a fila", app, antes)
+            medir("por lotes", app, despues)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""
+Micro-benchmark del parser del sumario: BeautifulSoup (implementación
+anterior) frente a `iter_items` (lxml.etree.iterparse).
+
+    python -m benchmarks.bench_parser [--dir fixtures/sumarios] [--dias 30]
+
+Con --dir usa sumarios grabados (`AAAAMMDD.xml`); si no, genera sintéticos.
+"""
+
+import argparse
+import time
+import tracemalloc
+
+from bs4 import BeautifulSoup
+
+from app.scraping.sumario_parser import iter_items
+from benchmarks.fixtures import sumarios
+
+
+def parser_bs4(contenido):
+    """Copia del parser anterior de `scrape_boe_dia` (sin la parte de BBDD)."""
+    soup = BeautifulSoup(contenido, "lxml-xml")
+    seccion = soup.find("seccion", {"codigo": "2B"})
+    if not seccion:
+        return []
+    filas = []
+    for item in seccion.find_all("item"):
+        campos = []
+        for nombre in ("identificador", "control", "titulo", "url_html", "url_pdf"):
+            tag = item.find(nombre)
+            campos.append(tag.text.strip() if tag else None)
+        dept = item.find_parent("departamento")
+        campos.append(dept.get("nombre") if dept and dept.has_attr("nombre") else None)
+        filas.append(tuple(campos))
+    return filas
+
+
+def parser_iterparse(contenido):
+    return list(iter_items(contenido))
+
+
+def medir(nombre, funcion, datos, repeticiones):
+    mejor = float("inf")
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        total = sum(len(funcion(c)) for c in datos)
+        mejor = min(mejor, time.perf_counter() - inicio)
+
+    tracemalloc.start()
+    for c in datos:
+        funcion(c)
+    _, pico = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    megas = sum(len(c) for c in datos) / 1e6
+    print(
+        f"{nombre:<10} {total:>7} items  {mejor * 1000:9.1f} ms  "
+        f"{megas / mejor:7.1f} MB/s  pico {pico / 1e6:6.1f} MB"
+    )
+    return mejor
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--dir", help="directorio con sumarios grabados")
+    parser.add_argument("--dias", type=int, default=30)
+    parser.add_argument("--repeticiones", type=int, default=3)
+    args = parser.parse_args()
+
+    datos = list(sumarios(args.dir, args.dias).values())
+    print(f"{len(datos)} sumarios, {sum(len(c) for c in datos) / 1e6:.1f} MB")
+
+    antes = medir("bs4", parser_bs4, datos, args.repeticiones)
+    despues = medir("iterparse", parser_iterparse, datos, args.repeticiones)
+    print(f"aceleración x{antes / despues:.1f}")
+
+
+if __name__ == "__main__":
+    main()
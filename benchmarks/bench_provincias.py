@@ -0,0 +1,100 @@
+"""
+Benchmark de la extracción de provincia: la función anterior (52 regex por
+texto + mayúsculas como último recurso) frente al gazetteer
+(`app.scraping.gazetteer`, una sola regex en forma de trie).
+
+    python -m benchmarks.bench_provincias [--dir fixtures/sumarios] [--dias 312]
+
+Recorre los títulos y controles de la sección 2B de un año de sumarios
+(grabados con --dir o sintéticos) y mide textos/s, además de cuántos
+resultados cambian y cuántos del método anterior no eran provincias.
+"""
+
+import argparse
+import time
+from collections import Counter
+from datetime import date
+
+from app.scraping.gazetteer import PROVINCIAS, get_gazetteer
+from app.scraping.sumario_parser import iter_items
+from benchmarks.fixtures import sumarios
+
+
+def extraer_provincia_anterior(texto):
+    """Copia de la implementación anterior de `extraer_provincia`."""
+    if not texto:
+        return None
+    import re as _re
+
+    texto = _re.sub(r"\s+", " ", texto).strip()
+
+    provincias = [
+        "Álava", "Albacete", "Alicante", "Almería", "Asturias",
+        "Ávila", "Badajoz", "Barcelona", "Bizkaia", "Burgos",
+        "Cáceres", "Cádiz", "Cantabria", "Castellón", "Ciudad Real",
+        "Córdoba", "A Coruña", "Cuenca", "Gipuzkoa", "Girona",
+        "Granada", "Guadalajara", "Huelva", "Huesca", "Illes Balears",
+        "Jaén", "León", "Lleida", "Lugo", "Madrid",
+        "Málaga", "Murcia", "Navarra", "Ourense", "Palencia",
+        "Las Palmas", "Pontevedra", "La Rioja", "Salamanca",
+        "Santa Cruz de Tenerife", "Segovia", "Sevilla", "Soria",
+        "Tarragona", "Teruel", "Toledo", "Valencia", "Valladolid",
+        "Zamora", "Zaragoza", "Ceuta", "Melilla"
+    ]
+    for p in provincias:
+        if _re.search(rf"\b{_re.escape(p)}\b", texto, _re.IGNORECASE):
+            return p
+
+    caps = _re.findall(r"\b[A-ZÑ]{4,15}\b", texto)
+    if caps:
+        return caps[0].capitalize()
+    return None
+
+
+def medir(nombre, funcion, items, repeticiones):
+    mejor = float("inf")
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        resultados = [funcion(titulo) or funcion(control) for titulo, control in items]
+        mejor = min(mejor, time.perf_counter() - inicio)
+    textos = len(items)
+    print(f"  {nombre:<10} {mejor * 1000:8.1f} ms  {textos / mejor:9.0f} items/s")
+    return mejor, resultados
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--dir", help="directorio con sumarios grabados")
+    parser.add_argument("--dias", type=int, default=312)
+    parser.add_argument("--repeticiones", type=int, default=3)
+    args = parser.parse_args()
+
+    items = [
+        (item.titulo, item.control)
+        for contenido in sumarios(args.dir, args.dias, date(2024, 1, 1)).values()
+        for item in iter_items(contenido)
+    ]
+    print(f"{len(items)} items de la sección 2B")
+
+    inicio = time.perf_counter()
+    gazetteer = get_gazetteer()
+    print(f"  construir gazetteer: {(time.perf_counter() - inicio) * 1000:.0f} ms")
+
+    antes, anteriores = medir("anterior", extraer_provincia_anterior, items, args.repeticiones)
+    despues, nuevos = medir("gazetteer", gazetteer.provincia, items, args.repeticiones)
+    print(f"aceleración x{antes / despues:.1f}")
+
+    validas = set(PROVINCIAS)
+    basura = Counter(p for p in anteriores if p and p not in validas)
+    cambios = sum(a != n for a, n in zip(anteriores, nuevos))
+    print(
+        f"resultados distintos: {cambios}; sin provincia: antes "
+        f"{anteriores.count(None)}, ahora {nuevos.count(None)}"
+    )
+    if basura:
+        print("valores del método anterior que no son provincias: "
+              + ", ".join(f"{p} ({n})" for p, n in basura.most_common(10)))
+
+
+if __name__ == "__main__":
+    main()
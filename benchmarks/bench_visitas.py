@@ -0,0 +1,249 @@
+"""
+Benchmark de las consultas que cruzan `usuarios.db` con `oposiciones.db`:
+copiar los ids a Python y pedirlos con `WHERE id IN (?, ?, ...)` frente a un
+JOIN en SQLite con la BBDD del BOE adjunta (ATTACH) como `boe`.
+
+    python -m benchmarks.bench_visitas [--visitas 1000000] [--oposiciones 300000]
+                                       [--favoritas 5000] [--repeticiones 5]
+
+- estadísticas: visitas por departamento (/estadisticas). Con más ids
+  distintos que SQLITE_MAX_VARIABLE_NUMBER el IN falla; también se mide
+  troceado en bloques de 999.
+- favoritas: primera página y la página 100 de /user_favoritas de un usuario
+  con `--favoritas` favoritas (todas a Python, solo las de la página, JOIN).
+
+Latencias en ms (mediana).
+"""
+
+import argparse
+import os
+import random
+import sqlite3
+import statistics
+import tempfile
+import time
+from datetime import date, datetime, timedelta
+
+from benchmarks.fixtures import DEPARTAMENTOS
+
+POR_PAGINA = 10
+
+
+def poblar_boe(ruta, n, semilla=0):
+    from app.esquema import crear_esquema, dia_desde_fecha, ids_dimension
+
+    rnd = random.Random(semilla)
+    db = sqlite3.connect(ruta)
+    db.row_factory = sqlite3.Row
+    crear_esquema(db)
+    departamentos = list(ids_dimension(db, "departamentos", DEPARTAMENTOS).values())
+    inicio = date(2024, 1, 1)
+    db.executemany(
+        "INSERT INTO oposiciones (id, titulo, url_html, departamento_id, dia) "
+        "VALUES (?, ?, ?, ?, ?)",
+        (
+            (i, f"Oposición {i}", f"https://www.boe.es/{i}", rnd.choice(departamentos),
+             dia_desde_fecha(inicio + timedelta(days=i // 350)))
+            for i in range(1, n + 1)
+        ),
+    )
+    db.commit()
+    db.close()
+
+
+def poblar_usuarios(ruta, visitas, oposiciones, favoritas, semilla=0):
+    rnd = random.Random(semilla)
+    db = sqlite3.connect(ruta)
+    db.execute(
+        "CREATE TABLE visitas (id INTEGER PRIMARY KEY AUTOINCREMENT, user_id INTEGER NOT NULL, "
+        "oposicion_id INTEGER NOT NULL, fecha_visita TEXT NOT NULL, UNIQUE(user_id, oposicion_id))"
+    )
+    db.execute(
+        "CREATE TABLE favoritas (id INTEGER PRIMARY KEY AUTOINCREMENT, user_id INTEGER NOT NULL, "
+        "oposicion_id INTEGER NOT NULL, fecha_favorito TEXT NOT NULL, UNIQUE(user_id, oposicion_id))"
+    )
+    # ~100 visitas por usuario
+    db.executemany(
+        "INSERT OR IGNORE INTO visitas (user_id, oposicion_id, fecha_visita) VALUES (?, ?, '')",
+        ((1 + i // 100, rnd.randint(1, oposiciones)) for i in range(visitas)),
+    )
+    ahora = datetime(2025, 1, 1)
+    db.executemany(
+        "INSERT OR IGNORE INTO favoritas (user_id, oposicion_id, fecha_favorito) VALUES (1, ?, ?)",
+        (
+            (rnd.randint(1, oposiciones),
+             (ahora + timedelta(minutes=i)).strftime("%Y-%m-%d %H:%M:%S"))
+            for i in range(favoritas)
+        ),
+    )
+    db.commit()
+    db.close()
+
+
+# -------- Antes: ids a Python + IN (...) contra la otra BBDD --------
+def estadisticas_in(users_db, boe_db):
+    visitas = users_db.execute(
+        "SELECT oposicion_id, COUNT(id) AS total_visitas FROM visitas GROUP BY oposicion_id"
+    ).fetchall()
+    ids = [v["oposicion_id"] for v in visitas]
+    filas = boe_db.execute(
+        f"SELECT id, departamento FROM vista_oposiciones WHERE id IN ({','.join('?' * len(ids))})",
+        ids,
+    ).fetchall()
+    dept_por_id = {row["id"]: row["departamento"] for row in filas}
+    agg = {}
+    for v in visitas:
+        dep = dept_por_id.get(v["oposicion_id"])
+        if dep:
+            agg[dep] = agg.get(dep, 0) + v["total_visitas"]
+    return sorted(agg.items(), key=lambda x: x[1], reverse=True)
+
+
+def estadisticas_in_bloques(users_db, boe_db, bloque=999):
+    """Lo mismo troceando el IN para no pasar del límite de variables."""
+    visitas = users_db.execute(
+        "SELECT oposicion_id, COUNT(id) AS total_visitas FROM visitas GROUP BY oposicion_id"
+    ).fetchall()
+    ids = [v["oposicion_id"] for v in visitas]
+    dept_por_id = {}
+    for i in range(0, len(ids), bloque):
+        trozo = ids[i:i + bloque]
+        for row in boe_db.execute(
+            f"SELECT id, departamento FROM vista_oposiciones WHERE id IN ({','.join('?' * len(trozo))})",
+            trozo,
+        ):
+            dept_por_id[row["id"]] = row["departamento"]
+    agg = {}
+    for v in visitas:
+        dep = dept_por_id.get(v["oposicion_id"])
+        if dep:
+            agg[dep] = agg.get(dep, 0) + v["total_visitas"]
+    return sorted(agg.items(), key=lambda x: x[1], reverse=True)
+
+
+def favoritas_todas_in(users_db, boe_db, page):
+    ids = [
+        r["oposicion_id"] for r in users_db.execute(
+            "SELECT oposicion_id FROM favoritas WHERE user_id = 1 ORDER BY fecha_favorito DESC"
+        )
+    ]
+    filas = boe_db.execute(
+        f"SELECT * FROM vista_oposiciones WHERE id IN ({','.join('?' * len(ids))})", ids
+    ).fetchall()
+    por_id = {row["id"]: row for row in filas}
+    ordenadas = [por_id[i] for i in ids if i in por_id]
+    return ordenadas[(page - 1) * POR_PAGINA:page * POR_PAGINA]
+
+
+# -------- Ahora: JOIN con boe.oposiciones (app/queries.py) --------
+def estadisticas_join(users_db, boe_db):
+    from app.queries import visitas_por_departamento
+
+    return visitas_por_departamento(users_db)
+
+
+def favoritas_pagina_in(users_db, boe_db, page, cursor):
+    """Keyset sobre `favoritas` y luego IN con los ids de la página."""
+    from app.paginacion import paginar
+
+    pagina = paginar(
+        users_db, "SELECT id, oposicion_id, fecha_favorito",
+        "FROM favoritas WHERE user_id = ?", [1], ("fecha_favorito", "id"),
+        page=page, cursor=cursor, contexto="favoritas",
+    )
+    ids = [r["oposicion_id"] for r in pagina.filas]
+    filas = boe_db.execute(
+        f"SELECT * FROM vista_oposiciones WHERE id IN ({','.join('?' * len(ids))})", ids
+    ).fetchall()
+    por_id = {row["id"]: row for row in filas}
+    return [por_id[i] for i in ids if i in por_id]
+
+
+def medir(funcion, repeticiones):
+    tiempos = []
+    resultado = None
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        try:
+            resultado = funcion()
+        except sqlite3.OperationalError as e:
+            return None, str(e)
+        tiempos.append((time.perf_counter() - inicio) * 1000)
+    return statistics.median(tiempos), resultado
+
+
+def conectar(ruta, adjunta=None):
+    db = sqlite3.connect(ruta)
+    db.row_factory = sqlite3.Row
+    if adjunta:
+        db.execute("ATTACH DATABASE ? AS boe", (adjunta,))
+    return db
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--visitas", type=int, default=1_000_000)
+    parser.add_argument("--oposiciones", type=int, default=300_000)
+    parser.add_argument("--favoritas", type=int, default=5000)
+    parser.add_argument("--repeticiones", type=int, default=5)
+    args = parser.parse_args()
+
+    from app.queries import listar_favoritas
+
+    with tempfile.TemporaryDirectory() as tmp:
+        ruta_boe = os.path.join(tmp, "bench.db")
+        ruta_users = os.path.join(tmp, "usuarios.db")
+        inicio = time.perf_counter()
+        poblar_boe(ruta_boe, args.oposiciones)
+        poblar_usuarios(ruta_users, args.visitas, args.oposiciones, args.favoritas)
+        boe_db = conectar(ruta_boe)
+        users_db = conectar(ruta_users, adjunta=ruta_boe)
+        users_db.execute(
+            "CREATE INDEX idx_favoritas_usuario_fecha ON favoritas(user_id, fecha_favorito)"
+        )
+        users_db.execute("CREATE INDEX idx_visitas_oposicion ON visitas(oposicion_id)")
+        users_db.execute("ANALYZE")
+        users_db.commit()
+        visitas = users_db.execute("SELECT COUNT(*) FROM visitas").fetchone()[0]
+        distintas = users_db.execute(
+            "SELECT COUNT(DISTINCT oposicion_id) FROM visitas"
+        ).fetchone()[0]
+        print(
+            f"{visitas} visitas a {distintas} oposiciones distintas, {args.oposiciones} "
+            f"oposiciones ({time.perf_counter() - inicio:.1f} s en generar)"
+        )
+
+        print("estadísticas (visitas por departamento)")
+        for nombre, funcion in (
+            ("IN (...)", estadisticas_in),
+            ("IN (...) por bloques", estadisticas_in_bloques),
+            ("JOIN boe.", estadisticas_join),
+        ):
+            ms, resultado = medir(lambda: funcion(users_db, boe_db), args.repeticiones)
+            if ms is None:
+                print(f"  {nombre:<22} falla: {resultado}")
+            else:
+                print(f"  {nombre:<22} {ms:9.1f} ms  ({len(resultado)} departamentos)")
+
+        # Cursor de la página 100 recorriendo las anteriores con JOIN
+        cursor = None
+        for _ in range(99):
+            cursor = listar_favoritas(users_db, 1, cursor=cursor).siguiente
+        print(f"favoritas ({args.favoritas} del usuario)")
+        for page, cur in ((1, None), (100, cursor)):
+            casos = (
+                ("todas a Python + IN", lambda: favoritas_todas_in(users_db, boe_db, page)),
+                ("página + IN", lambda: favoritas_pagina_in(users_db, boe_db, page, cur)),
+                ("JOIN boe.", lambda: listar_favoritas(users_db, 1, page=page, cursor=cur).filas),
+            )
+            for nombre, funcion in casos:
+                ms, resultado = medir(funcion, args.repeticiones)
+                if ms is None:
+                    print(f"  pág. {page:<3} {nombre:<22} falla: {resultado}")
+                else:
+                    ids = [r["id"] for r in resultado]
+                    print(f"  pág. {page:<3} {nombre:<22} {ms:9.2f} ms  {ids[:3]}")
+
+
+if __name__ == "__main__":
+    main()
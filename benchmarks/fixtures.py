@@ -0,0 +1,138 @@
+"""
+Generación de sumarios sintéticos del BOE para los benchmarks.
+
+Imitan la forma del XML de la API de datos abiertos
+(/datosabiertos/api/boe/sumario/AAAAMMDD): varias secciones, departamentos
+con y sin <epigrafe>, y una sección 2B con decenas de items.
+Si existen sumarios grabados (ver `cargar_grabados`) se usan esos.
+"""
+
+import os
+import random
+from datetime import date, timedelta
+from xml.sax.saxutils import escape
+
+DEPARTAMENTOS = [
+    "ADMINISTRACIÓN LOCAL",
+    "UNIVERSIDADES",
+    "MINISTERIO DE HACIENDA",
+    "MINISTERIO DEL INTERIOR",
+    "MINISTERIO DE DEFENSA",
+    "MINISTERIO DE SANIDAD",
+    "MINISTERIO DE CULTURA",
+    "COMUNIDAD AUTÓNOMA DE ANDALUCÍA",
+    "COMUNIDAD DE MADRID",
+    "CONSEJO GENERAL DEL PODER JUDICIAL",
+]
+
+LUGARES = [
+    "Lorca (Murcia)", "Alcorcón (Madrid)", "Getxo (Bizkaia)", "Sevilla",
+    "Ourense", "Vigo (Pontevedra)", "Elche (Alicante)", "Teruel",
+    "Santa Cruz de Tenerife", "Reus (Tarragona)", "Ponferrada (León)",
+]
+
+SECCIONES = [("1", 60), ("2A", 40), ("2B", 45), ("3", 120), ("4", 10), ("5A", 80)]
+
+
+TITULOS = [
+    "Resolución de {dia} de octubre, del Ayuntamiento de {lugar}, referente a "
+    "la convocatoria para proveer {plazas} plazas.",
+    "Resolución de {dia} de octubre, del Ayuntamiento de {municipio}, referente "
+    "a la convocatoria para proveer {plazas} plazas.",
+    "Resolución de {dia} de octubre, de la Subsecretaría, por la que se convoca "
+    "proceso selectivo para ingreso en el Cuerpo de TÉCNICOS AUXILIARES DE INFORMÁTICA.",
+    "Resolución de {dia} de octubre, de la Universidad de {universidad}, por la que "
+    "se convoca concurso de acceso a plazas de cuerpos docentes universitarios.",
+    "Orden de {dia} de octubre, de la Consejería de Sanidad de Castilla y León, "
+    "por la que se convoca proceso selectivo.",
+]
+
+MUNICIPIOS = ["Getxo", "Alcalá de Henares", "Vigo", "Reus", "Las Rozas de Madrid",
+              "El Ejido", "Calvià", "Ponferrada"]
+
+UNIVERSIDADES = ["Granada", "Oviedo", "Santiago de Compostela", "Lleida",
+                 "Castilla-La Mancha", "Alcalá"]
+
+
+def _item(fecha_str, n, rnd):
+    titulo = rnd.choice(TITULOS).format(
+        dia=rnd.randint(1, 28),
+        lugar=rnd.choice(LUGARES),
+        municipio=rnd.choice(MUNICIPIOS),
+        universidad=rnd.choice(UNIVERSIDADES),
+        plazas=rnd.randint(1, 9),
+    )
+    ident = f"BOE-A-{fecha_str[:4]}-{fecha_str[4:]}{n:05d}"
+    return (
+        "<item>"
+        f"<identificador>{ident}</identificador>"
+        f"<control>{rnd.randint(1000, 9999)}/{fecha_str[:4]}</control>"
+        f"<titulo>{escape(titulo)}</titulo>"
+        f'<url_pdf szBytes="1234" szKBytes="1">https://www.boe.es/boe/dias/{fecha_str}/pdfs/{ident}.pdf</url_pdf>'
+        f"<url_html>https://www.boe.es/diario_boe/txt.php?id={ident}</url_html>"
+        f"<url_xml>https://www.boe.es/diario_boe/xml.php?id={ident}</url_xml>"
+        "</item>"
+    )
+
+
+def sumario_sintetico(fecha: date, semilla: int = 0) -> bytes:
+    rnd = random.Random(fecha.toordinal() * 31 + semilla)
+    fecha_str = fecha.strftime("%Y%m%d")
+    partes = [
+        '<?xml version="1.0" encoding="utf-8"?>',
+        "<response><status><code>200</code><text>ok</text></status><data><sumario>",
+        f"<metadatos><publicacion>BOE</publicacion><fecha_publicacion>{fecha_str}</fecha_publicacion></metadatos>",
+        '<diario numero="1">',
+    ]
+    n = 0
+    for codigo, total in SECCIONES:
+        partes.append(f'<seccion codigo="{codigo}" nombre="Sección {codigo}">')
+        por_dep = max(1, total // len(DEPARTAMENTOS))
+        for i, dep in enumerate(DEPARTAMENTOS):
+            partes.append(f'<departamento codigo="{i}" nombre="{escape(dep)}">')
+            con_epigrafe = i % 2 == 0
+            if con_epigrafe:
+                partes.append('<epigrafe nombre="Personal funcionario y laboral">')
+            for _ in range(por_dep):
+                n += 1
+                partes.append(_item(fecha_str, n, rnd))
+            if con_epigrafe:
+                partes.append("</epigrafe>")
+            partes.append("</departamento>")
+        partes.append("</seccion>")
+    partes.append("</diario></sumario></data></response>")
+    return "".join(partes).encode("utf-8")
+
+
+def dias_publicados(desde: date, dias: int):
+    """Devuelve `dias` fechas con edición del BOE (sin domingos) desde `desde`."""
+    fechas = []
+    actual = desde
+    while len(fechas) < dias:
+        if actual.weekday() != 6:
+            fechas.append(actual)
+        actual += timedelta(days=1)
+    return fechas
+
+
+def cargar_grabados(directorio: str):
+    """Lee sumarios grabados (`AAAAMMDD.xml`) de `directorio` -> {date: bytes}."""
+    sumarios = {}
+    if not directorio or not os.path.isdir(directorio):
+        return sumarios
+    for nombre in sorted(os.listdir(directorio)):
+        base, ext = os.path.splitext(nombre)
+        if ext != ".xml" or len(base) != 8 or not base.isdigit():
+            continue
+        fecha = date(int(base[:4]), int(base[4:6]), int(base[6:]))
+        with open(os.path.join(directorio, nombre), "rb") as f:
+            sumarios[fecha] = f.read()
+    return sumarios
+
+
+def sumarios(directorio: str | None, dias: int, desde: date = date(2025, 1, 2)):
+    """Sumarios grabados si los hay; si no, `dias` sumarios sintéticos."""
+    grabados = cargar_grabados(directorio)
+    if grabados:
+        return grabados
+    return {f: sumario_sintetico(f) for f in dias_publicados(desde, dias)}
@@ -0,0 +1,91 @@
+"""
+Graba sumarios reales del BOE como fixtures (`AAAAMMDD.xml`) para los
+benchmarks y el servidor local (`benchmarks.servidor_boe`).
+
+    python -m benchmarks.grabar_sumarios --desde 2025-01-02 [--hasta 2025-01-31]
+                                         [--dir fixtures/sumarios] [--workers 2]
+
+Usa el mismo `BoeClient` que la app (reintentos, límite adaptativo) contra
+BOE_SUMARIO_URL o la API real. Los días ya grabados no se vuelven a pedir
+salvo con --sobrescribir; los días sin sumario (domingos, festivos) no
+generan fichero.
+"""
+
+import argparse
+import os
+from datetime import date, datetime, timedelta
+
+from app.scraping.boe_client import (
+    BOE_SUMARIO_URL,
+    ESTADO_ERROR,
+    ESTADO_OK,
+    BoeClient,
+)
+from app.scraping.boe_scraper import descargar_sumarios
+from app.scraping.sync_log import hay_edicion
+
+
+def _fecha(texto: str) -> date:
+    return datetime.strptime(texto, "%Y-%m-%d").date()
+
+
+def grabar(desde: date, hasta: date, directorio: str, workers: int = 2,
+           sobrescribir: bool = False, url: str | None = None):
+    """Descarga los sumarios entre `desde` y `hasta` y los guarda en `directorio`."""
+    os.makedirs(directorio, exist_ok=True)
+
+    def ruta(fecha):
+        return os.path.join(directorio, fecha.strftime("%Y%m%d") + ".xml")
+
+    fechas = []
+    actual = desde
+    while actual <= hasta:
+        if hay_edicion(actual) and (sobrescribir or not os.path.exists(ruta(actual))):
+            fechas.append(actual)
+        actual += timedelta(days=1)
+
+    grabados = sin_sumario = fallidos = 0
+    url = url or os.getenv("BOE_SUMARIO_URL", BOE_SUMARIO_URL)
+    with BoeClient(url=url, max_conexiones=workers) as client:
+        for resultado in descargar_sumarios(fechas, workers, client):
+            if resultado.estado == ESTADO_OK:
+                # Escritura atómica: un corte no deja un XML a medias
+                temporal = ruta(resultado.fecha) + ".tmp"
+                with open(temporal, "wb") as f:
+                    f.write(resultado.contenido)
+                os.replace(temporal, ruta(resultado.fecha))
+                grabados += 1
+                print(f"{resultado.fecha}: {len(resultado.contenido) / 1024:.0f} KB")
+            elif resultado.estado == ESTADO_ERROR:
+                fallidos += 1
+                print(f"{resultado.fecha}: error ({resultado.error})")
+            else:
+                sin_sumario += 1
+
+    print(
+        f"{grabados} sumarios grabados en {directorio}, "
+        f"{sin_sumario} días sin sumario, {fallidos} con error"
+    )
+    return grabados
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--desde", type=_fecha, required=True)
+    parser.add_argument("--hasta", type=_fecha, default=None)
+    parser.add_argument("--dir", default=os.path.join("fixtures", "sumarios"))
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--sobrescribir", action="store_true")
+    args = parser.parse_args()
+
+    grabar(
+        args.desde,
+        args.hasta or args.desde,
+        args.dir,
+        workers=args.workers,
+        sobrescribir=args.sobrescribir,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,257 @@
+"""
+Servidor HTTP local que imita la API de sumarios del BOE
+(`/datosabiertos/api/boe/sumario/AAAAMMDD`) para probar y medir el scraper
+sin tocar boe.es.
+
+    python -m benchmarks.servidor_boe [--dir fixtures/sumarios] [--puerto 8001]
+                                      [--latencia 50] [--jitter 20]
+                                      [--errores 0.05] [--cortes 0.01]
+
+Sirve sumarios grabados (`AAAAMMDD.xml`, ver `benchmarks.grabar_sumarios`)
+o, sin --dir, sintéticos generados al vuelo. Los domingos y las fechas sin
+sumario devuelven 404, como la API real. Responde con ETag y atiende
+If-None-Match (304). Se puede inyectar latencia, errores 429/5xx y cortes
+de conexión. Al arrancar imprime la URL para BOE_SUMARIO_URL.
+"""
+
+import argparse
+import random
+import re
+import socket
+import threading
+import time
+from collections import Counter
+from datetime import date
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from benchmarks.fixtures import cargar_grabados, sumario_sintetico
+
+RUTA_SUMARIO = re.compile(r"^/datosabiertos/api/boe/sumario/(\d{8})/?$")
+
+
+def fuente_sintetica(semilla: int = 0):
+    """Sumario sintético para cualquier día con edición (no domingos)."""
+
+    def fuente(fecha: date):
+        if fecha.weekday() == 6:
+            return None
+        return sumario_sintetico(fecha, semilla)
+
+    return fuente
+
+
+def fuente_grabada(directorio: str, ciclica: bool = False):
+    """
+    Sumarios grabados en `directorio`. Con `ciclica=True` cualquier día con
+    edición recibe uno de los grabados (rotando), útil para reproducir rangos
+    más largos que lo grabado; los identificadores se repiten entre días.
+    """
+    grabados = cargar_grabados(directorio)
+    if not grabados:
+        raise SystemExit(f"No hay sumarios grabados en {directorio!r}")
+    orden = [grabados[f] for f in sorted(grabados)]
+
+    def fuente(fecha: date):
+        if fecha in grabados:
+            return grabados[fecha]
+        if ciclica and fecha.weekday() != 6:
+            return orden[fecha.toordinal() % len(orden)]
+        return None
+
+    return fuente
+
+
+class ServidorBoe:
+    """
+    Servidor de sumarios en un hilo, para usar en benchmarks:
+
+        with ServidorBoe(fuente_sintetica(), latencia=0.05) as servidor:
+            os.environ["BOE_SUMARIO_URL"] = servidor.url
+
+    - `latencia` / `jitter`: segundos de espera por petición (latencia ± jitter).
+    - `errores`: probabilidad de responder `estado_error` (con Retry-After: 0).
+    - `cortes`: probabilidad de cerrar la conexión sin responder.
+    - `peticiones`, `respuestas_304`, `errores_inyectados`, `cortes_inyectados`:
+      contadores para comprobar qué ha pedido el cliente, y
+      `peticiones_por_fecha` (Counter) las de cada sumario.
+    """
+
+    def __init__(self, fuente, host: str = "127.0.0.1", puerto: int = 0,
+                 latencia: float = 0.0, jitter: float = 0.0,
+                 errores: float = 0.0, estado_error: int = 503,
+                 cortes: float = 0.0, semilla: int | None = None):
+        self.fuente = fuente
+        self.latencia = latencia
+        self.jitter = jitter
+        self.errores = errores
+        self.estado_error = estado_error
+        self.cortes = cortes
+        self._random = random.Random(semilla)
+        self._lock = threading.Lock()
+        self._cache = {}
+        self.reiniciar_contadores()
+
+        servidor = self
+
+        class Manejador(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self):
+                servidor._atender(self)
+
+            def log_message(self, *args):
+                pass
+
+        self._http = ThreadingHTTPServer((host, puerto), Manejador)
+        self._http.daemon_threads = True
+        self._hilo = None
+
+    @property
+    def url(self) -> str:
+        host, puerto = self._http.server_address[:2]
+        return f"http://{host}:{puerto}/datosabiertos/api/boe/sumario/{{fecha}}"
+
+    def reiniciar_contadores(self):
+        with self._lock:
+            self.peticiones = 0
+            self.respuestas_304 = 0
+            self.errores_inyectados = 0
+            self.cortes_inyectados = 0
+            self.peticiones_por_fecha = Counter()
+
+    def iniciar(self):
+        self._hilo = threading.Thread(
+            target=self._http.serve_forever, name="servidor-boe", daemon=True
+        )
+        self._hilo.start()
+        return self
+
+    def detener(self):
+        self._http.shutdown()
+        self._http.server_close()
+
+    def __enter__(self):
+        return self.iniciar()
+
+    def __exit__(self, *exc):
+        self.detener()
+
+    def _sorteo(self, probabilidad: float) -> bool:
+        if probabilidad <= 0:
+            return False
+        with self._lock:
+            return self._random.random() < probabilidad
+
+    def _contenido(self, fecha: date):
+        # La fuente sintética es cara: cada día se genera una sola vez
+        with self._lock:
+            if fecha in self._cache:
+                return self._cache[fecha]
+        contenido = self.fuente(fecha)
+        with self._lock:
+            self._cache[fecha] = contenido
+        return contenido
+
+    def _atender(self, peticion: BaseHTTPRequestHandler):
+        with self._lock:
+            self.peticiones += 1
+        if self.latencia or self.jitter:
+            espera = self.latencia + random.uniform(-self.jitter, self.jitter)
+            time.sleep(max(0.0, espera))
+
+        if self._sorteo(self.cortes):
+            with self._lock:
+                self.cortes_inyectados += 1
+            peticion.close_connection = True
+            try:
+                peticion.connection.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+            return
+
+        if self._sorteo(self.errores):
+            with self._lock:
+                self.errores_inyectados += 1
+            self._responder(peticion, self.estado_error, cabeceras={"Retry-After": "0"})
+            return
+
+        m = RUTA_SUMARIO.match(peticion.path.split("?", 1)[0])
+        if m is None:
+            self._responder(peticion, 404)
+            return
+        f = m.group(1)
+        try:
+            fecha = date(int(f[:4]), int(f[4:6]), int(f[6:]))
+        except ValueError:
+            self._responder(peticion, 400)
+            return
+        with self._lock:
+            self.peticiones_por_fecha[fecha] += 1
+
+        contenido = self._contenido(fecha)
+        if contenido is None:
+            self._responder(peticion, 404)
+            return
+
+        etag = f'"{f}-{len(contenido)}"'
+        if peticion.headers.get("If-None-Match") == etag:
+            with self._lock:
+                self.respuestas_304 += 1
+            self._responder(peticion, 304, cabeceras={"ETag": etag})
+            return
+        self._responder(
+            peticion,
+            200,
+            contenido,
+            {"ETag": etag, "Content-Type": "application/xml; charset=utf-8"},
+        )
+
+    @staticmethod
+    def _responder(peticion, estado: int, cuerpo: bytes = b"", cabeceras=None):
+        peticion.send_response(estado)
+        for nombre, valor in (cabeceras or {}).items():
+            peticion.send_header(nombre, valor)
+        if estado != 304:
+            peticion.send_header("Content-Length", str(len(cuerpo)))
+        peticion.end_headers()
+        if cuerpo:
+            peticion.wfile.write(cuerpo)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--dir", help="directorio con sumarios grabados")
+    parser.add_argument("--ciclico", action="store_true",
+                        help="servir los grabados en rotación para cualquier fecha")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--puerto", type=int, default=8001)
+    parser.add_argument("--latencia", type=float, default=0, help="ms por petición")
+    parser.add_argument("--jitter", type=float, default=0, help="± ms")
+    parser.add_argument("--errores", type=float, default=0, help="probabilidad de 5xx")
+    parser.add_argument("--estado-error", type=int, default=503)
+    parser.add_argument("--cortes", type=float, default=0,
+                        help="probabilidad de cortar la conexión")
+    args = parser.parse_args()
+
+    fuente = fuente_grabada(args.dir, args.ciclico) if args.dir else fuente_sintetica()
+    servidor = ServidorBoe(
+        fuente,
+        host=args.host,
+        puerto=args.puerto,
+        latencia=args.latencia / 1000,
+        jitter=args.jitter / 1000,
+        errores=args.errores,
+        estado_error=args.estado_error,
+        cortes=args.cortes,
+    )
+    print(f"BOE_SUMARIO_URL={servidor.url}")
+    try:
+        servidor._http.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        servidor._http.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -2,7 +2,7 @@ import os
 import time
 from datetime import datetime
 from app import create_app
-from app.db import get_users_db, get_boe_db
+from app.repositorio import get_repositorio
 from app.email_utils import send_new_oposiciones_email
 from app.scraping.boe_scraper import sync_boe_hasta_hoy
 
@@ -31,10 +31,10 @@ def job_diario():
                 print(f"   ⚠️ Error al conectar con el BOE: {e}")
 
             # 2. GESTIÓN DE ENVÍO DE EMAILS
-            users_db = get_users_db()
-            boe_db = get_boe_db()
+            repositorio = get_repositorio()
 
-            suscripciones = users_db.execute("SELECT * FROM suscripciones WHERE alerta_diaria = 1").fetchall()
+            # Una consulta con el correo y los departamentos de cada suscrito
+            suscripciones = repositorio.suscripciones_pendientes()
             
             if not suscripciones:
                 print("📭 Nadie tiene activadas las alertas diarias hoy.")
@@ -43,27 +43,11 @@ def job_diario():
             print(f"👥 Procesando {len(suscripciones)} usuarios suscritos...")
 
             for sub in suscripciones:
-                user_id = sub['user_id']
-                filtros_str = sub['departamento_filtro']
+                filtros_str = ", ".join(sub.departamentos) or "Todos"
+                email = sub.email
                 
-                user = users_db.execute("SELECT email FROM users WHERE id = ?", (user_id,)).fetchone()
-                if not user: continue
-                email = user['email']
-                
-                # Construimos la consulta
-                sql = "SELECT * FROM oposiciones WHERE fecha = ?"
-                params = [FECHA_BUSQUEDA]
-
-                if filtros_str and filtros_str != "Todos":
-                    clean_str = filtros_str.replace("[", "").replace("]", "").replace("'", "").replace('"', "")
-                    lista_depts = [d.strip() for d in clean_str.split(',') if d.strip()]
-                    
-                    if lista_depts:
-                        placeholders = ','.join(['?'] * len(lista_depts))
-                        sql += f" AND departamento IN ({placeholders})"
-                        params.extend(lista_depts)
-                
-                rows = boe_db.execute(sql, params).fetchall()
+                # Oposiciones de hoy de sus departamentos (JOIN con la BBDD del BOE adjunta)
+                rows = repositorio.oposiciones_suscripcion(sub.user_id, fecha=FECHA_BUSQUEDA)
                 oposiciones = [dict(row) for row in rows]
 
                 if oposiciones:
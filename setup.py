@@ -18,6 +18,7 @@ setup(
         "Jinja2==3.1.3",
         "click==8.1.7",
         "MarkupSafe==2.1.5",
+        "Pillow==11.3.0",
     ],
     entry_points={
         "console_scripts": [
@@ -0,0 +1,95 @@
+import contextlib
+import io
+from datetime import date, timedelta
+
+import pytest
+
+from app import create_app
+
+
+def crear_app_prueba(directorio, **config):
+    """App con las dos BBDD en `directorio` y sin tareas en segundo plano."""
+    config = {
+        "TESTING": True,
+        "BOE_DB_PATH": str(directorio / "oposiciones.db"),
+        "USERS_DB_PATH": str(directorio / "usuarios.db"),
+        "BOE_CACHE_DIR": "",
+        "BOE_REFRESCO_INTERVALO": 0,
+        "DB_AUTO_UPGRADE": True,
+        **config,
+    }
+    with contextlib.redirect_stdout(io.StringIO()):
+        return create_app(config)
+
+
+def cerrar_app(app):
+    for pool in app.extensions.get("db_pools", {}).values():
+        pool.cerrar()
+    repositorio = app.extensions.get("repositorio")
+    if getattr(repositorio, "motor", None) is not None:
+        repositorio.motor.dispose()
+
+
+@pytest.fixture
+def app(tmp_path):
+    app = crear_app_prueba(tmp_path)
+    yield app
+    cerrar_app(app)
+
+
+@pytest.fixture(params=["sqlite", "sqlalchemy"])
+def app_backend(request, tmp_path):
+    """Como `app`, una vez con cada DB_BACKEND."""
+    if request.param == "sqlalchemy":
+        pytest.importorskip("sqlalchemy")
+    app = crear_app_prueba(tmp_path, DB_BACKEND=request.param)
+    yield app
+    cerrar_app(app)
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+def fila_oposicion(i, departamento="MINISTERIO DE HACIENDA", dias_atras=0,
+                   provincia=None, titulo=None):
+    fecha = (date.today() - timedelta(days=dias_atras)).strftime("%Y%m%d")
+    return {
+        "identificador": f"BOE-A-TEST-{i}",
+        "control": f"control {i}",
+        "titulo": titulo or f"Convocatoria de prueba {i}",
+        "url_html": f"https://www.boe.es/diario_boe/txt.php?id=BOE-A-TEST-{i}",
+        "url_pdf": None,
+        "departamento": departamento,
+        "fecha": fecha,
+        "provincia": provincia,
+    }
+
+
+@pytest.fixture
+def insertar(app):
+    """insertar(filas): guarda oposiciones en la BBDD del BOE del `app`."""
+    from app.db import get_boe_db
+    from app.scraping.boe_scraper import insertar_oposiciones
+
+    def insertar(filas):
+        with app.app_context():
+            return insertar_oposiciones(get_boe_db(), list(filas))
+
+    return insertar
+
+
+def iniciar_sesion(app, client, email="ana@example.com", password="clave-de-prueba"):
+    """Da de alta un usuario, inicia sesión con `client` y devuelve su id."""
+    from werkzeug.security import generate_password_hash
+
+    from app.repositorio import get_repositorio
+
+    with app.app_context():
+        user_id = get_repositorio().crear_usuario(
+            email, generate_password_hash(password), name="Ana"
+        )
+    respuesta = client.post("/login", data={"email": email, "password": password})
+    assert respuesta.status_code == 302
+    return user_id
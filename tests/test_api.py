@@ -0,0 +1,50 @@
+from datetime import date, timedelta
+
+import pytest
+
+from conftest import fila_oposicion
+
+URL = "/api/v1/oposiciones"
+
+
+@pytest.fixture
+def bomberos(insertar):
+    insertar([
+        fila_oposicion(
+            i, dias_atras=i % 7,
+            titulo=f"Convocatoria de bomberos {'bomberos ' * (i % 3)}número {i}",
+        )
+        for i in range(13)
+    ] + [fila_oposicion(100 + i) for i in range(4)])
+
+
+@pytest.mark.parametrize("valor", ["2025-13-45", "20251301", "2025-02-30", "2025-1-5", "ayer"])
+def test_fecha_no_valida_da_400(client, valor):
+    respuesta = client.get(URL, query_string={"fecha_desde": valor})
+    assert respuesta.status_code == 400
+    assert "fecha_desde" in respuesta.get_json()["error"]
+
+
+@pytest.mark.parametrize("formato", ["%Y-%m-%d", "%Y%m%d"])
+def test_fecha_valida_en_los_dos_formatos(client, bomberos, formato):
+    hasta = (date.today() - timedelta(days=3)).strftime(formato)
+    datos = client.get(URL, query_string={"fecha_hasta": hasta, "limite": 100}).get_json()
+    assert datos["total"] == 13 - 6  # días_atras 3..6 de las 13 de bomberos
+
+
+def test_relevancia_pagina_con_cursor(client, bomberos):
+    consulta = {"busqueda": "bomberos", "orden": "relevancia", "limite": 5, "campos": "identificador"}
+    todas = client.get(URL, query_string={**consulta, "limite": 100}).get_json()["oposiciones"]
+    assert len(todas) == 13
+
+    paginas = [client.get(URL, query_string=consulta).get_json()]
+    while paginas[-1]["siguiente"]:
+        paginas.append(
+            client.get(URL, query_string={**consulta, "cursor": paginas[-1]["siguiente"]}).get_json()
+        )
+    assert [p["pagina"] for p in paginas] == [1, 2, 3]
+    # Las mismas filas y en el mismo orden (por relevancia) que de una vez
+    assert [f for p in paginas for f in p["oposiciones"]] == todas
+
+    anterior = client.get(URL, query_string={**consulta, "cursor": paginas[-1]["anterior"]})
+    assert anterior.get_json()["oposiciones"] == paginas[1]["oposiciones"]
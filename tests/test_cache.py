@@ -0,0 +1,109 @@
+from urllib.parse import quote
+
+import pytest
+
+from app.routes import main as rutas_main
+from app.routes import user as rutas_user
+from conftest import cerrar_app, crear_app_prueba, fila_oposicion, iniciar_sesion
+
+HACIENDA = "MINISTERIO DE HACIENDA"
+
+
+@pytest.fixture
+def app(tmp_path):
+    # Sin las cachés de páginas y consultas: cada 200 pasa por la vista
+    app = crear_app_prueba(tmp_path, CACHE_PAGINAS_TAMANO=0, CACHE_CONSULTAS_TAMANO=0)
+    yield app
+    cerrar_app(app)
+
+
+@pytest.fixture
+def renderizados(monkeypatch):
+    """Plantillas renderizadas por las vistas de listado (main y user)."""
+    nombres = []
+    for modulo in (rutas_main, rutas_user):
+        original = modulo.render_template
+
+        def contar(plantilla, *a, _original=original, **kw):
+            nombres.append(plantilla)
+            return _original(plantilla, *a, **kw)
+
+        monkeypatch.setattr(modulo, "render_template", contar)
+    return nombres
+
+
+def _pedir(client, url, etag=None):
+    cabeceras = {"If-None-Match": f'"{etag}"'} if etag else {}
+    return client.get(url, headers=cabeceras)
+
+
+def test_if_none_match_da_304_sin_llamar_a_la_vista(client, insertar, renderizados):
+    insertar([fila_oposicion(1, HACIENDA)])
+    url = "/departamento/" + quote(HACIENDA)
+
+    primera = _pedir(client, url)
+    assert primera.status_code == 200
+    etag, _ = primera.get_etag()
+    assert etag and renderizados == ["tarjeta.html"]
+    assert primera.cache_control.public
+
+    respuesta = _pedir(client, url, etag)
+    assert respuesta.status_code == 304
+    assert respuesta.get_etag() == (etag, False)
+    assert not respuesta.data
+    assert renderizados == ["tarjeta.html"]  # la vista no se llamó
+
+    # Otro ETag (o ninguno): la vista responde con la página entera
+    assert _pedir(client, url, "otro").status_code == 200
+    assert renderizados == ["tarjeta.html"] * 2
+
+
+def test_etag_cambia_al_subir_ingest_version(client, insertar):
+    insertar([fila_oposicion(1, HACIENDA)])
+    url = "/departamento/" + quote(HACIENDA)
+    etag, _ = _pedir(client, url).get_etag()
+
+    insertar([fila_oposicion(2, HACIENDA)])
+
+    respuesta = _pedir(client, url, etag)
+    assert respuesta.status_code == 200
+    assert respuesta.get_etag()[0] != etag
+    assert b"BOE-A-TEST-2" in respuesta.data
+
+
+def test_etag_cambia_al_subir_version_usuario(app, client, insertar, renderizados):
+    ids = [fila["id"] for fila in insertar([fila_oposicion(1, HACIENDA)])]
+    iniciar_sesion(app, client)
+    url = "/user_oposiciones"
+    # La primera muestra el flash del login, y con flash no hay ETag
+    assert not _pedir(client, url).get_etag()[0]
+
+    primera = _pedir(client, url)
+    assert primera.status_code == 200
+    assert primera.cache_control.private and primera.cache_control.no_cache
+    etag, _ = primera.get_etag()
+    assert _pedir(client, url, etag).status_code == 304
+
+    # Marcar una favorita sube version_usuario: la página ya no es la misma
+    assert client.post(f"/toggle_favorito/{ids[0]}").get_json()["is_favorite"]
+    respuesta = _pedir(client, url, etag)
+    assert respuesta.status_code == 200
+    nuevo, _ = respuesta.get_etag()
+    assert nuevo != etag
+    assert renderizados.count("user_oposiciones.html") == 3
+
+    # Y otra oposición en el BOE sube ingest_version
+    insertar([fila_oposicion(2, HACIENDA)])
+    assert _pedir(client, url, nuevo).status_code == 200
+
+
+def test_etag_distinto_por_usuario(app, client, insertar):
+    insertar([fila_oposicion(1, HACIENDA)])
+    url = "/departamento/" + quote(HACIENDA)
+    anonimo, _ = _pedir(client, url).get_etag()
+
+    iniciar_sesion(app, client)
+    _pedir(client, url)  # muestra el flash del login
+    respuesta = _pedir(client, url, anonimo)
+    assert respuesta.status_code == 200
+    assert respuesta.get_etag()[0] != anonimo
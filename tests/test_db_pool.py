@@ -0,0 +1,16 @@
+from app.db_pool import PoolSQLite
+
+
+def test_pragmas_tambien_en_la_bbdd_adjunta(tmp_path):
+    pool = PoolSQLite(str(tmp_path / "usuarios.db"), synchronous="NORMAL",
+                      adjuntas={"boe": str(tmp_path / "oposiciones.db")})
+    conn = pool.adquirir()
+    try:
+        for esquema in ("main", "boe"):
+            # 1 = NORMAL (por defecto, 2 = FULL)
+            assert conn.execute(f"PRAGMA {esquema}.synchronous").fetchone()[0] == 1
+            assert conn.execute(f"PRAGMA {esquema}.journal_mode").fetchone()[0] == "wal"
+            assert conn.execute(f"PRAGMA {esquema}.cache_size").fetchone()[0] == -16 * 1024
+    finally:
+        pool.devolver(conn)
+        pool.cerrar()
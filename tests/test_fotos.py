@@ -0,0 +1,121 @@
+import io
+import struct
+
+import pytest
+
+from app.fotos import FotoNoValida, _gif_sin_metadatos, _jpeg_sin_metadatos
+
+XMP = b"<x:xmpmeta xmlns:x='adobe:ns:meta/'>secreto</x:xmpmeta>"
+
+
+def _segmento(marcador, cuerpo):
+    return bytes([0xFF, marcador]) + struct.pack(">H", len(cuerpo) + 2) + cuerpo
+
+
+def _exif(orden, orientacion):
+    """APP1 EXIF con la marca de la cámara y, si se da, la orientación."""
+    o = "<" if orden == b"II" else ">"
+    entradas = [(0x010F, 2, 8, struct.pack(o + "I", 8 + 2 + 12 * 2 + 4))]  # Make, ASCII
+    if orientacion is not None:
+        entradas.append((0x0112, 3, 1, struct.pack(o + "HH", orientacion, 0)))
+    ifd = struct.pack(o + "H", len(entradas)) + b"".join(
+        struct.pack(o + "HHI", *e[:3]) + e[3] for e in entradas
+    ) + struct.pack(o + "I", 0)
+    tiff = orden + struct.pack(o + "HI", 42, 8) + ifd + b"Marca X\0"
+    return _segmento(0xE1, b"Exif\0\0" + tiff)
+
+
+def _jpeg(*segmentos):
+    dqt = _segmento(0xDB, bytes(65))
+    return b"\xff\xd8" + b"".join(segmentos) + dqt + _segmento(0xDA, b"\0" * 10) + b"\x12\x34\xff\xd9"
+
+
+@pytest.mark.parametrize("orden", [b"II", b"MM"])
+def test_jpeg_conserva_solo_la_orientacion(orden):
+    datos = _jpeg(
+        _exif(orden, 6),
+        _segmento(0xE1, b"http://ns.adobe.com/xap/1.0/\0" + XMP),
+        _segmento(0xED, b"Photoshop 3.0\0IPTC"),
+        _segmento(0xFE, b"comentario"),
+    )
+    limpio = _jpeg_sin_metadatos(datos)
+
+    assert b"Marca X" not in limpio and b"secreto" not in limpio
+    assert b"IPTC" not in limpio and b"comentario" not in limpio
+    assert limpio.endswith(b"\x12\x34\xff\xd9")
+    o = "<" if orden == b"II" else ">"
+    inicio = limpio.index(b"Exif\0\0") + 6
+    tiff = limpio[inicio:]
+    assert tiff[:2] == orden
+    ifd = struct.unpack(o + "I", tiff[4:8])[0]
+    assert struct.unpack(o + "H", tiff[ifd:ifd + 2])[0] == 1
+    assert struct.unpack(o + "HHIH", tiff[ifd + 2:ifd + 12]) == (0x0112, 3, 1, 6)
+
+
+@pytest.mark.parametrize("orientacion", [None, 1])
+def test_jpeg_sin_giro_no_lleva_exif(orientacion):
+    limpio = _jpeg_sin_metadatos(_jpeg(_exif(b"II", orientacion)))
+    assert b"Exif" not in limpio
+    assert limpio == _jpeg()
+
+
+def test_jpeg_real_conserva_la_orientacion_para_pillow():
+    Image = pytest.importorskip("PIL.Image")
+    ImageOps = pytest.importorskip("PIL.ImageOps")
+    exif = Image.Exif()
+    exif[0x0112] = 6
+    exif[0x010F] = "Marca X"
+    buffer = io.BytesIO()
+    Image.new("RGB", (40, 20), "red").save(buffer, "JPEG", exif=exif)
+
+    limpio = _jpeg_sin_metadatos(buffer.getvalue())
+
+    imagen = Image.open(io.BytesIO(limpio))
+    assert dict(imagen.getexif()) == {0x0112: 6}
+    assert ImageOps.exif_transpose(imagen).size == (20, 40)
+
+
+def _extension(etiqueta, *bloques):
+    return b"\x21" + bytes([etiqueta]) + b"".join(bytes([len(b)]) + b for b in bloques) + b"\0"
+
+
+def _gif(*extensiones):
+    cabecera = b"GIF89a" + struct.pack("<HHBBB", 1, 1, 0x80, 0, 0) + b"\0\0\0\xff\xff\xff"
+    control = _extension(0xF9, b"\x00\x00\x00\x00")
+    imagen = b"\x2c" + struct.pack("<HHHHB", 0, 0, 1, 1, 0) + b"\x02\x02\x4c\x01\x00"
+    return cabecera + b"".join(extensiones) + control + imagen + b"\x3b"
+
+
+def test_gif_sin_xmp_ni_comentarios():
+    repetir = _extension(0xFF, b"NETSCAPE2.0", b"\x01\x00\x00")
+    datos = _gif(
+        repetir,
+        _extension(0xFF, b"XMP DataXMP", XMP),
+        _extension(0xFE, b"comentario"),
+    )
+    limpio = _gif_sin_metadatos(datos)
+
+    assert b"secreto" not in limpio and b"comentario" not in limpio
+    assert limpio == _gif(repetir)  # la repetición de la animación se queda
+
+
+def test_gif_real_sigue_abriendo_con_pillow():
+    Image = pytest.importorskip("PIL.Image")
+    buffer = io.BytesIO()
+    fotogramas = [Image.new("RGB", (8, 8), color) for color in ("red", "blue")]
+    fotogramas[0].save(buffer, "GIF", save_all=True, append_images=fotogramas[1:],
+                       loop=0, comment=b"comentario")
+    datos = buffer.getvalue()
+    assert b"comentario" in datos
+
+    limpio = _gif_sin_metadatos(datos)
+
+    assert b"comentario" not in limpio
+    imagen = Image.open(io.BytesIO(limpio))
+    assert imagen.n_frames == 2 and imagen.info.get("loop") == 0
+
+
+@pytest.mark.parametrize("datos", [b"GIF89a", _gif()[:-1], _gif()[:30]])
+def test_gif_incompleto_no_es_valido(datos):
+    with pytest.raises(FotoNoValida):
+        _gif_sin_metadatos(datos)
@@ -0,0 +1,63 @@
+from urllib.parse import quote
+
+import pytest
+
+from app.paginacion import codificar_cursor, contexto_cursor, leer_cursor
+from conftest import fila_oposicion
+
+HACIENDA = "MINISTERIO DE HACIENDA"
+DEFENSA = "MINISTERIO DE DEFENSA"
+
+
+@pytest.fixture
+def listado(insertar):
+    insertar(
+        [fila_oposicion(i, HACIENDA, dias_atras=i % 5) for i in range(6)]
+        + [fila_oposicion(100 + i, DEFENSA, dias_atras=i % 5) for i in range(6)]
+    )
+
+
+@pytest.mark.parametrize("k", [[{}, 1], [[1], 2], [None, 3], [1.5, 2]])
+def test_cursor_con_claves_que_no_son_valores_se_ignora(k):
+    contexto = contexto_cursor("fecha_desc", {})
+    token = codificar_cursor({"k": k, "p": 2, "t": 5, "d": "sig", "o": contexto})
+    assert leer_cursor(token, contexto, 2) is None
+
+
+@pytest.mark.parametrize("url", [
+    "/api/v1/oposiciones?limite=2&cursor={}",
+    "/departamento/" + quote(HACIENDA) + "?cursor={}",
+])
+def test_cursor_manipulado_no_da_error(client, listado, url):
+    token = codificar_cursor(
+        {"k": [{}, 1], "p": 2, "t": 5, "d": "sig", "o": contexto_cursor("fecha_desc", {})}
+    )
+    respuesta = client.get(url.format(token))
+    assert respuesta.status_code == 200
+
+
+def test_contexto_depende_de_los_filtros_no_de_su_orden():
+    a = contexto_cursor("fecha_desc", {"departamentos": ("B", "A", "A"), "provincia": ""})
+    b = contexto_cursor("fecha_desc", {"departamentos": ["A", "B"]})
+    assert a == b
+    assert a != contexto_cursor("fecha_desc", {"departamentos": ("A",)})
+    assert a != contexto_cursor("fecha_asc", {"departamentos": ("A", "B")})
+
+
+def test_cursor_de_otros_filtros_se_ignora(client, listado):
+    url = "/api/v1/oposiciones?limite=2&campos=identificador&departamentos="
+    hacienda = client.get(url + quote(HACIENDA)).get_json()
+    assert hacienda["siguiente"]
+    defensa = client.get(url + quote(DEFENSA)).get_json()
+
+    # El cursor de Hacienda con el filtro de Defensa: primera página de Defensa
+    mezcla = client.get(
+        url + quote(DEFENSA) + "&cursor=" + hacienda["siguiente"]
+    ).get_json()
+    assert mezcla["pagina"] == 1
+    assert mezcla["oposiciones"] == defensa["oposiciones"]
+
+    # Con sus filtros, el cursor sigue funcionando
+    siguiente = client.get(url + quote(HACIENDA) + "&cursor=" + hacienda["siguiente"]).get_json()
+    assert siguiente["pagina"] == 2
+    assert not set(map(tuple, siguiente["oposiciones"])) & set(map(tuple, hacienda["oposiciones"]))
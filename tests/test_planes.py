@@ -0,0 +1,35 @@
+import pytest
+
+from app.db import get_boe_db, get_users_db
+from app.queries import (
+    actualizar_estadisticas,
+    consultas_rutas,
+    es_recorrido_completo,
+    plan_consulta,
+)
+from conftest import fila_oposicion
+
+PROVINCIAS = ("Madrid", "Sevilla", "Valencia", None)
+
+
+@pytest.fixture(params=["vacia", "con datos"])
+def bbdd(request, app, insertar):
+    if request.param == "con datos":
+        insertar(
+            fila_oposicion(i, f"DEPARTAMENTO {i % 20}", dias_atras=i % 60,
+                           provincia=PROVINCIAS[i % len(PROVINCIAS)])
+            for i in range(3000)
+        )
+    with app.app_context():
+        actualizar_estadisticas(get_boe_db(), forzar=True)
+        yield {"boe": get_boe_db(), "users": get_users_db()}
+
+
+def test_ninguna_consulta_de_listado_recorre_una_tabla_entera(bbdd):
+    """Lo mismo que `flask boe planes`: falla si alguna consulta pierde su índice."""
+    recorridos = {}
+    for nombre_db, nombre, sql, params in consultas_rutas(bbdd["boe"]):
+        plan = plan_consulta(bbdd[nombre_db], sql, params)
+        if any(es_recorrido_completo(paso) for paso in plan):
+            recorridos[nombre] = plan
+    assert not recorridos
@@ -0,0 +1,166 @@
+from datetime import date, timedelta
+
+import pytest
+
+from app.repositorio import Filtros, get_repositorio
+from conftest import cerrar_app, crear_app_prueba, fila_oposicion
+
+BACKENDS = ("sqlite", "sqlalchemy")
+DEPARTAMENTOS = ("MINISTERIO DE HACIENDA", "MINISTERIO DE DEFENSA", "AYUNTAMIENTO DE SEVILLA")
+PROVINCIAS = ("Madrid", "Sevilla", None)
+CAMPOS = ("id", "identificador", "titulo", "departamento", "fecha", "provincia")
+POR_PAGINA = 7
+
+
+def _fecha(dias_atras):
+    return (date.today() - timedelta(days=dias_atras)).strftime("%Y%m%d")
+
+
+FILAS = [
+    fila_oposicion(
+        i, DEPARTAMENTOS[i % 3], dias_atras=i % 10, provincia=PROVINCIAS[(i // 3) % 3],
+        titulo=f"Convocatoria de plazas de bomberos {i}" if i % 4 == 0 else None,
+    )
+    for i in range(40)
+]
+
+LISTADOS = {
+    "todas": Filtros(),
+    "departamentos": Filtros(departamentos=DEPARTAMENTOS[:2]),
+    "desde + provincia": Filtros(desde=_fecha(5), provincia="Madrid"),
+    "hasta": Filtros(hasta=_fecha(3)),
+    "búsqueda": Filtros(busqueda="bomberos"),
+    "hoy": Filtros(fecha=_fecha(0)),
+}
+
+
+def _esperadas(filtros):
+    """Identificadores que deben salir con `filtros`, calculados en Python."""
+    return {
+        f["identificador"] for f in FILAS
+        if (not filtros.departamentos or f["departamento"] in filtros.departamentos)
+        and (not filtros.fecha or f["fecha"] == filtros.fecha)
+        and (not filtros.desde or f["fecha"] >= filtros.desde)
+        and (not filtros.hasta or f["fecha"] <= filtros.hasta)
+        and (not filtros.provincia or f["provincia"] == filtros.provincia)
+        and (not filtros.busqueda or filtros.busqueda in f["titulo"])
+    }
+
+
+def _filas(pagina):
+    return [tuple(fila[c] for c in CAMPOS) for fila in pagina.filas]
+
+
+def _recorrer(listar):
+    """Páginas recorridas con los cursores hacia delante y luego hacia atrás."""
+    pagina = listar(None)
+    adelante = [(pagina.page, pagina.total, _filas(pagina))]
+    while pagina.siguiente:
+        pagina = listar(pagina.siguiente)
+        adelante.append((pagina.page, pagina.total, _filas(pagina)))
+    atras = []
+    while pagina.anterior:
+        pagina = listar(pagina.anterior)
+        atras.append((pagina.page, _filas(pagina)))
+    return adelante, atras
+
+
+def escenario(backend, directorio):
+    """Lo mismo con un backend: listados, cursores, facetas, marcas y favoritas."""
+    from app.db import get_boe_db
+    from app.scraping.boe_scraper import insertar_oposiciones
+
+    app = crear_app_prueba(directorio, DB_BACKEND=backend)
+    try:
+        with app.app_context():
+            insertar_oposiciones(get_boe_db(), FILAS)
+            repositorio = get_repositorio()
+            resultado = {"listados": {}, "facetas": {}}
+            for nombre, filtros in LISTADOS.items():
+                for orden in ("fecha_desc", "fecha_asc"):
+                    resultado["listados"][nombre, orden] = _recorrer(
+                        lambda cursor: repositorio.listar_oposiciones(
+                            filtros, orden=orden, cursor=cursor, por_pagina=POR_PAGINA
+                        )
+                    )
+                # Enlaces antiguos con ?page=N (OFFSET)
+                resultado["listados"][nombre, "page=2"] = _filas(
+                    repositorio.listar_oposiciones(filtros, page=2, por_pagina=POR_PAGINA)
+                )
+                departamentos, provincias = repositorio.facetas(filtros)
+                resultado["facetas"][nombre] = (
+                    sorted((d["departamento"], d["total"]) for d in departamentos),
+                    sorted((p["provincia"], p["total"]) for p in provincias),
+                )
+
+            user_id = repositorio.crear_usuario("ana@example.com", "hash", name="Ana")
+            ids = [fila[0] for fila in resultado["listados"]["todas", "fecha_desc"][0][0][2]]
+            for oposicion_id in ids[:3]:
+                repositorio.registrar_visita(user_id, oposicion_id)
+            alternadas = [repositorio.alternar_favorita(user_id, i) for i in ids[1:6]]
+            alternadas.append(repositorio.alternar_favorita(user_id, ids[2]))  # la quita
+            marcas = repositorio.marcas_usuario(user_id, ids)
+            resultado["marcas"] = (sorted(marcas.visitadas), sorted(marcas.favoritas))
+            resultado["alternadas"] = alternadas
+            resultado["favoritas"] = _recorrer(
+                lambda cursor: repositorio.listar_favoritas(user_id, cursor=cursor, por_pagina=2)
+            )
+            resultado["ids"] = ids
+        return resultado
+    finally:
+        cerrar_app(app)
+
+
+@pytest.fixture(scope="module")
+def referencia(tmp_path_factory):
+    return escenario("sqlite", tmp_path_factory.mktemp("referencia"))
+
+
+@pytest.fixture(scope="module", params=BACKENDS)
+def resultado(request, tmp_path_factory):
+    """El escenario con cada DB_BACKEND, en una BBDD nueva."""
+    if request.param == "sqlalchemy":
+        pytest.importorskip("sqlalchemy")
+    return escenario(request.param, tmp_path_factory.mktemp(request.param))
+
+
+def test_listados_y_cursores(resultado, referencia):
+    for (nombre, orden), valor in resultado["listados"].items():
+        if orden == "page=2":
+            continue
+        adelante, atras = valor
+        vistas = [fila for _, _, filas in adelante for fila in filas]
+        esperadas = _esperadas(LISTADOS[nombre])
+        # Todas las filas, sin repetir, en orden, y el total de la primera página
+        assert [fila[1] for fila in vistas] and {fila[1] for fila in vistas} == esperadas
+        assert len(vistas) == len(esperadas) == adelante[0][1]
+        claves = [(fila[4], fila[0]) for fila in vistas]
+        assert claves == sorted(claves, reverse=orden == "fecha_desc")
+        # Hacia atrás se vuelven a ver las mismas páginas
+        assert atras == [(p, filas) for p, _, filas in reversed(adelante[:-1])]
+
+    assert resultado["listados"] == referencia["listados"]
+
+
+def test_facetas(resultado, referencia):
+    for nombre, (departamentos, provincias) in resultado["facetas"].items():
+        # Cada desplegable cuenta con los demás filtros, sin el suyo ni la búsqueda
+        filtros = LISTADOS[nombre]._replace(busqueda=None)
+        por_departamento = _esperadas(filtros._replace(departamentos=()))
+        por_provincia = _esperadas(filtros._replace(provincia=None))
+        assert sum(total for _, total in departamentos) == len(por_departamento)
+        assert sum(total for _, total in provincias) == sum(
+            1 for f in FILAS if f["identificador"] in por_provincia and f["provincia"]
+        )
+    assert resultado["facetas"] == referencia["facetas"]
+
+
+def test_marcas_y_favoritas(resultado, referencia):
+    ids = resultado["ids"]
+    assert resultado["alternadas"] == [True] * 5 + [False]
+    assert resultado["marcas"] == (sorted(ids[:3]), sorted([ids[1], *ids[3:6]]))
+    adelante, _ = resultado["favoritas"]
+    favoritas = [fila[0] for _, _, filas in adelante for fila in filas]
+    assert sorted(favoritas) == sorted([ids[1], *ids[3:6]])
+    for clave in ("marcas", "alternadas", "favoritas"):
+        assert resultado[clave] == referencia[clave]
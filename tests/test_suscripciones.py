@@ -0,0 +1,90 @@
+import pytest
+
+from app.repositorio import DepartamentoDesconocido, get_repositorio
+from conftest import fila_oposicion, iniciar_sesion
+
+HACIENDA = "MINISTERIO DE HACIENDA"
+
+
+def _departamentos_boe(app):
+    from app.db import get_boe_db
+
+    with app.app_context():
+        return {row[0] for row in get_boe_db().execute("SELECT nombre FROM departamentos")}
+
+
+@pytest.fixture
+def user_id(app_backend):
+    from app.db import get_boe_db
+    from app.scraping.boe_scraper import insertar_oposiciones
+
+    with app_backend.app_context():
+        insertar_oposiciones(get_boe_db(), [fila_oposicion(1, HACIENDA)])
+        return get_repositorio().crear_usuario("ana@example.com", "hash")
+
+
+def test_suscripcion_a_departamento_existente(app_backend, user_id):
+    with app_backend.app_context():
+        repositorio = get_repositorio()
+        repositorio.guardar_preferencias_alertas(user_id, 1, [HACIENDA])
+        assert repositorio.preferencias_alertas(user_id) == (1, [HACIENDA])
+
+
+def test_departamento_desconocido_no_se_guarda_ni_se_da_de_alta(app_backend, user_id):
+    with app_backend.app_context():
+        repositorio = get_repositorio()
+        repositorio.guardar_preferencias_alertas(user_id, 1, [HACIENDA])
+        with pytest.raises(DepartamentoDesconocido) as error:
+            repositorio.guardar_preferencias_alertas(user_id, 0, [HACIENDA, "<script>"])
+        assert error.value.nombres == ["<script>"]
+        # Ni cambian las preferencias ni aparece el departamento en el BOE
+        assert repositorio.preferencias_alertas(user_id) == (1, [HACIENDA])
+    assert _departamentos_boe(app_backend) == {HACIENDA}
+
+
+def test_formulario_con_departamento_desconocido(app):
+    from app.db import get_boe_db
+    from app.scraping.boe_scraper import insertar_oposiciones
+
+    with app.app_context():
+        insertar_oposiciones(get_boe_db(), [fila_oposicion(1, HACIENDA)])
+    client = app.test_client()
+    iniciar_sesion(app, client)
+    respuesta = client.post(
+        "/user_alertas", data={"alerta_diaria": "1", "departamentos": ["INVENTADO"]},
+        follow_redirects=True,
+    )
+    assert "Departamentos desconocidos: INVENTADO" in respuesta.get_data(as_text=True)
+    assert _departamentos_boe(app) == {HACIENDA}
+
+
+def test_migracion_de_filtro_antiguo_no_da_de_alta_departamentos(app, capsys):
+    from app.db import get_boe_db, get_users_db
+    from app.migraciones import MIGRACIONES_USERS, aplicar_migraciones
+    from app.scraping.boe_scraper import insertar_oposiciones
+
+    with app.app_context():
+        insertar_oposiciones(get_boe_db(), [fila_oposicion(1, HACIENDA)])
+        repositorio = get_repositorio()
+        ana = repositorio.crear_usuario("ana@example.com", "hash")
+        luis = repositorio.crear_usuario("luis@example.com", "hash")
+        # Una BBDD de usuarios de antes de la migración 5, con los nombres
+        # unidos por comas en `departamento_filtro`
+        db = get_users_db()
+        db.execute("DROP TABLE suscripcion_departamentos")
+        db.executemany(
+            "INSERT INTO suscripciones (user_id, alerta_diaria, departamento_filtro) "
+            "VALUES (?, 1, ?)",
+            [(ana, f"{HACIENDA}, Ministerio de Haciendaa, foo"), (luis, "foo")],
+        )
+        db.execute("PRAGMA user_version = 4")
+        db.commit()
+
+        assert aplicar_migraciones(db, MIGRACIONES_USERS, "users", salida=lambda _: None) == 2
+
+        assert repositorio.preferencias_alertas(ana) == (1, [HACIENDA])
+        assert repositorio.preferencias_alertas(luis) == (1, [])
+    assert _departamentos_boe(app) == {HACIENDA}
+    salida = capsys.readouterr().out
+    assert f"usuario {ana}: departamentos desconocidos descartados: Ministerio de Haciendaa, foo" in salida
+    assert f"usuario {luis}: departamentos desconocidos descartados: foo (recibirá todos)" in salida
@@ -0,0 +1,149 @@
+import contextlib
+import io
+import multiprocessing
+import threading
+import time
+from datetime import date, timedelta
+
+import pytest
+
+from app.db import get_boe_db
+from app.scraping.boe_scraper import insertar_oposiciones
+from app.scraping.sync_log import hay_edicion
+from app.scraping.sync_lock import LeaseSync, SyncEnCurso, en_exclusiva
+from benchmarks.servidor_boe import ServidorBoe, fuente_sintetica
+from conftest import cerrar_app, crear_app_prueba, fila_oposicion
+
+PROCESOS = 4
+DIAS = 8  # siempre con algún domingo, sin BOE
+
+
+def _sincronizar_en_proceso(directorio, url, funcion, barrera, resultados):
+    """Un worker: su propia app y conexiones sobre la misma BBDD del BOE."""
+    from app.scraping import boe_scraper
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        app = crear_app_prueba(
+            directorio, BOE_SUMARIO_URL=url, BOE_SYNC_WORKERS=1, BOE_INSERT_LOTE_DIAS=1,
+            USERS_DB_PATH=str(directorio / f"usuarios-{multiprocessing.current_process().name}.db"),
+        )
+        try:
+            with app.app_context():
+                barrera.wait(30)  # todos piden la sincronización a la vez
+                if funcion == "scrape_boe_ultimos_dias":
+                    nuevas = boe_scraper.scrape_boe_ultimos_dias(DIAS, esperar=True)
+                else:
+                    nuevas = boe_scraper.sync_boe_hasta_hoy(DIAS, 0, esperar=True)
+            resultados.put(sorted(f["id"] for f in nuevas))
+        finally:
+            cerrar_app(app)
+
+
+@pytest.mark.parametrize("funcion", ["scrape_boe_ultimos_dias", "sync_boe_hasta_hoy"])
+def test_varios_procesos_descargan_cada_dia_una_vez(tmp_path, funcion):
+    # La BBDD se crea y migra antes; los procesos solo la abren
+    cerrar_app(crear_app_prueba(tmp_path))
+    contexto = multiprocessing.get_context("spawn")
+    barrera = contexto.Barrier(PROCESOS)
+    resultados = contexto.Queue()
+
+    # Con latencia, la sincronización dura lo bastante para que todos lleguen
+    # mientras está en curso
+    with ServidorBoe(fuente_sintetica(), latencia=0.1) as servidor:
+        procesos = [
+            contexto.Process(
+                target=_sincronizar_en_proceso,
+                args=(tmp_path, servidor.url, funcion, barrera, resultados),
+                name=f"sync-{n}",
+            )
+            for n in range(PROCESOS)
+        ]
+        for proceso in procesos:
+            proceso.start()
+        ids = [resultados.get(timeout=60) for _ in procesos]
+        for proceso in procesos:
+            proceso.join(10)
+        descargas = dict(servidor.peticiones_por_fecha)
+
+    assert [p.exitcode for p in procesos] == [0] * PROCESOS
+    hoy = date.today()
+    dias = {hoy - timedelta(days=i) for i in range(DIAS)}
+    if funcion == "sync_boe_hasta_hoy":
+        dias = {d for d in dias if hay_edicion(d)}
+    # Cada día se pidió una sola vez entre todos los procesos
+    assert set(descargas) == dias
+    assert set(descargas.values()) == {1}
+    # Y todos devuelven las mismas oposiciones: las que insertó el que sincronizó
+    assert ids[0] and all(lista == ids[0] for lista in ids)
+    app = crear_app_prueba(tmp_path)
+    try:
+        with app.app_context():
+            guardados = [r[0] for r in get_boe_db().execute("SELECT id FROM oposiciones ORDER BY id")]
+    finally:
+        cerrar_app(app)
+    assert guardados == ids[0]
+
+
+def test_solo_una_sincroniza_y_la_otra_recibe_sus_filas(app):
+    ejecuciones = []
+    dentro = threading.Event()
+    resultados = {}
+
+    def sincronizar(lease):
+        ejecuciones.append(threading.current_thread().name)
+        dentro.set()
+        time.sleep(0.3)  # la otra llega mientras tanto
+        nuevas = insertar_oposiciones(get_boe_db(), [fila_oposicion(i) for i in range(3)])
+        return nuevas
+
+    def hilo(nombre, esperar_a=None):
+        if esperar_a is not None:
+            esperar_a.wait()
+        with app.app_context():
+            resultados[nombre] = en_exclusiva(get_boe_db(), sincronizar, intervalo=0.05)
+
+    primero = threading.Thread(target=hilo, args=("primero",), name="primero")
+    segundo = threading.Thread(target=hilo, args=("segundo", dentro), name="segundo")
+    primero.start()
+    segundo.start()
+    primero.join(10)
+    segundo.join(10)
+
+    assert ejecuciones == ["primero"]
+    ids = [f["id"] for f in resultados["primero"]]
+    assert len(ids) == 3
+    # La que esperaba devuelve las filas del rango de ids que anotó la otra
+    assert [f["id"] for f in resultados["segundo"]] == ids
+    assert [f["identificador"] for f in resultados["segundo"]] == [
+        f["identificador"] for f in resultados["primero"]
+    ]
+
+
+def test_sin_esperar_lanza_sync_en_curso(app):
+    with app.app_context():
+        otro = LeaseSync(get_boe_db())
+        assert otro.adquirir()
+        with pytest.raises(SyncEnCurso):
+            en_exclusiva(get_boe_db(), lambda lease: [], esperar=False)
+        otro.liberar()
+
+
+def test_lease_caducado_se_recupera(app):
+    with app.app_context():
+        db = get_boe_db()
+        # Un proceso que murió con el lease cogido hace rato
+        muerto = LeaseSync(db, duracion=-1)
+        assert muerto.adquirir()
+
+        ejecutado = en_exclusiva(db, lambda lease: ["sincronizado"], esperar=False)
+        assert ejecutado == ["sincronizado"]
+
+        propietario, = db.execute(
+            "SELECT propietario FROM sync_lease WHERE nombre = 'sync_boe'"
+        ).fetchone()
+        assert propietario is None  # quedó liberado
+
+        # Mientras no caduca, en cambio, nadie más lo consigue
+        vivo = LeaseSync(db, duracion=60)
+        assert vivo.adquirir()
+        assert not LeaseSync(db).adquirir()